@@ -0,0 +1,96 @@
+"""Simulated benchmark of calling a light group against calling its members.
+
+The area used to turn on its light group entity, which then turned on each of
+its members, two trips through the service registry per action. Now it calls
+the members directly. This times both paths end to end, from the call until
+every member has its new state.
+
+Nothing here is the real AreaLightGroup or the light group integration. The
+light service is a stand in that answers after the given device latency, and
+the group hop is simulated by that same service calling itself again for the
+members. The numbers show the cost of the extra trip through the service
+registry, not the overhead of the real group entity.
+
+Run with ``python -m benchmarks.light_fanout`` from the repository root, it
+needs Home Assistant installed.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_ON, STATE_ON
+from homeassistant.core import HomeAssistant, ServiceCall
+
+GROUP = "light.simply_magic_areas_light_kitchen"
+
+
+async def _setup(hass: HomeAssistant, members: list[str], latency: float) -> None:
+    async def _turn_on(call: ServiceCall) -> None:
+        entity_ids = call.data[ATTR_ENTITY_ID]
+        if entity_ids == [GROUP]:
+            # Simulates the light group, pass it on and write its own state.
+            await hass.services.async_call(
+                LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: members}, blocking=True
+            )
+            hass.states.async_set(GROUP, STATE_ON)
+            return
+        await asyncio.sleep(latency)
+        for entity_id in entity_ids:
+            hass.states.async_set(entity_id, STATE_ON)
+
+    hass.services.async_register(LIGHT_DOMAIN, SERVICE_TURN_ON, _turn_on)
+
+
+async def _time(
+    hass: HomeAssistant, target: list[str], members: list[str], iterations: int
+) -> list[float]:
+    timings: list[float] = []
+    for _ in range(iterations):
+        for entity_id in members:
+            hass.states.async_set(entity_id, "off")
+        start = time.perf_counter()
+        await hass.services.async_call(
+            LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: target}, blocking=True
+        )
+        await hass.async_block_till_done()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run(
+    iterations: int, member_count: int, latency: float
+) -> tuple[float, float]:
+    """Time both paths, returns the median seconds for the group and direct."""
+    members = [f"light.member_{i}" for i in range(member_count)]
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        try:
+            await _setup(hass, members, latency)
+            group = await _time(hass, [GROUP], members, iterations)
+            direct = await _time(hass, members, members, iterations)
+        finally:
+            await hass.async_stop(force=True)
+    return statistics.median(group), statistics.median(direct)
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=1_000)
+    parser.add_argument("--members", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    group, direct = asyncio.run(run(args.iterations, args.members, args.latency))
+    print(
+        f"{args.members} members (simulated group): group {group * 1000:.3f}ms, "
+        f"direct {direct * 1000:.3f}ms, saved {(group - direct) * 1000:.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
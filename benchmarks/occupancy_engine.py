@@ -0,0 +1,86 @@
+"""Benchmark the occupancy engine with synthetic sensor events.
+
+Run with ``python -m benchmarks.occupancy_engine`` from the repository root.
+The engine has no Home Assistant imports, so it is loaded without the
+integration ``__init__`` and runs without Home Assistant installed.
+"""
+
+import argparse
+import importlib
+import pathlib
+import random
+import sys
+import time
+import types
+
+_PACKAGE = "custom_components.simply_magic_areas"
+
+
+def _load_occupancy() -> types.ModuleType:
+    if _PACKAGE not in sys.modules:
+        # An empty package in place of the integration, so importing the
+        # engine skips its __init__ and the Home Assistant imports in it.
+        package = types.ModuleType(_PACKAGE)
+        package.__path__ = [
+            str(
+                pathlib.Path(__file__).resolve().parent.parent
+                / "custom_components"
+                / "simply_magic_areas"
+            )
+        ]
+        sys.modules[_PACKAGE] = package
+    return importlib.import_module(f"{_PACKAGE}.base.occupancy")
+
+
+_occupancy = _load_occupancy()
+AreaState = _occupancy.AreaState
+OccupancyConfig = _occupancy.OccupancyConfig
+OccupancyEngine = _occupancy.OccupancyEngine
+
+
+def _make_events(count: int, sensors: int, seed: int) -> list[tuple[str, bool, float]]:
+    rng = random.Random(seed)
+    entity_ids = [f"binary_sensor.motion_{i}" for i in range(sensors)]
+    now = 0.0
+    events: list[tuple[str, bool, float]] = []
+    for _ in range(count):
+        now += rng.expovariate(1.0)
+        events.append((rng.choice(entity_ids), rng.random() < 0.5, now))
+    return events
+
+
+def run(count: int, sensors: int, seed: int) -> float:
+    """Push the events through an engine, returns the events per second."""
+    engine = OccupancyEngine(
+        OccupancyConfig(
+            clear_timeout=60,
+            extended_timeout=300,
+            secondary_states=(AreaState.AREA_STATE_BRIGHT,),
+        )
+    )
+    events = _make_events(count, sensors, seed)
+    sensor_changed = engine.sensor_changed
+    evaluate = engine.evaluate
+
+    start = time.perf_counter()
+    for entity_id, active, now in events:
+        sensor_changed(entity_id, active, now)
+        evaluate(now)
+    elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--sensors", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rate = run(args.events, args.sensors, args.seed)
+    print(f"{args.events} events, {args.sensors} sensors: {rate:,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,24 @@ from homeassistant.helpers.entity_registry import (
     EventEntityRegistryUpdatedData,
 )
 
+from .base.actuation import get_actuation
 from .base.magic import MagicArea, MagicMetaArea
 from .const import (
+    CONF_ACTUATION_RATE,
+    CONF_ACTUATION_RATE_LIMITS,
     CONF_ID,
     CONF_NAME,
+    DATA_ACTUATION,
     DATA_AREA_OBJECT,
+    DATA_CLOCK,
     DATA_ENTITY_LISTENER,
+    DATA_EVENT_BUDGET,
+    DATA_LANES,
+    DATA_ROOM_PRESENCE,
+    DATA_STORM,
     DATA_UNDO_UPDATE_LISTENER,
+    DEFAULT_ACTUATION_RATE,
+    DEFAULT_ACTUATION_RATE_LIMITS,
     META_AREA_EXTERIOR,
     META_AREA_GLOBAL,
     META_AREA_INTERIOR,
@@ -78,6 +89,15 @@ async def async_setup_entry(
         # Initialise magic area and wait to continue.
         await magic_area.initialize()
 
+        if magic_area.id == META_AREA_GLOBAL.lower():
+            # The command budgets are for the whole integration.
+            get_actuation(hass).configure(
+                magic_area.config.get(CONF_ACTUATION_RATE, DEFAULT_ACTUATION_RATE),
+                magic_area.config.get(
+                    CONF_ACTUATION_RATE_LIMITS, DEFAULT_ACTUATION_RATE_LIMITS
+                ),
+            )
+
         _LOGGER.debug(
             "Magic Area %s (%s) created: %s",
             magic_area.name,
@@ -186,10 +206,25 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     all_unloaded = all(platforms_unloaded)
 
     if all_unloaded:
+        area.unload()
         data.pop(config_entry.entry_id)
 
     if not data:
         hass.data.pop(MODULE_DATA)
+        hass.data.pop(DATA_CLOCK, None)
+        room_router = hass.data.pop(DATA_ROOM_PRESENCE, None)
+        if room_router is not None:
+            room_router.async_shutdown()
+        storm_detector = hass.data.pop(DATA_STORM, None)
+        if storm_detector is not None:
+            storm_detector.async_shutdown()
+        hass.data.pop(DATA_EVENT_BUDGET, None)
+        actuation = hass.data.pop(DATA_ACTUATION, None)
+        if actuation is not None:
+            actuation.async_shutdown()
+        lanes = hass.data.pop(DATA_LANES, None)
+        if lanes is not None:
+            lanes.async_shutdown()
 
     return all_unloaded
 
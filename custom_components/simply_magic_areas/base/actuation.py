@@ -0,0 +1,526 @@
+"""Send the service calls that move the lights, fans and the rest.
+
+The areas decide what to do from their state change handlers, some run in the
+event loop and some in the executor. Waiting on the service call there holds
+the handler up until the device answers, so every call goes through the
+dispatcher instead. It starts the call on the event loop and returns straight
+away, the call then runs with a timeout. The dispatcher keeps track of what is
+in flight to each target, along with the latency and failures of the calls.
+
+A whole house going clear at once sends a burst of calls that can swamp a
+zigbee coordinator, so each radio, the integration the entities belong to, can
+be given a budget of commands per second. Each entity in a call is a command,
+a call to more entities than the radio can take in one go is split up. Calls
+over the budget wait in a queue for the radio, a newer call to a target that
+is still waiting replaces the old one so only the latest intent goes out. It
+moves to the back of the queue, so it also goes out after any other waiting
+call that shares one of its entities.
+
+Each entity can hand over a context tracker, the calls then go out with a new
+context that the tracker remembers. A state change from one of those contexts
+is the entity's own doing, anything else was changed by hand.
+
+When the whole house clears every area turns its lights off in the same tick.
+The light and fan calls are held until the end of the tick, the ones with the
+same service and data are sent as one call to all their entities. Calls with a
+different brightness stay separate.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components.fan import DOMAIN as FAN_DOMAIN
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import CALLBACK_TYPE, Context, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_registry import async_get as async_get_er
+from homeassistant.helpers.event import async_call_later
+
+from ..const import (
+    ACTUATION_CONTEXTS,
+    ACTUATION_TIMEOUT,
+    DATA_ACTUATION,
+    DEFAULT_ACTUATION_RATE,
+    DOMAIN,
+)
+from .clock import get_clock
+from .lanes import get_lanes
+
+_LOGGER = logging.getLogger(__name__)
+
+# The calls in these domains are batched over the areas.
+_BATCHED_DOMAINS = (LIGHT_DOMAIN, FAN_DOMAIN)
+
+
+@dataclass(slots=True)
+class ActuationStats:
+    """Counters for the service calls sent by the dispatcher."""
+
+    sent: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    # Latency of the completed calls, in seconds.
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    # Calls that had to wait for the radio and the ones replaced by a newer call.
+    queued: int = 0
+    merged: int = 0
+    # Time the sent calls waited in the queue, in seconds.
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    # Batches sent and the entities in them.
+    batches: int = 0
+    batched: int = 0
+    max_batch: int = 0
+
+    @property
+    def average_latency(self) -> float:
+        """Average latency of the completed calls, in seconds."""
+        if not self.completed:
+            return 0.0
+        return self.total_latency / self.completed
+
+    @property
+    def average_wait(self) -> float:
+        """Average time the sent calls waited in the queue, in seconds."""
+        if not self.sent:
+            return 0.0
+        return self.total_wait / self.sent
+
+    @property
+    def average_batch(self) -> float:
+        """Average number of entities in a batch."""
+        if not self.batches:
+            return 0.0
+        return self.batched / self.batches
+
+
+@dataclass(slots=True)
+class _Command:
+    """A service call waiting for its radio."""
+
+    domain: str
+    service: str
+    data: dict[str, Any]
+    context: Context | None
+    queued_at: float
+    # The commands it takes from the budget, one for each entity.
+    cost: int
+
+
+@dataclass(slots=True)
+class _Batch:
+    """Calls from this tick with the same service and data."""
+
+    domain: str
+    service: str
+    data: dict[str, Any]
+    # Only the keys are used, in the order they were added.
+    entity_ids: dict[str, None]
+    contexts: list["ContextTracker"]
+
+
+class ContextTracker:
+    """The contexts of the latest calls from an entity."""
+
+    __slots__ = ("_ids", "_size")
+
+    def __init__(self, size: int = ACTUATION_CONTEXTS) -> None:
+        """Initialize the tracker, remembers up to size contexts."""
+        self._size = size
+        # Only the keys are used, in the order they were added.
+        self._ids: dict[str, None] = {}
+
+    @callback
+    def add(self, context: Context) -> None:
+        """Remember the context of a call, dropping the oldest one if full."""
+        ids = self._ids
+        ids[context.id] = None
+        if len(ids) > self._size:
+            del ids[next(iter(ids))]
+
+    def is_ours(self, context: Context | None) -> bool:
+        """If the context, or the one it came from, is from one of the calls."""
+        if context is None:
+            return False
+        ids = self._ids
+        return context.id in ids or (
+            context.parent_id is not None and context.parent_id in ids
+        )
+
+
+class _RadioQueue:
+    """Token bucket for a radio and the calls waiting for it."""
+
+    __slots__ = ("pending", "rate", "stamp", "timer", "tokens")
+
+    def __init__(self, rate: float, now: float) -> None:
+        """Initialize the queue with a full budget, a rate of 0 is no limit."""
+        self.rate = rate
+        # Can burst up to a second of commands.
+        self.tokens = self.burst
+        self.stamp = now
+        self.pending: dict[str, _Command] = {}
+        self.timer: CALLBACK_TYPE | None = None
+
+    @property
+    def burst(self) -> float:
+        """The most commands the budget holds."""
+        return max(self.rate, 1.0)
+
+    @property
+    def max_call(self) -> int | None:
+        """The most entities in one call, None for no limit."""
+        if self.rate <= 0:
+            return None
+        return int(self.burst)
+
+    def take(self, now: float, cost: int = 1) -> bool:
+        """Use up the commands from the budget, False if there are not enough."""
+        if self.rate <= 0:
+            return True
+        burst = self.burst
+        self.tokens = min(burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        # Capped, so a call queued before the rate went down still goes out.
+        cost = min(cost, burst)
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+    def wait(self, cost: int = 1) -> float:
+        """How long until the commands are in the budget, in seconds."""
+        return (min(cost, self.burst) - self.tokens) / self.rate
+
+
+class ActuationDispatcher:
+    """Non blocking service calls with a timeout, shared by all the areas."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        timeout: float = ACTUATION_TIMEOUT,
+        rate: float = DEFAULT_ACTUATION_RATE,
+        rate_limits: dict[str, float] | None = None,
+    ) -> None:
+        """Initialize the dispatcher with nothing in flight."""
+        self._hass = hass
+        self._clock = get_clock(hass)
+        self._lanes = get_lanes(hass)
+        self._timeout = timeout
+        self._rate = rate
+        self._rate_limits: dict[str, float] = dict(rate_limits or {})
+        self._in_flight: dict[str, int] = {}
+        self._queues: dict[str, _RadioQueue] = {}
+        self._radios: dict[str, str] = {}
+        self._batches: dict[tuple[str, str, str], _Batch] = {}
+        self._batched: dict[str, tuple[str, str, str]] = {}
+        self._flush_queued: bool = False
+        self.stats = ActuationStats()
+
+    def in_flight(self, target: str) -> int:
+        """How many calls to the target have not finished yet."""
+        return self._in_flight.get(target, 0)
+
+    def queue_depth(self, radio: str | None = None) -> int:
+        """How many calls are waiting for the radio, or all the radios."""
+        if radio is not None:
+            queue = self._queues.get(radio)
+            return 0 if queue is None else len(queue.pending)
+        return sum(len(queue.pending) for queue in self._queues.values())
+
+    def queue_depths(self) -> dict[str, int]:
+        """How many calls are waiting for each radio."""
+        return {radio: len(queue.pending) for radio, queue in self._queues.items()}
+
+    @callback
+    def configure(self, rate: float, rate_limits: dict[str, float]) -> None:
+        """Set the commands per second for the radios, rate_limits by radio."""
+        self._rate = rate
+        self._rate_limits = dict(rate_limits)
+        for radio, queue in self._queues.items():
+            queue.rate = self._rate_limits.get(radio, rate)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the queue timers and drop the waiting calls."""
+        if self._flush_queued:
+            self._lanes.async_cancel(self._async_flush)
+            self._flush_queued = False
+        self._batches.clear()
+        self._batched.clear()
+        for queue in self._queues.values():
+            if queue.timer is not None:
+                queue.timer()
+                queue.timer = None
+            queue.pending.clear()
+
+    def dispatch(
+        self,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        contexts: ContextTracker | None = None,
+    ) -> None:
+        """Send the service call without waiting, safe to call from any thread."""
+        self._hass.loop.call_soon_threadsafe(
+            self.async_dispatch, domain, service, data, contexts
+        )
+
+    @callback
+    def async_dispatch(
+        self,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        contexts: ContextTracker | None = None,
+    ) -> None:
+        """Send the service call without waiting for it.
+
+        With contexts the call gets a new context that the tracker remembers.
+        """
+        if domain in _BATCHED_DOMAINS and ATTR_ENTITY_ID in data:
+            self._async_batch(domain, service, data, contexts)
+            return
+        context = None
+        if contexts is not None:
+            context = Context()
+            contexts.add(context)
+        self._async_route(domain, service, data, context)
+
+    @callback
+    def _async_batch(
+        self,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        contexts: ContextTracker | None,
+    ) -> None:
+        payload = {key: value for key, value in data.items() if key != ATTR_ENTITY_ID}
+        batch_key = (domain, service, repr(sorted(payload.items())))
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = self._batches[batch_key] = _Batch(domain, service, payload, {}, [])
+        entity_id = data[ATTR_ENTITY_ID]
+        batched = self._batched
+        for member in [entity_id] if isinstance(entity_id, str) else entity_id:
+            other = batched.get(member)
+            if other is not None and other != batch_key:
+                # A later call to the same entity in this tick wins.
+                del self._batches[other].entity_ids[member]
+            batched[member] = batch_key
+            batch.entity_ids[member] = None
+        if contexts is not None:
+            batch.contexts.append(contexts)
+        if not self._flush_queued:
+            # Goes out at the end of the tick, ahead of the low lane work.
+            self._flush_queued = True
+            self._lanes.async_queue_high(self._async_flush)
+
+    @callback
+    def _async_flush(self) -> None:
+        self._flush_queued = False
+        batches = self._batches
+        self._batches = {}
+        self._batched = {}
+        stats = self.stats
+        for batch in batches.values():
+            if not batch.entity_ids:
+                continue
+            context = None
+            if batch.contexts:
+                # One call for all the areas, each one knows it as its own.
+                context = Context()
+                for contexts in batch.contexts:
+                    contexts.add(context)
+            size = len(batch.entity_ids)
+            stats.batches += 1
+            stats.batched += size
+            stats.max_batch = max(stats.max_batch, size)
+            _LOGGER.debug(  # type: ignore  # noqa: PGH003
+                "%s.%s batch of %s", batch.domain, batch.service, size
+            )
+            self._async_route(
+                batch.domain,
+                batch.service,
+                {**batch.data, ATTR_ENTITY_ID: list(batch.entity_ids)},
+                context,
+            )
+
+    @callback
+    def _async_route(
+        self,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        context: Context | None,
+    ) -> None:
+        entity_id = data.get(ATTR_ENTITY_ID, "")
+        if isinstance(entity_id, str):
+            radio = self._radio(domain, entity_id)
+            self._async_enqueue(radio, domain, service, data, context)
+            return
+        # Split the call up by radio, each one has its own budget.
+        by_radio: dict[str, list[str]] = {}
+        for member in entity_id:
+            by_radio.setdefault(self._radio(domain, member), []).append(member)
+        now = self._clock.monotonic()
+        for radio, members in by_radio.items():
+            size = self._queue(radio, now).max_call or len(members)
+            for start in range(0, len(members), size):
+                self._async_enqueue(
+                    radio,
+                    domain,
+                    service,
+                    {**data, ATTR_ENTITY_ID: members[start : start + size]},
+                    context,
+                )
+
+    def _radio(self, domain: str, entity_id: str) -> str:
+        radio = self._radios.get(entity_id)
+        if radio is None:
+            # Anything not in the registry shares a queue with its domain.
+            entry = async_get_er(self._hass).async_get(entity_id) if entity_id else None
+            radio = domain if entry is None else entry.platform
+            self._radios[entity_id] = radio
+        return radio
+
+    def _queue(self, radio: str, now: float) -> _RadioQueue:
+        queue = self._queues.get(radio)
+        if queue is None:
+            queue = self._queues[radio] = _RadioQueue(
+                self._rate_limits.get(radio, self._rate), now
+            )
+        return queue
+
+    @callback
+    def _async_enqueue(
+        self,
+        radio: str,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        context: Context | None,
+    ) -> None:
+        entity_id = data.get(ATTR_ENTITY_ID, "")
+        if isinstance(entity_id, str):
+            target = entity_id
+            cost = 1
+        else:
+            target = ",".join(entity_id)
+            cost = max(len(entity_id), 1)
+        now = self._clock.monotonic()
+        queue = self._queue(radio, now)
+
+        pending = queue.pending.pop(target, None)
+        if pending is not None:
+            # Only the latest intent matters. It goes to the back, behind any
+            # call queued since that shares an entity with it.
+            self.stats.merged += 1
+            queue.pending[target] = _Command(
+                domain, service, data, context, pending.queued_at, cost
+            )
+            return
+        command = _Command(domain, service, data, context, now, cost)
+        if not queue.pending and queue.take(now, cost):
+            self._async_send(command, target, now)
+            return
+
+        self.stats.queued += 1
+        queue.pending[target] = command
+        if queue.timer is None:
+            self._schedule_drain(radio, queue)
+
+    def _schedule_drain(self, radio: str, queue: _RadioQueue) -> None:
+        @callback
+        def _drain(_now: datetime) -> None:
+            queue.timer = None
+            self._async_drain(radio, queue)
+
+        cost = next(iter(queue.pending.values())).cost
+        queue.timer = async_call_later(self._hass, queue.wait(cost), _drain)
+
+    @callback
+    def _async_drain(self, radio: str, queue: _RadioQueue) -> None:
+        now = self._clock.monotonic()
+        pending = queue.pending
+        while pending and queue.take(now, next(iter(pending.values())).cost):
+            target = next(iter(pending))
+            self._async_send(pending.pop(target), target, now)
+        if pending:
+            _LOGGER.debug(  # type: ignore  # noqa: PGH003
+                "%s: %s calls waiting for the radio", radio, len(pending)
+            )
+            self._schedule_drain(radio, queue)
+
+    @callback
+    def _async_send(self, command: _Command, target: str, now: float) -> None:
+        stats = self.stats
+        wait = now - command.queued_at
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        domain = command.domain
+        service = command.service
+        self._hass.async_create_task(
+            self._async_call(domain, service, command.data, command.context, target),
+            f"{DOMAIN} {domain}.{service} {target}",
+        )
+
+    async def _async_call(
+        self,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        context: Context | None,
+        target: str,
+    ) -> None:
+        stats = self.stats
+        stats.sent += 1
+        self._in_flight[target] = self._in_flight.get(target, 0) + 1
+        start = self._clock.monotonic()
+        try:
+            async with asyncio.timeout(self._timeout):
+                await self._hass.services.async_call(
+                    domain, service, data, blocking=True, context=context
+                )
+        except TimeoutError:
+            stats.timed_out += 1
+            _LOGGER.warning(
+                "%s.%s to %s timed out after %ss",
+                domain,
+                service,
+                target,
+                self._timeout,
+            )
+        except (HomeAssistantError, vol.Invalid) as err:
+            stats.failed += 1
+            _LOGGER.warning("%s.%s to %s failed: %s", domain, service, target, err)
+        else:
+            latency = self._clock.monotonic() - start
+            stats.completed += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            _LOGGER.debug(  # type: ignore  # noqa: PGH003
+                "%s.%s to %s took %.3fs", domain, service, target, latency
+            )
+        finally:
+            count = self._in_flight[target] - 1
+            if count:
+                self._in_flight[target] = count
+            else:
+                del self._in_flight[target]
+
+
+def get_actuation(hass: HomeAssistant) -> ActuationDispatcher:
+    """Return the shared actuation dispatcher, creating it on first use."""
+    dispatcher: ActuationDispatcher | None = hass.data.get(DATA_ACTUATION)
+    if dispatcher is None:
+        dispatcher = hass.data[DATA_ACTUATION] = ActuationDispatcher(hass)
+    return dispatcher
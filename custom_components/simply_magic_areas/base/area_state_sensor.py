@@ -1,9 +1,11 @@
 """Select control for magic areas, tracks the state as an enum."""
 
-import asyncio
 from collections.abc import Callable
-from datetime import UTC, datetime, timedelta
+from datetime import datetime, timedelta
+from functools import partial
 import logging
+import math
+from typing import Any
 
 from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
 from homeassistant.components.sensor import (
@@ -16,8 +18,6 @@ from homeassistant.const import (
     ATTR_DEVICE_CLASS,
     ATTR_ENTITY_ID,
     STATE_ON,
-    STATE_UNAVAILABLE,
-    STATE_UNKNOWN,
 )
 from homeassistant.core import Event, EventStateChangedData, callback
 from homeassistant.helpers.event import (
@@ -25,10 +25,12 @@ from homeassistant.helpers.event import (
     async_track_state_change_event,
     async_track_time_interval,
 )
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoredExtraData
 
 from ..config.area_state import AreaState
 from ..config.entity_names import EntityNames
 from ..const import (
+    AREA_EVENT_BUDGET,
     ATTR_ACTIVE_AREAS,
     ATTR_ACTIVE_SENSORS,
     ATTR_AREAS,
@@ -41,33 +43,62 @@ from ..const import (
     CONF_CLEAR_TIMEOUT,
     CONF_EXTENDED_TIMEOUT,
     CONF_FEATURE_ADVANCED_LIGHT_GROUPS,
-    CONF_FEATURE_HUMIDITY,
-    CONF_HUMIDITY_TREND_DOWN_CUT_OFF,
-    CONF_HUMIDITY_TREND_UP_CUT_OFF,
-    CONF_HUMIDITY_ZERO_WAIT_TIME,
     CONF_MQTT_ROOM_PRESENCE,
     CONF_ON_STATES,
+    CONF_PRESENCE_DEBOUNCE,
     CONF_PRESENCE_DEVICE_PLATFORMS,
+    CONF_PRESENCE_MIN_OFF,
+    CONF_PRESENCE_MIN_ON,
+    CONF_PRESENCE_QUORUM,
     CONF_PRESENCE_SENSOR_DEVICE_CLASS,
+    CONF_PRESENCE_SENSOR_WEIGHTS,
+    CONF_PRESENCE_THRESHOLD,
     CONF_TYPE,
     CONF_UPDATE_INTERVAL,
-    DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF,
-    DEFAULT_HUMIDITY_TREND_UP_CUT_OFF,
-    DEFAULT_HUMIDITY_ZERO_WAIT_TIME,
     DEFAULT_MQTT_ROOM_PRESENCE,
     DEFAULT_ON_STATES,
+    DEFAULT_PRESENCE_DEBOUNCE,
     DEFAULT_PRESENCE_DEVICE_PLATFORMS,
     DEFAULT_PRESENCE_DEVICE_SENSOR_CLASS,
+    DEFAULT_PRESENCE_MIN_OFF,
+    DEFAULT_PRESENCE_MIN_ON,
+    DEFAULT_PRESENCE_QUORUM,
+    DEFAULT_PRESENCE_SENSOR_WEIGHTS,
+    DEFAULT_PRESENCE_THRESHOLD,
     DEFAULT_UPDATE_INTERVAL,
+    DEGRADED_SAMPLE_INTERVAL,
+    EVENT_BUDGET_WINDOW,
+    EVENT_MAGICAREAS_DEGRADED,
     INVALID_STATES,
 )
+from .budget import EventBudget, get_event_budget
+from .clock import get_clock
 from .entities import MagicEntity
-from .magic import ControlType, MagicArea
+from .humidity import HumidityResult
+from .lanes import get_lanes
+from .magic import MagicArea, MagicMetaArea
+from .occupancy import OccupancyConfig, OccupancyEngine
+from .presence_filter import PresenceFilter, PresenceFilterConfig
+from .room_presence import get_room_router
+from .storm import get_storm_detector
 
 _LOGGER = logging.getLogger(__name__)
 
 ATTR_HUMIDITY_ON = "humidity_on"
 ATTR_HUMIDITY_ZERO_TS = "humidity_zero_ts"
+ATTR_ABSORBED_EVENTS = "absorbed_events"
+ATTR_DEGRADED = "degraded"
+
+# Keys in the extra restore data, all wall clock timestamps.
+RESTORE_LAST_OFF = "last_off"
+
+
+def _availability_changed(event: Event[EventStateChangedData]) -> bool:
+    """If the entity went to or came back from being unavailable."""
+    old_state = event.data["old_state"]
+    new_state = event.data["new_state"]
+    was_valid = old_state is not None and old_state.state not in INVALID_STATES
+    return new_state is not None and was_valid == (new_state.state in INVALID_STATES)
 
 
 class AreaStateSensor(MagicEntity, SensorEntity):
@@ -85,13 +116,32 @@ class AreaStateSensor(MagicEntity, SensorEntity):
         self._attr_native_value = AreaState.AREA_STATE_CLEAR
         self._attr_extra_state_attributes = {}
         self._attr_device_class = SensorDeviceClass.ENUM
-
-        self._last_off_time: datetime = datetime.now(UTC) - timedelta(days=2)  # type: ignore  # noqa: PGH003
-        self._clear_timeout_callback: Callable[[], None] | None = None
-        self._extended_timeout_callback: Callable[[], None] | None = None
+        self._clock = get_clock(area.hass)
+        self._storm = get_storm_detector(area.hass)
+        self._lanes = get_lanes(area.hass)
+        self._budget = EventBudget(AREA_EVENT_BUDGET, EVENT_BUDGET_WINDOW)
+        self._global_budget = get_event_budget(area.hass)
+        self._degraded: bool = False
+        self._degraded_events: int = 0
+        self._degraded_samples: int = 0
+        self._sample_callback: Callable[[], None] | None = None
+
+        # Deadlines are all in monotonic loop time.
+        self._clear_deadline: float | None = None
+        self._extended_deadline: float | None = None
+        self._humidity: HumidityResult | None = None
+        self._humidity_zero_start: float | None = None
+        self._deadline: float | None = None
+        self._deadline_callback: Callable[[], None] | None = None
+        self._drift_count: int = 0
+        self._attributes_changed: bool = False
         self._sensors: list[str] = []
         self._mqqt_room_sensors: list[str] = []
-        self._mode: str = "one"
+        self._secondary_entities = area.secondary_state_entities()
+        self._engine = OccupancyEngine(self._build_occupancy_config())
+        self._filter = PresenceFilter(
+            self._build_filter_config(), area.presence_filter_stats
+        )
 
     async def async_added_to_hass(self) -> None:
         """Call to add the system to hass."""
@@ -100,6 +150,7 @@ class AreaStateSensor(MagicEntity, SensorEntity):
         await self._restore_state()
         await self._load_attributes()
         self._load_presence_sensors()
+        self._load_sensor_states()
 
         # Setup the listeners
         await self._setup_listeners()
@@ -130,7 +181,114 @@ class AreaStateSensor(MagicEntity, SensorEntity):
             self.area.state = AreaState(last_state.state)
             self._attr_native_value = last_state.state
             self._attr_extra_state_attributes = dict(last_state.attributes)  # type: ignore  # noqa: PGH003
-        self.hass.loop.call_soon_threadsafe(self._update_state, datetime.now(UTC))
+            zero_ts = self._attr_extra_state_attributes.get(ATTR_HUMIDITY_ZERO_TS)
+            if zero_ts is not None:
+                self._humidity_zero_start = self._clock.from_timestamp(float(zero_ts))
+            self.area.humidity.restore(
+                bool(self._attr_extra_state_attributes.get(ATTR_HUMIDITY_ON, False)),
+                self._humidity_zero_start,
+            )
+            await self._restore_timers()
+        # Once the sensors are loaded, at the end of the loop iteration.
+        self._lanes.async_queue_high(self._request_update)
+
+    async def _restore_timers(self) -> None:
+        """Resume the clear and extended timeouts from before the restart.
+
+        Both deadlines follow on from when presence was last lost, so putting
+        back the last off time lets the first evaluation re-arm them exactly.
+        """
+        extra_data = await self.async_get_last_extra_data()
+        if extra_data is None:
+            return
+        last_off = extra_data.as_dict().get(RESTORE_LAST_OFF)
+        if last_off is None:
+            return
+        self._engine.restore(self._clock.from_timestamp(float(last_off)))
+        _LOGGER.debug(  # type: ignore  # noqa: PGH003
+            "%s: Restored last off %s", self.name, last_off
+        )
+
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData:
+        """Save when presence was last lost, to resume the timeouts on restart."""
+        last_off = self._engine.last_off
+        return RestoredExtraData(
+            {
+                RESTORE_LAST_OFF: (
+                    self._clock.to_wall(last_off).timestamp()
+                    if math.isfinite(last_off)
+                    else None
+                )
+            }
+        )
+
+    def _build_occupancy_config(self) -> OccupancyConfig:
+        advanced_config = self.area.feature_config(CONF_FEATURE_ADVANCED_LIGHT_GROUPS)
+        return OccupancyConfig(
+            clear_timeout=self._get_clear_timeout(),
+            extended_timeout=self._get_extended_timeout(),
+            secondary_states=self.area.secondary_states(),
+            quorum=int(
+                advanced_config.get(CONF_PRESENCE_QUORUM, DEFAULT_PRESENCE_QUORUM)
+            ),
+            threshold=float(
+                advanced_config.get(CONF_PRESENCE_THRESHOLD, DEFAULT_PRESENCE_THRESHOLD)
+            ),
+        )
+
+    def _build_filter_config(self) -> PresenceFilterConfig:
+        advanced_config = self.area.feature_config(CONF_FEATURE_ADVANCED_LIGHT_GROUPS)
+        return PresenceFilterConfig(
+            debounce=float(
+                advanced_config.get(CONF_PRESENCE_DEBOUNCE, DEFAULT_PRESENCE_DEBOUNCE)
+            ),
+            min_on=float(
+                advanced_config.get(CONF_PRESENCE_MIN_ON, DEFAULT_PRESENCE_MIN_ON)
+            ),
+            min_off=float(
+                advanced_config.get(CONF_PRESENCE_MIN_OFF, DEFAULT_PRESENCE_MIN_OFF)
+            ),
+        )
+
+    def _load_sensor_states(self) -> None:
+        """Seed the engine with the current state of everything it tracks.
+
+        Only the active inputs are fed in, so the clear timeout is not restarted
+        just because we started up.
+        """
+        valid_states = self._valid_states()
+        for sensor in self._sensors:
+            entity = self.hass.states.get(sensor)
+            if entity is not None and entity.state in valid_states:
+                self._filter.seed(sensor, True)
+                self._engine.sensor_changed(sensor, True, self._clock.monotonic())
+
+        for child_area in self.area.get_active_areas():
+            self._engine.sensor_changed(
+                child_area, True, self._clock.monotonic(), fused=False
+            )
+
+        for mqtt_room_sensor in self._mqqt_room_sensors:
+            entity = self.hass.states.get(mqtt_room_sensor)
+            if entity is not None and self._mqtt_room_active(entity.state):
+                self._filter.seed(mqtt_room_sensor, True)
+                self._engine.sensor_changed(
+                    mqtt_room_sensor, True, self._clock.monotonic()
+                )
+
+        for entity_id, confs in self._secondary_entities.items():
+            entity = self.hass.states.get(entity_id)
+            if entity is None:
+                continue
+            for conf in confs:
+                self._engine.secondary_changed(
+                    conf.for_state, entity.state.lower() == conf.entity_state_on
+                )
+
+        switch_entity = self.hass.states.get(self._system_control_entity_id())
+        if switch_entity is not None:
+            self._engine.set_enabled(switch_entity.state.lower() == STATE_ON)
 
     async def _setup_listeners(self) -> None:
         _LOGGER.debug("%s: Called '_setup_listeners'", self.name)  # type: ignore  # noqa: PGH003
@@ -138,87 +296,92 @@ class AreaStateSensor(MagicEntity, SensorEntity):
             _LOGGER.debug("%s: Cancelled '_setup_listeners'", self.name)  # type: ignore  # noqa: PGH003
             return
 
-        # Track presence sensor
-        self.async_on_remove(
-            async_track_state_change_event(
-                self.hass, self._sensors, self._sensor_state_change
+        # Track the child areas of a meta area
+        if isinstance(self.area, MagicMetaArea):
+            self.async_on_remove(
+                self.area.async_track_occupancy(self._child_area_change)
             )
-        )
 
-        # Track room presence.
+        # Track presence sensor
         self.async_on_remove(
             async_track_state_change_event(
-                self.hass, self._mqqt_room_sensors, self._group_entity_state_change
+                self.hass, self._sensors, self._sensor_state_change
             )
         )
 
-        # Track humidity trend sensor
-        humidity_trend = self.area.simply_magic_entity_id(
-            SENSOR_DOMAIN, EntityNames.HUMIDITY_STATISTICS
-        )
-        if self.hass.states.get(humidity_trend) is not None:
+        # Track room presence, the router only tells us about this room.
+        if self._mqqt_room_sensors:
             self.async_on_remove(
-                async_track_state_change_event(
-                    self.hass, [humidity_trend], self._humidity_sensor_change
+                get_room_router(self.hass).async_track_room(
+                    self.area.name, self._mqqt_room_sensors, self._mqtt_room_change
                 )
             )
 
-        # Track secondary states
-        for state in self.area.all_state_configs():
-            conf = self.area.all_state_configs()[state]
-
-            if not conf.entity:
-                continue
-
-            _LOGGER.debug("%s: State entity tracking: %s", self.name, conf.entity)  # type: ignore  # noqa: PGH003
+        # Track the humidity decision for the area.
+        self.async_on_remove(self.area.async_track_humidity(self._humidity_change))
+        if self.area.humidity.trend is not None:
+            self._humidity = self.area.humidity.result
 
+        # Track secondary states
+        if self._secondary_entities:
+            _LOGGER.debug(  # type: ignore  # noqa: PGH003
+                "%s: State entity tracking: %s",
+                self.name,
+                list(self._secondary_entities),
+            )
             self.async_on_remove(
                 async_track_state_change_event(
-                    self.hass, conf.entity, self._group_entity_state_change
+                    self.hass,
+                    list(self._secondary_entities),
+                    self._secondary_state_change,
                 )
             )
 
         self.async_on_remove(
             async_track_state_change_event(
                 self.hass,
-                [
-                    self.area.simply_magic_entity_id(
-                        SWITCH_DOMAIN, EntityNames.SYSTEM_CONTROL
-                    )
-                ],
-                self._group_entity_state_change,
+                [self._system_control_entity_id()],
+                self._system_control_change,
             )
         )
 
-        # Timed self update
-        delta = timedelta(
-            seconds=self.area.feature_config(CONF_FEATURE_ADVANCED_LIGHT_GROUPS).get(
-                CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
+        # Low frequency audit of the derived state, evaluation itself is driven
+        # entirely by events and the deadline timer.
+        audit_interval = self.area.feature_config(
+            CONF_FEATURE_ADVANCED_LIGHT_GROUPS
+        ).get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+        if audit_interval:
+            self.async_on_remove(
+                async_track_time_interval(
+                    self.hass, self._audit_tick, timedelta(seconds=audit_interval)
+                )
             )
-        )
-        self.async_on_remove(
-            async_track_time_interval(self.hass, self._update_state, delta)
-        )
 
     def _load_presence_sensors(self) -> None:
         if self.area.is_meta():
-            # MetaAreas track their children
-            child_areas: list[str] = self.area.get_child_areas()
-            for child_area in child_areas:
-                entity_id = f"{SENSOR_DOMAIN}.simply_magic_area_state_{child_area}"
-                self._sensors.append(entity_id)
+            # MetaAreas track their children directly from the area objects.
             return
 
         valid_presence_platforms = self.area.feature_config(
             CONF_FEATURE_ADVANCED_LIGHT_GROUPS
         ).get(CONF_PRESENCE_DEVICE_PLATFORMS, DEFAULT_PRESENCE_DEVICE_PLATFORMS)
+        weights = self.area.feature_config(CONF_FEATURE_ADVANCED_LIGHT_GROUPS).get(
+            CONF_PRESENCE_SENSOR_WEIGHTS, DEFAULT_PRESENCE_SENSOR_WEIGHTS
+        )
 
         for component, entities in self.area.entities.items():
             if component == "mqtt_room" + SENSOR_DOMAIN:
                 # Handle the mqtt_room entities
-                self._mqqt_room_sensors.extend(
-                    [entity[ATTR_ENTITY_ID] for entity in entities]
-                )
+                if not self.area.config.get(
+                    CONF_MQTT_ROOM_PRESENCE, DEFAULT_MQTT_ROOM_PRESENCE
+                ):
+                    continue
+                for entity in entities:
+                    self._mqqt_room_sensors.append(entity[ATTR_ENTITY_ID])
+                    if "mqtt_room" in weights:
+                        self._engine.set_weight(
+                            entity[ATTR_ENTITY_ID], float(weights["mqtt_room"])
+                        )
                 continue
 
             if component not in valid_presence_platforms:
@@ -241,6 +404,11 @@ class AreaStateSensor(MagicEntity, SensorEntity):
                         continue
 
                 self._sensors.append(entity[ATTR_ENTITY_ID])
+                sensor_class = entity.get(ATTR_DEVICE_CLASS) or component
+                if sensor_class in weights:
+                    self._engine.set_weight(
+                        entity[ATTR_ENTITY_ID], float(weights[sensor_class])
+                    )
 
     async def _load_attributes(self) -> None:
         # Set attributes
@@ -249,110 +417,75 @@ class AreaStateSensor(MagicEntity, SensorEntity):
         else:
             self._attr_extra_state_attributes.update(
                 {
-                    ATTR_AREAS: self.area.get_child_areas(),
-                    ATTR_ACTIVE_AREAS: self.area.get_active_areas(),
+                    ATTR_AREAS: tuple(self.area.get_child_areas()),
+                    ATTR_ACTIVE_AREAS: tuple(sorted(self.area.get_active_areas())),
                 }
             )
 
         # Add common attributes
         self._attr_extra_state_attributes.update(
             {
-                ATTR_ACTIVE_SENSORS: [],
-                ATTR_LAST_ACTIVE_SENSORS: [],
-                ATTR_PRESENCE_SENSORS: self._sensors,
+                ATTR_ACTIVE_SENSORS: (),
+                ATTR_LAST_ACTIVE_SENSORS: (),
+                ATTR_PRESENCE_SENSORS: tuple(self._sensors),
                 ATTR_TYPE: self.area.config.get(CONF_TYPE),
             }
         )
 
     def _update_attributes(self) -> None:
-        self._attr_extra_state_attributes[ATTR_STATE] = self.area.state
-        self._attr_extra_state_attributes[ATTR_CLEAR_TIMEOUT] = (
-            self._get_clear_timeout()
-        )
-        self._attr_extra_state_attributes[ATTR_EXTENDED_TIMEOUT] = (
-            self._get_extended_timeout()
+        self._set_attribute(ATTR_STATE, self.area.state)
+        self._set_attribute(ATTR_CLEAR_TIMEOUT, self._get_clear_timeout())
+        self._set_attribute(ATTR_EXTENDED_TIMEOUT, self._get_extended_timeout())
+        # Only goes out with the next write, it should not cause writes itself.
+        self._attr_extra_state_attributes[ATTR_ABSORBED_EVENTS] = (
+            self._filter.stats.absorbed
         )
 
-        if self.area.is_meta():
-            self._attr_extra_state_attributes[ATTR_ACTIVE_AREAS] = (
-                self.area.get_active_areas()
-            )
+    def _set_attribute(self, key: str, value: Any) -> None:
+        """Set the attribute, noting if the entity needs to be written."""
+        if self._degraded:
+            # Only the state goes out while degraded.
+            return
+        if key in self._attr_extra_state_attributes and (
+            self._attr_extra_state_attributes[key] == value
+        ):
+            return
+        self._attr_extra_state_attributes[key] = value
+        self._attributes_changed = True
 
     ####
     ####     State Change Handling
     def get_current_area_state(self) -> AreaState:
         """Get the current state for the area based on the various entities and controls."""
-        # If it is in manual mode, set the state to manual.
-        if not self.area.is_control_enabled(ControlType.System):
-            return AreaState.AREA_STATE_MANUAL
-
-        # Get Main occupancy state
-        occupied_state = self._get_sensors_state()
+        now = self._clock.monotonic()
+        self._clear_deadline = None
+        self._extended_deadline = None
 
-        _LOGGER.debug("Sensor state %s", occupied_state)  # type: ignore  # noqa: PGH003
+        self._apply_presence_filter(now)
+        self._update_humidity(now)
+        self._update_sensor_attributes()
 
-        seconds_since_last_change: int = int(
-            (datetime.now(UTC) - self._last_off_time).total_seconds()
-        )
+        result = self._engine.evaluate(now)
+        _LOGGER.debug("%s: Occupancy %s", self.area.slug, result)  # type: ignore  # noqa: PGH003
 
-        clear_timeout: int = self._get_clear_timeout()
-        extended_timeout: int = self._get_extended_timeout() + clear_timeout
-        if not occupied_state:
-            if (
-                not self._is_on_clear_timeout()
-                and seconds_since_last_change < clear_timeout
-            ):
-                self._set_clear_timeout(clear_timeout - seconds_since_last_change)
-            if seconds_since_last_change >= clear_timeout:
-                if seconds_since_last_change >= extended_timeout:
-                    self._remove_extended_timeout()
-                    return AreaState.AREA_STATE_CLEAR
-                _LOGGER.debug("%s: Clearing the imput, state extended", self.area.slug)  # type: ignore  # noqa: PGH003
-                self._remove_clear_timeout()
-                if (
-                    not self._is_on_extended_timeout()
-                    and seconds_since_last_change < extended_timeout
-                ):
-                    self._set_extended_timeout(
-                        extended_timeout - seconds_since_last_change
-                    )
-                return AreaState.AREA_STATE_EXTENDED
+        if result.state == AreaState.AREA_STATE_EXTENDED:
+            self._extended_deadline = result.deadline
         else:
-            self._remove_clear_timeout()
-            self._remove_extended_timeout()
-
-        # If it is not occupied, then set the override state or leave as just occupied.
-        new_state = AreaState.AREA_STATE_OCCUPIED
-
-        for state in self.area.all_state_configs():
-            conf = self.area.all_state_configs()[state]
-            if conf.entity is None:
-                continue
-
-            entity = self.hass.states.get(conf.entity)
-
-            if entity is None:
-                continue
-
-            if entity.state.lower() == conf.entity_state_on:  # type: ignore  # noqa: PGH003
-                _LOGGER.debug(  # type: ignore  # noqa: PGH003
-                    "%s: Secondary state: %s is at %s, adding %s",
-                    self.area.name,
-                    conf.entity,
-                    conf.entity_state_on,
-                    conf.for_state,
-                )
-                new_state = conf.for_state
+            self._clear_deadline = result.deadline
 
-        return new_state
+        return result.state
 
     @callback
-    def _update_state(self, extra: datetime) -> None:
+    def _update_state(self) -> None:
         last_state = self.area.state
         new_state = self.get_current_area_state()
+        self._schedule_next_wakeup()
 
         if last_state == new_state:
             self._update_attributes()
+            if self._attributes_changed:
+                self._attributes_changed = False
+                self.async_write_ha_state()
             return
 
         # Calculate what's new
@@ -368,7 +501,8 @@ class AreaStateSensor(MagicEntity, SensorEntity):
         self._attr_native_value = new_state
 
         self._update_attributes()
-        self.schedule_update_ha_state()
+        self._attributes_changed = False
+        self.async_write_ha_state()
 
         _LOGGER.debug(
             "Reporting state change for %s (new state: %s/last state: %s)",
@@ -377,9 +511,117 @@ class AreaStateSensor(MagicEntity, SensorEntity):
             last_state,
         )
 
-    def _group_entity_state_change(self, event: Event[EventStateChangedData]) -> None:
-        if event.event_type != "state_changed":
+    @callback
+    def _schedule_update(self, availability_changed: bool = False) -> None:
+        """Evaluate the area in the high lane."""
+        self._lanes.async_run_high(partial(self._request_update, availability_changed))
+
+    @callback
+    def _request_update(self, availability_changed: bool = False) -> None:
+        """Evaluate the area now, unless there is a storm going on."""
+        now = self._clock.monotonic()
+        # Spend from both, the area budget counts even if the global one is out.
+        in_budget = self._budget.spend(now) & self._global_budget.spend(now)
+        if availability_changed:
+            self._storm.record_transition()
+        if self._storm.defer(self._update_state):
+            return
+        if self._degraded:
+            self._degraded_events += 1
+            return
+        if not in_budget:
+            self._enter_degraded()
+            return
+        self._update_state()
+
+    ###       Degraded mode
+
+    def _enter_degraded(self) -> None:
+        _LOGGER.warning(
+            "%s: Over the event budget, only sampling the state every %ss",
+            self.area.name,
+            DEGRADED_SAMPLE_INTERVAL,
+        )
+        self._attr_extra_state_attributes[ATTR_DEGRADED] = True
+        self._degraded = True
+        self._degraded_events = 1
+        self._degraded_samples = 0
+        self._fire_degraded()
+        self.schedule_update_ha_state()
+        self._sample_callback = async_call_later(
+            self.hass, DEGRADED_SAMPLE_INTERVAL, self._degraded_sample
+        )
+
+    @callback
+    def _degraded_sample(self, _now: datetime) -> None:
+        self._sample_callback = None
+        now = self._clock.monotonic()
+        if self._budget.calm(now) and self._global_budget.calm(now):
+            _LOGGER.warning(
+                "%s: Back inside the event budget, %s events were sampled %s times",
+                self.area.name,
+                self._degraded_events,
+                self._degraded_samples,
+            )
+            self._degraded = False
+            self._set_attribute(ATTR_DEGRADED, False)
+            self._fire_degraded()
+        else:
+            self._degraded_samples += 1
+            self._sample_callback = async_call_later(
+                self.hass, DEGRADED_SAMPLE_INTERVAL, self._degraded_sample
+            )
+        if not self._storm.defer(self._update_state):
+            self._update_state()
+
+    def _fire_degraded(self) -> None:
+        self.hass.bus.async_fire(
+            EVENT_MAGICAREAS_DEGRADED,
+            {
+                "id": self.area.id,
+                "degraded": self._degraded,
+                "events": self._degraded_events,
+            },
+        )
+
+    def _remove_degraded_sample(self) -> None:
+        if self._sample_callback is None:
             return
+        self._sample_callback()
+        self._sample_callback = None
+
+    @callback
+    def _child_area_change(self, child_area: str, occupied: bool) -> None:
+        _LOGGER.debug(
+            "%s: Child area '%s' occupied %s",
+            self.area.name,
+            child_area,
+            occupied,
+        )
+        self._engine.sensor_changed(
+            child_area, occupied, self._clock.monotonic(), fused=False
+        )
+        self._request_update()
+
+    @callback
+    def _mqtt_room_change(self, entity_id: str, active: bool | None) -> None:
+        _LOGGER.debug(
+            "%s: Room presence change: entity '%s' in room %s",
+            self.area.name,
+            entity_id,
+            active,
+        )
+
+        if active is None:
+            self._filter.remove(entity_id)
+            self._engine.sensor_removed(entity_id)
+        else:
+            self._filter.update(entity_id, active, self._clock.monotonic())
+
+        self._request_update(active is None)
+
+    @callback
+    def _secondary_state_change(self, event: Event[EventStateChangedData]) -> None:
         if event.data["new_state"] is None:
             return
 
@@ -400,97 +642,165 @@ class AreaStateSensor(MagicEntity, SensorEntity):
                 entity_id,
                 to_state,
             )
-            return None
+            self._storm.record_transition()
+            # The state it was driving does not hold without the entity.
+            for conf in self._secondary_entities.get(entity_id, ()):
+                self._engine.secondary_changed(conf.for_state, False)
+            self._schedule_update()
+            return
 
-        self.hass.loop.call_soon_threadsafe(self._update_state, datetime.now(UTC))
+        for conf in self._secondary_entities.get(entity_id, ()):
+            self._engine.secondary_changed(
+                conf.for_state, to_state.lower() == conf.entity_state_on
+            )
 
-    ###       Clearing
+        self._schedule_update(_availability_changed(event))
 
-    async def _async_update_state(self, timeout: int) -> None:
-        await asyncio.sleep(timeout)
-        self._update_state()
+    @callback
+    def _system_control_change(self, event: Event[EventStateChangedData]) -> None:
+        if event.data["new_state"] is None:
+            return
+
+        to_state: str = str(event.data["new_state"].state)
+        if to_state in INVALID_STATES:
+            self._storm.record_transition()
+            return
+
+        self._engine.set_enabled(to_state.lower() == STATE_ON)
+        self._schedule_update(_availability_changed(event))
+
+    ###       Deadlines
 
     def _get_clear_timeout(self) -> int:
         return int(self.area.config.get(CONF_CLEAR_TIMEOUT, 60))
 
-    def _set_clear_timeout(self, timeout: int) -> None:
-        if self._clear_timeout_callback:
-            self._remove_clear_timeout()
+    def _get_extended_timeout(self) -> int:
+        return int(self.area.config.get(CONF_EXTENDED_TIMEOUT, 60))
 
-        _LOGGER.debug("%s: Scheduling clear in %s seconds", self.area.name, timeout)  # type: ignore  # noqa: PGH003
-        self._attr_extra_state_attributes["clear"] = True
-        self._clear_timeout_callback = async_call_later(
-            self.hass,
-            timeout,
-            self._update_state,
+    def _system_control_entity_id(self) -> str:
+        return self.area.simply_magic_entity_id(
+            SWITCH_DOMAIN, EntityNames.SYSTEM_CONTROL
         )
 
-    def _remove_clear_timeout(self) -> None:
-        if not self._clear_timeout_callback:
+    def _valid_states(self) -> list[str]:
+        return self.area.feature_config(CONF_FEATURE_ADVANCED_LIGHT_GROUPS).get(
+            CONF_ON_STATES, DEFAULT_ON_STATES
+        ) or [STATE_ON]
+
+    def _mqtt_room_active(self, state: str) -> bool:
+        return state.lower() == self.area.name.lower()
+
+    def _next_deadline(self) -> float | None:
+        """Return the earliest pending deadline, None if nothing is pending."""
+        deadlines = [
+            deadline
+            for deadline in (
+                self._clear_deadline,
+                self._extended_deadline,
+                self._filter.deadline(),
+            )
+            if deadline is not None
+        ]
+        return min(deadlines) if deadlines else None
+
+    def _schedule_next_wakeup(self) -> None:
+        """Arm the single wake-up timer for the next deadline."""
+        self._set_attribute("clear", self._clear_deadline is not None)
+        self._set_attribute("extended", self._extended_deadline is not None)
+
+        deadline = self._next_deadline()
+        if deadline == self._deadline:
+            return
+        self._remove_deadline()
+        if deadline is None:
             return
 
-        _LOGGER.debug(  # type: ignore  # noqa: PGH003
-            "%s: Clearing timeout",
-            self.area.name,
+        delay = max(deadline - self._clock.monotonic(), 0)
+        _LOGGER.debug("%s: Scheduling wake-up in %s seconds", self.area.name, delay)  # type: ignore  # noqa: PGH003
+        self._deadline = deadline
+        self._deadline_callback = async_call_later(
+            self.hass,
+            delay,
+            self._deadline_reached,
         )
 
-        self._attr_extra_state_attributes["clear"] = False
-        self._clear_timeout_callback()
-        self._clear_timeout_callback = None
+    @callback
+    def _deadline_reached(self, now: datetime) -> None:
+        self._deadline = None
+        self._deadline_callback = None
+        self._request_update()
+
+    def _remove_deadline(self) -> None:
+        self._deadline = None
+        if not self._deadline_callback:
+            return
 
-    def _is_on_clear_timeout(self) -> bool:
-        return self._clear_timeout_callback is not None
+        self._deadline_callback()
+        self._deadline_callback = None
 
     @callback
     def _cleanup_timers(self) -> None:
-        self._remove_clear_timeout()
-        self._remove_extended_timeout()
+        self._remove_deadline()
+        self._remove_degraded_sample()
+        self._storm.cancel(self._update_state)
+        self._lanes.async_cancel(self._audit_state)
 
-    ###       Extended
+    ###       Audit
 
-    def _get_extended_timeout(self) -> int:
-        return int(self.area.config.get(CONF_EXTENDED_TIMEOUT, 60))
+    @callback
+    def _audit_tick(self, now: datetime) -> None:
+        self._lanes.async_run_low(self._audit_state)
 
-    def _set_extended_timeout(self, timeout: int) -> None:
-        if self._extended_timeout_callback:
-            self._remove_extended_timeout()
+    @callback
+    def _audit_state(self) -> None:
+        """Re-check the derived state against the state machine and report drift.
 
-        _LOGGER.info("%s: Scheduling extended in %s seconds", self.area.name, timeout)  # type: ignore  # noqa: PGH003
-        self._attr_extra_state_attributes["extended"] = True
-        self._extended_timeout_callback = async_call_later(
-            self.hass,
-            timeout,
-            self._update_state,
-        )
+        This never changes the state, it only reports when the events we rely
+        on appear to have been missed.
+        """
+        drift: list[str] = []
 
-    def _remove_extended_timeout(self) -> None:
-        if not self._extended_timeout_callback:
-            return
+        published = self.hass.states.get(self.entity_id)
+        if published is not None and published.state != self.area.state:
+            drift.append(f"state {published.state} != {self.area.state}")
+
+        deadline = self._deadline
+        overdue = self._clock.monotonic() - 1
+        if deadline is not None and deadline < overdue:
+            drift.append(f"deadline {deadline - overdue:.1f}s not fired")
+
+        valid_states = self._valid_states()
+        active_sensors = self._engine.active_sensors
+        for sensor in self._sensors:
+            entity = self.hass.states.get(sensor)
+            if entity is None or entity.state in INVALID_STATES:
+                continue
+            if self._filter.is_pending(sensor):
+                continue
+            if (entity.state in valid_states) != (sensor in active_sensors):
+                drift.append(f"sensor {sensor} is {entity.state}")
 
-        self._attr_extra_state_attributes["extended"] = False
-        self._extended_timeout_callback()
-        self._extended_timeout_callback = None
+        if not drift:
+            return
 
-    def _is_on_extended_timeout(self) -> bool:
-        return self._extended_timeout_callback is not None
+        self._drift_count += 1
+        _LOGGER.warning(
+            "%s: Audit found drift in the derived state (%s): %s",
+            self.area.name,
+            self._drift_count,
+            ", ".join(drift),
+        )
 
     #### Sensor controls.
 
-    def _humidity_sensor_change(self, event: Event[EventStateChangedData]) -> None:
-        if event.data["new_state"] is None:
-            return
-        to_state = event.data["new_state"].state
-        entity_id = event.data["entity_id"]
-        if to_state in INVALID_STATES:
-            _LOGGER.debug(
-                "%s: sensor '%s' has invalid state %s",
-                self.name,
-                entity_id,
-                to_state,
-            )
-            return
-        self.hass.loop.call_soon_threadsafe(self._update_state, datetime.now(UTC))
+    @callback
+    def _humidity_change(self, result: HumidityResult) -> None:
+        # Evaluated inside the trend sensor event, so the area state is written
+        # before the event is done, like the other presence inputs.
+        self._humidity = result
+        self._schedule_update()
 
+    @callback
     def _sensor_state_change(self, event: Event[EventStateChangedData]) -> None:
         """Actions when the sensor state has changed."""
         if event.data["new_state"] is None:
@@ -512,164 +822,57 @@ class AreaStateSensor(MagicEntity, SensorEntity):
                 entity_id,
                 to_state,
             )
-            return
-
-        if to_state and to_state not in self.area.feature_config(
-            CONF_FEATURE_ADVANCED_LIGHT_GROUPS
-        ).get(CONF_ON_STATES, DEFAULT_ON_STATES):
-            _LOGGER.debug(
-                "Setting last non-normal time %s %s",
-                event.data["old_state"],
-                event.data["new_state"],
-            )
-            self._last_off_time = datetime.now(UTC)  # Update last_off_time
-            # Clear the timeout
-            self._remove_clear_timeout()
-
-        self.hass.loop.call_soon_threadsafe(self._update_state, datetime.now(UTC))
-
-    def _get_sensors_state(self) -> bool:
-        """Get the current state of the sensor."""
-        valid_states = (
-            [STATE_ON]
-            if self.area.is_meta()
-            else self.area.feature_config(CONF_FEATURE_ADVANCED_LIGHT_GROUPS).get(
-                CONF_ON_STATES, DEFAULT_ON_STATES
+            self._filter.remove(entity_id)
+            self._engine.sensor_removed(entity_id)
+        else:
+            self._filter.update(
+                entity_id, to_state in self._valid_states(), self._clock.monotonic()
             )
-        )
-
-        _LOGGER.debug(
-            "[Area: %s] Updating state. (Valid states: %s)",
-            self.area.slug,
-            valid_states,
-        )
-
-        if valid_states is None:
-            valid_states = [STATE_ON]
-
-        active_sensors: list[str] = []
-        active_areas: set[str] = set()
 
-        # Loop over all entities and check their state
-        for sensor in self._sensors:
-            try:
-                entity = self.hass.states.get(sensor)
-
-                if not entity:
-                    _LOGGER.info(
-                        "[Area: %s] Could not get sensor state: %s entity not found, skipping",
-                        self.area.slug,
-                        sensor,
-                    )
-                    continue
-
-                _LOGGER.debug(
-                    "[Area: %s] Sensor %s state: %s",
-                    self.area.slug,
-                    sensor,
-                    entity.state,
-                )
-
-                # Skip unavailable entities
-                if entity.state in INVALID_STATES:
-                    _LOGGER.debug(
-                        "[Area: %s] Sensor '%s' is unavailable, skipping",
-                        self.area.slug,
-                        sensor,
-                    )
-                    continue
+        self._schedule_update(_availability_changed(event))
 
-                if entity.state in valid_states:
-                    _LOGGER.debug(
-                        "[Area: %s] Valid presence sensor found: %s",
-                        self.area.slug,
-                        sensor,
-                    )
-                    active_sensors.append(sensor)
-
-            except Exception as e:  # noqa: BLE001
-                _LOGGER.error(
-                    "[%s] Error getting entity state for '%s': %s",
-                    self.area.slug,
-                    sensor,
-                    str(e),
-                )
+    def _apply_presence_filter(self, now: float) -> None:
+        """Feed the filtered presence sensor changes that are due into the engine."""
+        for change in self._filter.advance(now):
+            self._engine.sensor_changed(change.entity_id, change.active, change.at)
 
-        # Track the mqtt room stuff.
-        if self.area.config.get(CONF_MQTT_ROOM_PRESENCE, DEFAULT_MQTT_ROOM_PRESENCE):
-            for mqtt_room_sensor in self._mqqt_room_sensors:
-                try:
-                    entity = self.hass.states.get(mqtt_room_sensor)
-                    if entity and entity.state == self.area.name.lower():
-                        active_sensors.append(mqtt_room_sensor)
-                except Exception as e:  # noqa: BLE001
-                    _LOGGER.error(  # type: ignore  # noqa: PGH003
-                        "[%s] Error getting entity state for '%s': %s",
-                        self.area.slug,
-                        mqtt_room_sensor,
-                        str(e),
-                    )
+    def _update_humidity(self, now: float) -> None:
+        """Feed the humidity decision into the engine as a presence sensor."""
+        result = self._humidity
+        if result is None:
+            return
 
-        # Track the up/down trend.
-        humidity_trend = self.hass.states.get(
-            self.area.simply_magic_entity_id(
-                SENSOR_DOMAIN,
-                EntityNames.HUMIDITY_STATISTICS,
+        humidity = self.area.humidity
+        self._set_attribute(ATTR_HUMIDITY_ON, humidity.on)
+        if humidity.zero_start != self._humidity_zero_start:
+            self._humidity_zero_start = humidity.zero_start
+            # Only the wall clock time is persisted, for the restore.
+            self._set_attribute(
+                ATTR_HUMIDITY_ZERO_TS,
+                None
+                if humidity.zero_start is None
+                else self._clock.to_wall(humidity.zero_start).timestamp(),
             )
+
+        humidity_trend_id = self.area.simply_magic_entity_id(
+            SENSOR_DOMAIN,
+            EntityNames.HUMIDITY_STATISTICS,
         )
-        if (
-            humidity_trend is not None
-            and humidity_trend.state != STATE_UNAVAILABLE
-            and humidity_trend.state != STATE_UNKNOWN
-        ):
-            humidity_feature_config = self.area.feature_config(CONF_FEATURE_HUMIDITY)
-            # Handle the 0.0 state and how long it has been zero for.
-            if float(humidity_trend.state) != 0.0:
-                self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS] = None
-            elif self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS] is None:
-                self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS] = datetime.now(
-                    UTC
-                ).timestamp()
-            if self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS] is not None:
-                zero_time: int = int(
-                    (
-                        datetime.now(UTC)
-                        - datetime.fromtimestamp(
-                            int(
-                                self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS]
-                            ),
-                            UTC,
-                        )
-                    ).total_seconds()
-                )
-                if zero_time > humidity_feature_config.get(
-                    CONF_HUMIDITY_ZERO_WAIT_TIME, DEFAULT_HUMIDITY_ZERO_WAIT_TIME
-                ):
-                    self._attr_extra_state_attributes[ATTR_HUMIDITY_ON] = False
-            # Work out if it is trending up.
-            trending_up = float(humidity_trend.state) >= humidity_feature_config.get(
-                CONF_HUMIDITY_TREND_UP_CUT_OFF, DEFAULT_HUMIDITY_TREND_UP_CUT_OFF
-            ) or self._attr_extra_state_attributes.get(ATTR_HUMIDITY_ON, False)
-            if trending_up:
-                self._attr_extra_state_attributes[ATTR_HUMIDITY_ON] = True
-                if float(humidity_trend.state) > humidity_feature_config.get(
-                    CONF_HUMIDITY_TREND_DOWN_CUT_OFF,
-                    DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF,
-                ):
-                    active_sensors.append(humidity_trend.entity_id)
-            # Make the last off time stay until this is not on any more.
-            if float(humidity_trend.state) < humidity_feature_config.get(
-                CONF_HUMIDITY_TREND_DOWN_CUT_OFF,
-                DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF,
-            ):
-                self._attr_extra_state_attributes[ATTR_HUMIDITY_ON] = False
-                self._last_off_time = datetime.now(UTC)
+        if result.active:
+            self._engine.sensor_changed(humidity_trend_id, True, now, fused=False)
+        else:
+            self._engine.sensor_removed(humidity_trend_id)
+        # Make the last off time stay until this is not on any more.
+        if result.hold:
+            self._engine.hold(now)
 
-        self._attr_extra_state_attributes["active_sensors"] = active_sensors
+    def _update_sensor_attributes(self) -> None:
+        active_sensors = tuple(sorted(self._engine.active_sensors))
+        self._set_attribute(ATTR_ACTIVE_SENSORS, active_sensors)
 
         # Make a copy that doesn't gets cleared out, for debugging
         if active_sensors:
-            self._attr_extra_state_attributes["last_active_sensors"] = active_sensors
+            self._set_attribute(ATTR_LAST_ACTIVE_SENSORS, active_sensors)
 
         _LOGGER.debug(
             "[Area: %s] Active sensors: %s",
@@ -678,14 +881,10 @@ class AreaStateSensor(MagicEntity, SensorEntity):
         )
 
         if self.area.is_meta():
-            active_areas = set(self.area.get_active_areas())
+            active_areas = tuple(sorted(self.area.get_active_areas()))
             _LOGGER.debug(
                 "[Area: %s] Active areas: %s",
                 self.area.slug,
                 active_areas,
             )
-            self._attr_extra_state_attributes[ATTR_ACTIVE_AREAS] = active_areas
-
-        if self._mode == "all":
-            return len(active_sensors) == len(self._sensors)
-        return len(active_sensors) > 0
+            self._set_attribute(ATTR_ACTIVE_AREAS, active_areas)
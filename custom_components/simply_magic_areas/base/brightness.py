@@ -0,0 +1,94 @@
+"""Curves from the illuminance in the area to the brightness of the lights.
+
+The lights dim as the area gets brighter, how they dim is set by a curve for
+the area. Straight down from the min to the max illuminance, a gamma curve
+that holds the light up for longer, or a table of points from the user that
+it steps between. The curve is worked out into a table of 256 brightness
+levels over its illuminance range when the config is loaded, one for each
+state, so turning on the lights is just a read from the table.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from math import ceil
+
+from ..const import BRIGHTNESS_CURVE_GAMMA, BRIGHTNESS_CURVE_PIECEWISE
+
+TABLE_SIZE = 256
+_LAST = TABLE_SIZE - 1
+
+
+@dataclass(frozen=True, slots=True)
+class BrightnessCurve:
+    """How the brightness drops off as the illuminance goes up."""
+
+    kind: str
+    # The lights dim above the min illuminance and are off above the max.
+    min_illuminance: float
+    max_illuminance: float
+    # Gamma of the curve, above 1 holds the light up for longer and below 1
+    # dims it sooner. The table uses 1 / gamma as the exponent.
+    gamma: float = 2.0
+    # Illuminance and the percent of the brightness at it, for the piecewise
+    # curve, sorted by the illuminance.
+    points: tuple[tuple[float, float], ...] = ()
+
+    def compile(self, brightness: int) -> "BrightnessTable":
+        """Work out the table for the brightness out of 255."""
+        if self.kind == BRIGHTNESS_CURVE_PIECEWISE and self.points:
+            return self._compile_points(brightness)
+        low = self.min_illuminance
+        high = self.max_illuminance
+        if self.kind == BRIGHTNESS_CURVE_GAMMA:
+            exponent = 1 / self.gamma
+            values = [
+                brightness * ((_LAST - i) / _LAST) ** exponent
+                for i in range(TABLE_SIZE)
+            ]
+        else:
+            values = [brightness * (_LAST - i) / _LAST for i in range(TABLE_SIZE)]
+        return BrightnessTable(low, high, values)
+
+    def _compile_points(self, brightness: int) -> "BrightnessTable":
+        lux = [point[0] for point in self.points]
+        percent = [point[1] for point in self.points]
+        low = lux[0]
+        high = lux[-1]
+        values = []
+        for i in range(TABLE_SIZE):
+            illuminance = low + (high - low) * i / _LAST
+            index = bisect_right(lux, illuminance)
+            if index == 0:
+                value = percent[0]
+            elif index == len(lux):
+                value = percent[-1]
+            else:
+                start = lux[index - 1]
+                fraction = (illuminance - start) / (lux[index] - start)
+                value = percent[index - 1] + fraction * (
+                    percent[index] - percent[index - 1]
+                )
+            values.append(brightness * value / 100)
+        return BrightnessTable(low, high, values)
+
+
+class BrightnessTable:
+    """The brightness for the illuminance, over a curve's illuminance range."""
+
+    __slots__ = ("_high", "_low", "_scale", "_table")
+
+    def __init__(self, low: float, high: float, values: list[float]) -> None:
+        """Initialize the table from the brightness at each step of the range."""
+        self._low = low
+        self._high = high
+        self._scale = _LAST / (high - low) if high > low else 0.0
+        self._table = bytes(min(max(int(value), 0), 255) for value in values)
+
+    def lookup(self, illuminance: float) -> int:
+        """Return the brightness to use at the illuminance."""
+        if illuminance <= self._low:
+            return self._table[0]
+        if illuminance >= self._high:
+            return self._table[_LAST]
+        # Round up to the next step, so the brightness never overshoots.
+        return self._table[min(ceil((illuminance - self._low) * self._scale), _LAST)]
@@ -0,0 +1,58 @@
+"""Event budgets to stop a flood of state changes swamping the event loop.
+
+Each area has a budget of events for a window of time, and there is one more
+budget shared over the whole integration. Once an area goes over either one it
+drops into a degraded mode and only samples its state at a bounded rate, until
+a window goes by inside the budget again. The budget only counts, it is up to
+the area what to do with the answer. All the times are monotonic seconds.
+"""
+
+from homeassistant.core import HomeAssistant
+
+from ..const import DATA_EVENT_BUDGET, EVENT_BUDGET_WINDOW, GLOBAL_EVENT_BUDGET
+
+
+class EventBudget:
+    """Fixed window counter of the events seen."""
+
+    __slots__ = ("_count", "_previous", "_window_start", "limit", "window")
+
+    def __init__(self, limit: int, window: float) -> None:
+        """Initialize the budget with nothing spent."""
+        self.limit = limit
+        self.window = window
+        self._count: int = 0
+        self._previous: int = 0
+        self._window_start: float | None = None
+
+    def _roll(self, now: float) -> None:
+        start = self._window_start
+        if start is not None and now - start < self.window:
+            return
+        # Only the window right before this one counts as the previous one.
+        self._previous = (
+            self._count if start is not None and now - start < 2 * self.window else 0
+        )
+        self._window_start = now
+        self._count = 0
+
+    def spend(self, now: float) -> bool:
+        """Count an event, returns False if it is over the budget."""
+        self._roll(now)
+        self._count += 1
+        return self._count <= self.limit
+
+    def calm(self, now: float) -> bool:
+        """If both this and the last window are inside the budget."""
+        self._roll(now)
+        return self._previous <= self.limit and self._count <= self.limit
+
+
+def get_event_budget(hass: HomeAssistant) -> EventBudget:
+    """Return the budget shared by all the areas, creating it on first use."""
+    budget: EventBudget | None = hass.data.get(DATA_EVENT_BUDGET)
+    if budget is None:
+        budget = hass.data[DATA_EVENT_BUDGET] = EventBudget(
+            GLOBAL_EVENT_BUDGET, EVENT_BUDGET_WINDOW
+        )
+    return budget
@@ -0,0 +1,50 @@
+"""The clock used by the simply magic areas for all its timing.
+
+Durations and deadlines all use the monotonic time of the event loop, the
+wall clock is only used for values that get persisted or shown to the user.
+Following the loop time means the tests can swap in the ``VirtualClock`` and
+run through the timeouts without waiting.
+"""
+
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from ..const import DATA_CLOCK
+
+
+class Clock:
+    """Single source of time for the areas."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the clock for the event loop of home assistant."""
+        self._loop = hass.loop
+
+    def monotonic(self) -> float:
+        """Return the monotonic time in seconds, only useful for durations."""
+        return self._loop.time()
+
+    def now(self) -> datetime:
+        """Return the current wall clock time."""
+        return dt_util.utcnow()
+
+    def to_wall(self, monotonic: float) -> datetime:
+        """Convert a monotonic time into a wall clock time to persist."""
+        return self.now() + timedelta(seconds=monotonic - self.monotonic())
+
+    def from_wall(self, wall: datetime) -> float:
+        """Convert a persisted wall clock time back into monotonic time."""
+        return self.monotonic() + (wall - self.now()).total_seconds()
+
+    def from_timestamp(self, timestamp: float) -> float:
+        """Convert a persisted wall clock timestamp into monotonic time."""
+        return self.monotonic() + timestamp - self.now().timestamp()
+
+
+def get_clock(hass: HomeAssistant) -> Clock:
+    """Return the shared clock, creating it on first use."""
+    clock: Clock | None = hass.data.get(DATA_CLOCK)
+    if clock is None:
+        clock = hass.data[DATA_CLOCK] = Clock(hass)
+    return clock
@@ -0,0 +1,120 @@
+"""Humidity trend controller for the simply magic areas.
+
+The humidity statistics sensor gives the trend of the humidity in the area, a
+shower for example pushes it up. The controller turns each trend sample into a
+single decision on if the humidity says the area is in use, which both the
+occupancy of the area and the fans follow. Once the trend goes above the up
+cut off it stays on until the trend drops below the down cut off, or has sat
+at zero for the wait time. Like the occupancy engine this is free of any Home
+Assistant calls and all the times are monotonic seconds from the caller.
+"""
+
+from dataclasses import dataclass
+from typing import NamedTuple
+
+
+@dataclass(frozen=True, slots=True)
+class HumidityConfig:
+    """Static configuration for the humidity controller."""
+
+    up_cut_off: float
+    down_cut_off: float
+    # How long the trend can sit at zero before it is no longer on.
+    zero_wait: float
+
+
+class HumidityResult(NamedTuple):
+    """The decision from the latest trend sample."""
+
+    # If the humidity says someone is using the area.
+    active: bool
+    # If the clear timeout should be held off, the humidity is dropping.
+    hold: bool
+    # When the controller needs to be evaluated again without a new sample.
+    deadline: float | None
+
+
+_IDLE = HumidityResult(active=False, hold=False, deadline=None)
+
+
+class HumidityTrend:
+    """Hysteresis on the humidity trend, with the zero wait timer."""
+
+    __slots__ = ("_config", "_on", "_result", "_trend", "_zero_start")
+
+    def __init__(self, config: HumidityConfig) -> None:
+        """Initialize the controller, starts out off with no sample."""
+        self._config = config
+        self._on: bool = False
+        self._trend: float | None = None
+        self._zero_start: float | None = None
+        self._result: HumidityResult = _IDLE
+
+    @property
+    def on(self) -> bool:
+        """If the trend has gone up and not come back down yet."""
+        return self._on
+
+    @property
+    def trend(self) -> float | None:
+        """The last trend sample, None if there has not been one."""
+        return self._trend
+
+    @property
+    def zero_start(self) -> float | None:
+        """When the trend started sitting at zero, None if it is not zero."""
+        return self._zero_start
+
+    @property
+    def result(self) -> HumidityResult:
+        """The decision from the latest sample."""
+        return self._result
+
+    def restore(self, on: bool, zero_start: float | None) -> None:
+        """Restore the state saved from before a restart."""
+        self._on = on
+        self._zero_start = zero_start
+
+    def sample(self, trend: float | None, now: float) -> HumidityResult:
+        """Take a new trend sample, None keeps the last decision."""
+        if trend is None:
+            return self._result
+        self._trend = trend
+        return self.evaluate(now)
+
+    def evaluate(self, now: float) -> HumidityResult:
+        """Work out the decision for the last sample at this time."""
+        trend = self._trend
+        if trend is None:
+            return self._result
+        config = self._config
+
+        # Handle the 0.0 state and how long it has been zero for.
+        if trend != 0.0:
+            self._zero_start = None
+        elif self._zero_start is None:
+            self._zero_start = now
+        deadline: float | None = None
+        if self._zero_start is not None:
+            zero_time = now - self._zero_start
+            if zero_time > config.zero_wait:
+                self._on = False
+            elif self._on:
+                # Check again once the zero wait time has passed.
+                deadline = self._zero_start + config.zero_wait + 1
+
+        # Work out if it is trending up.
+        trending_up = trend >= config.up_cut_off or self._on
+        if trending_up:
+            self._on = True
+        hold = trend < config.down_cut_off
+        if hold:
+            self._on = False
+            deadline = None
+
+        self._result = HumidityResult(
+            active=trending_up and trend > config.down_cut_off,
+            hold=hold,
+            deadline=deadline,
+        )
+        return self._result
@@ -0,0 +1,74 @@
+"""Smoothed illuminance for the light brightness of an area.
+
+Light sensors near a window jitter around, read raw each time the lights turn
+on the brightness would jump around with them and send more commands. The
+estimate keeps a moving average of the samples and only moves the value the
+lights use once the average leaves a band around it. A big step, the sun going
+behind a cloud or someone opening the curtains, is taken straight away.
+
+Once the lights are on they light up the sensor themselves, so the estimate
+also holds the value from when the lights came on until they go off again.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class IlluminanceConfig:
+    """Static configuration for the illuminance estimate."""
+
+    # Weight of a new sample in the moving average, between 0 and 1.
+    smoothing: float
+    # How far the average moves before the value follows it, in lux.
+    hysteresis: float
+    # A change bigger than this is taken straight away, in lux.
+    step: float
+
+
+class IlluminanceEstimate:
+    """Moving average of the illuminance with hysteresis on the value."""
+
+    __slots__ = ("_average", "_config", "_last_on", "_sample", "_value")
+
+    def __init__(self, config: IlluminanceConfig) -> None:
+        """Initialize the estimate, with no samples yet."""
+        self._config = config
+        self._sample: float | None = None
+        self._average: float = 0.0
+        self._value: float | None = None
+        self._last_on: float | None = None
+
+    @property
+    def value(self) -> float | None:
+        """The stable illuminance, None until there is a sample."""
+        return self._value
+
+    @property
+    def last_on(self) -> float | None:
+        """The illuminance from when the lights last came on."""
+        return self._last_on
+
+    def update(self, sample: float) -> float:
+        """Add a sample, returns the stable illuminance."""
+        if sample == self._sample:
+            return self._value
+        self._sample = sample
+        config = self._config
+        if self._value is None or abs(sample - self._average) > config.step:
+            self._average = self._value = sample
+            return sample
+        self._average += config.smoothing * (sample - self._average)
+        if abs(self._average - self._value) > config.hysteresis:
+            self._value = self._average
+        return self._value
+
+    def for_lights(self, on: bool) -> float:
+        """Return the illuminance to work out the brightness from.
+
+        While the lights are on this is the value from when they came on, as
+        the sensor is seeing them as well.
+        """
+        if on:
+            return self._last_on or 0.0
+        self._last_on = self._value
+        return self._value or 0.0
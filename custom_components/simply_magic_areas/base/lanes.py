@@ -0,0 +1,119 @@
+"""Two priority lanes for the work done on the event loop by the areas.
+
+Working out the state of an area from its presence sensors, and the lights and
+fans that follow it, is what people notice when it is slow. The aggregate
+sensors, the statistics ticks and the climate groups are not, so they go in
+the low lane. High lane work always runs first, low lane work only runs one
+item per loop iteration once nothing is left in the high lane. Anything new
+from the presence sensors gets in ahead of the rest of the low lane. Each
+piece of low lane work is only queued once, so a burst of aggregate updates
+only recomputes once.
+
+The presence handlers are already on the loop, so their work runs straight
+away rather than waiting a loop iteration. Work that has to wait for the end
+of the iteration, like the batched light and fan calls, is queued on the high
+lane so it still goes out before anything in the low lane.
+
+The lanes drain in a task on hass, so ``async_block_till_done`` waits for
+anything queued in them.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import DATA_LANES
+
+
+class PriorityLanes:
+    """Runs the high lane ahead of the low lane on the event loop."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the lanes with nothing queued."""
+        self._hass = hass
+        self._high: deque[Callable[[], None]] = deque()
+        self._low: dict[Callable[[], None], None] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def high_pending(self) -> int:
+        """How many high lane items are waiting to run."""
+        return len(self._high)
+
+    @property
+    def low_pending(self) -> int:
+        """How many low lane items are waiting to run."""
+        return len(self._low)
+
+    @callback
+    def async_run_high(self, action: Callable[[], None]) -> None:
+        """Run presence and state work now, ahead of the low lane."""
+        action()
+
+    @callback
+    def async_queue_high(self, action: Callable[[], None]) -> None:
+        """Queue work for the end of the loop iteration, ahead of the low lane."""
+        self._high.append(action)
+        self._schedule()
+
+    @callback
+    def async_run_low(self, action: Callable[[], None]) -> None:
+        """Queue bookkeeping work, it is deferred while the high lane is busy."""
+        self._low[action] = None
+        self._schedule()
+
+    @callback
+    def async_cancel(self, action: Callable[[], None]) -> None:
+        """Drop queued work, for an entity that is going away."""
+        self._low.pop(action, None)
+        if action in self._high:
+            self._high.remove(action)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop anything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._high.clear()
+        self._low.clear()
+
+    def _schedule(self) -> None:
+        if self._task is None:
+            self._task = self._hass.async_create_task(self._async_drain())
+
+    async def _async_drain(self) -> None:
+        high = self._high
+        low = self._low
+        try:
+            # Queued work waits for the end of the loop iteration.
+            await asyncio.sleep(0)
+            while True:
+                while high:
+                    high.popleft()()
+                if not low:
+                    return
+                # Only one, then give the loop back so new presence events
+                # go first.
+                action = next(iter(low))
+                del low[action]
+                action()
+                if not low and not high:
+                    return
+                await asyncio.sleep(0)
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+                if high or low:
+                    # Whatever is left after an action raised.
+                    self._schedule()
+
+
+def get_lanes(hass: HomeAssistant) -> PriorityLanes:
+    """Return the shared priority lanes, creating them on first use."""
+    lanes: PriorityLanes | None = hass.data.get(DATA_LANES)
+    if lanes is None:
+        lanes = hass.data[DATA_LANES] = PriorityLanes(hass)
+    return lanes
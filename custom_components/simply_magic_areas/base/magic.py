@@ -1,5 +1,6 @@
 """The device setup for the simply magic areas."""
 
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from enum import StrEnum
@@ -7,16 +8,28 @@ import logging
 from typing import Any
 
 from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_ENTITY_ID, STATE_ON
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    HomeAssistant,
+    State,
+    callback,
+)
 from homeassistant.helpers.area_registry import AreaEntry
 from homeassistant.helpers.device_registry import async_get as async_get_dr
 from homeassistant.helpers.entity_registry import (
     RegistryEntry,
     async_get as async_get_er,
 )
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+)
 from homeassistant.util import slugify
 
 from ..config.area_state import AreaState
@@ -26,18 +39,34 @@ from ..const import (
     AREA_TYPE_EXTERIOR,
     AREA_TYPE_INTERIOR,
     AREA_TYPE_META,
+    CONF_BRIGHTNESS_CURVE,
+    CONF_BRIGHTNESS_CURVE_POINTS,
+    CONF_BRIGHTNESS_GAMMA,
     CONF_ENABLED_FEATURES,
     CONF_EXCLUDE_ENTITIES,
     CONF_FAN_CONTROL,
     CONF_FEATURE_ADVANCED_LIGHT_GROUPS,
     CONF_FEATURE_GROUP_CREATION,
     CONF_FEATURE_HUMIDITY,
+    CONF_HUMIDITY_TREND_DOWN_CUT_OFF,
+    CONF_HUMIDITY_TREND_UP_CUT_OFF,
+    CONF_HUMIDITY_ZERO_WAIT_TIME,
     CONF_INCLUDE_ENTITIES,
     CONF_LIGHT_CONTROL,
+    CONF_MAX_BRIGHTNESS_LEVEL,
+    CONF_MIN_BRIGHTNESS_LEVEL,
     CONF_TYPE,
     DATA_AREA_OBJECT,
+    DEFAULT_BRIGHTNESS_CURVE,
+    DEFAULT_BRIGHTNESS_CURVE_POINTS,
+    DEFAULT_BRIGHTNESS_GAMMA,
     DEFAULT_FAN_CONTROL,
+    DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF,
+    DEFAULT_HUMIDITY_TREND_UP_CUT_OFF,
+    DEFAULT_HUMIDITY_ZERO_WAIT_TIME,
     DEFAULT_LIGHT_CONTROL,
+    DEFAULT_MAX_BRIGHTNESS_LEVEL,
+    DEFAULT_MIN_BRIGHTNESS_LEVEL,
     DOMAIN,
     EVENT_MAGICAREAS_AREA_READY,
     EVENT_MAGICAREAS_READY,
@@ -46,8 +75,14 @@ from ..const import (
     MAGIC_DEVICE_ID_PREFIX,
     META_AREA_GLOBAL,
     MODULE_DATA,
+    PRESENCE_STATES,
 )
 from ..util import is_entity_list
+from .brightness import BrightnessCurve, BrightnessTable
+from .clock import get_clock
+from .humidity import HumidityConfig, HumidityResult, HumidityTrend
+from .presence_filter import PresenceFilterStats
+from .snapshot import SnapshotStats, StateSnapshot, state_number
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -81,6 +116,21 @@ class StateConfigData:
     lights: list[str]
 
 
+@dataclass(frozen=True, slots=True)
+class LightPlan:
+    """What the lights do for a state, worked out when the config is loaded."""
+
+    lights: tuple[str, ...]
+    # Brightness out of 255 before the illuminance adjustment.
+    brightness: int
+    # The brightness curve of the area worked out for this brightness.
+    table: BrightnessTable
+
+    def brightness_for(self, illuminance: float) -> int:
+        """Return the brightness to use at the current illuminance."""
+        return self.table.lookup(illuminance)
+
+
 class MagicArea(object):  # noqa: UP004
     """The base class for the magic area integration."""
 
@@ -109,8 +159,18 @@ class MagicArea(object):  # noqa: UP004
         self.entities: dict[str, list[dict[str, str]]] = {}
 
         self.last_changed: int = datetime.now(UTC)  # type: ignore  # noqa: PGH003
-        self.state: AreaState = AreaState.AREA_STATE_CLEAR
+        self._state: AreaState = AreaState.AREA_STATE_CLEAR
+        self._state_listeners: list[Callable[[MagicArea, AreaState], None]] = []
         self._state_config: dict[AreaState, StateConfigData] = {}
+        self._light_plans: dict[AreaState, LightPlan] = {}
+        self._secondary_states: tuple[AreaState, ...] = ()
+        self._secondary_entities: dict[str, tuple[StateConfigData, ...]] = {}
+        self.snapshot_stats = SnapshotStats()
+        self.presence_filter_stats = PresenceFilterStats()
+        self.humidity = HumidityTrend(self._humidity_config())
+        self._humidity_listeners: list[Callable[[HumidityResult], None]] = []
+        self._humidity_unsub: CALLBACK_TYPE | None = None
+        self._humidity_timer: CALLBACK_TYPE | None = None
 
         self.loaded_platforms: list[str] = []
 
@@ -150,14 +210,147 @@ class MagicArea(object):  # noqa: UP004
         area_type = "Meta-Area" if self.is_meta() else "Area"
         _LOGGER.debug("%s: %s initialized", self.slug, area_type)  # type: ignore # noqa: PGH003
 
+    @property
+    def state(self) -> AreaState:
+        """The current state of the area."""
+        return self._state
+
+    @state.setter
+    def state(self, state: AreaState) -> None:
+        last_state = self._state
+        self._state = state
+        if last_state != state:
+            for listener in list(self._state_listeners):
+                listener(self, last_state)
+
+    @callback
+    def async_track_state(
+        self, listener: Callable[["MagicArea", AreaState], None]
+    ) -> CALLBACK_TYPE:
+        """Call the listener with the area and the last state on each state change."""
+        self._state_listeners.append(listener)
+
+        @callback
+        def _remove() -> None:
+            if listener in self._state_listeners:
+                self._state_listeners.remove(listener)
+
+        return _remove
+
+    def unload(self) -> None:
+        """Release anything the area is holding on to before it is unloaded."""
+        self._humidity_listeners.clear()
+        self._stop_humidity()
+
+    def _humidity_config(self) -> HumidityConfig:
+        humidity_config = self.feature_config(CONF_FEATURE_HUMIDITY)
+        return HumidityConfig(
+            up_cut_off=humidity_config.get(
+                CONF_HUMIDITY_TREND_UP_CUT_OFF, DEFAULT_HUMIDITY_TREND_UP_CUT_OFF
+            ),
+            down_cut_off=humidity_config.get(
+                CONF_HUMIDITY_TREND_DOWN_CUT_OFF, DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF
+            ),
+            zero_wait=humidity_config.get(
+                CONF_HUMIDITY_ZERO_WAIT_TIME, DEFAULT_HUMIDITY_ZERO_WAIT_TIME
+            ),
+        )
+
+    @callback
+    def async_track_humidity(
+        self, listener: Callable[[HumidityResult], None]
+    ) -> CALLBACK_TYPE:
+        """Call the listener with the humidity decision from each trend sample.
+
+        The trend is only listened to while something is tracking it, so each
+        sample is parsed once however many listeners there are.
+        """
+        if self._humidity_unsub is None:
+            self._humidity_unsub = async_track_state_change_event(
+                self.hass, [self._humidity_trend_id()], self._humidity_trend_change
+            )
+            self._sample_humidity(self.hass.states.get(self._humidity_trend_id()))
+        self._humidity_listeners.append(listener)
+
+        @callback
+        def _remove() -> None:
+            if listener in self._humidity_listeners:
+                self._humidity_listeners.remove(listener)
+            if not self._humidity_listeners:
+                self._stop_humidity()
+
+        return _remove
+
+    def _humidity_trend_id(self) -> str:
+        return self.simply_magic_entity_id(
+            SENSOR_DOMAIN, EntityNames.HUMIDITY_STATISTICS
+        )
+
+    @callback
+    def _humidity_trend_change(self, event: Event[EventStateChangedData]) -> None:
+        if event.data["new_state"] is None:
+            return
+        if not self._sample_humidity(event.data["new_state"]):
+            return
+        for listener in list(self._humidity_listeners):
+            listener(self.humidity.result)
+
+    @callback
+    def _humidity_deadline_reached(self, _now: datetime) -> None:
+        self._humidity_timer = None
+        now = get_clock(self.hass).monotonic()
+        self._schedule_humidity(self.humidity.evaluate(now))
+        for listener in list(self._humidity_listeners):
+            listener(self.humidity.result)
+
+    def _sample_humidity(self, state: State | None) -> bool:
+        """Sample the trend state, returns False if there is no valid trend."""
+        trend = state_number(state)
+        if trend is None:
+            return False
+        self._schedule_humidity(
+            self.humidity.sample(trend, get_clock(self.hass).monotonic())
+        )
+        return True
+
+    def _schedule_humidity(self, result: HumidityResult) -> None:
+        if self._humidity_timer is not None:
+            self._humidity_timer()
+            self._humidity_timer = None
+        if result.deadline is not None:
+            delay = max(result.deadline - get_clock(self.hass).monotonic(), 0)
+            self._humidity_timer = async_call_later(
+                self.hass, delay, self._humidity_deadline_reached
+            )
+
+    def _stop_humidity(self) -> None:
+        if self._humidity_unsub is not None:
+            self._humidity_unsub()
+            self._humidity_unsub = None
+        if self._humidity_timer is not None:
+            self._humidity_timer()
+            self._humidity_timer = None
+
     def state_config(self, state: AreaState) -> StateConfigData | None:
         """Return the light entity config for the current state."""
         return self._state_config[state]
 
+    def light_plan(self, state: AreaState) -> LightPlan | None:
+        """Return the light plan for the state, None if it is not configured."""
+        return self._light_plans.get(state)
+
     def all_state_configs(self) -> dict[AreaState, StateConfigData]:
         """Return the dictionary with all the currently configured state configs."""
         return self._state_config
 
+    def secondary_states(self) -> tuple[AreaState, ...]:
+        """Return the states driven by an entity, lowest priority first."""
+        return self._secondary_states
+
+    def secondary_state_entities(self) -> dict[str, tuple[StateConfigData, ...]]:
+        """Return the state configs driven by each secondary entity."""
+        return self._secondary_entities
+
     def has_configured_state(self, state: AreaState) -> bool:
         """If the area has the specified configured state."""
         return state in self._state_config
@@ -396,7 +589,57 @@ class MagicArea(object):  # noqa: UP004
                 lights=lights,
             )
 
-    def is_control_enabled(self, control_type: ControlType) -> bool:
+        # Work out everything the lights need up front, so a state change only
+        # has to apply the illuminance.
+        light_config = self.feature_config(CONF_FEATURE_ADVANCED_LIGHT_GROUPS)
+        curve = BrightnessCurve(
+            kind=light_config.get(CONF_BRIGHTNESS_CURVE, DEFAULT_BRIGHTNESS_CURVE),
+            min_illuminance=float(
+                self.config.get(CONF_MIN_BRIGHTNESS_LEVEL, DEFAULT_MIN_BRIGHTNESS_LEVEL)
+            ),
+            max_illuminance=float(
+                self.config.get(CONF_MAX_BRIGHTNESS_LEVEL, DEFAULT_MAX_BRIGHTNESS_LEVEL)
+            ),
+            gamma=float(
+                light_config.get(CONF_BRIGHTNESS_GAMMA, DEFAULT_BRIGHTNESS_GAMMA)
+            ),
+            points=tuple(
+                sorted(
+                    (float(lux), float(percent))
+                    for lux, percent in light_config.get(
+                        CONF_BRIGHTNESS_CURVE_POINTS, DEFAULT_BRIGHTNESS_CURVE_POINTS
+                    ).items()
+                )
+            ),
+        )
+        self._light_plans = {}
+        for state, conf in self._state_config.items():
+            brightness = int(conf.dim_level * 255 / 100)
+            self._light_plans[state] = LightPlan(
+                lights=tuple(conf.lights),
+                brightness=brightness,
+                table=curve.compile(brightness),
+            )
+
+        # Compile the secondary states, the later entries have priority.
+        secondary_entities: dict[str, list[StateConfigData]] = {}
+        for conf in self._state_config.values():
+            if conf.entity:
+                secondary_entities.setdefault(conf.entity, []).append(conf)
+        self._secondary_states = tuple(
+            state for state, conf in self._state_config.items() if conf.entity
+        )
+        self._secondary_entities = {
+            entity_id: tuple(confs) for entity_id, confs in secondary_entities.items()
+        }
+
+    def snapshot(self) -> StateSnapshot:
+        """Return a new state snapshot for an evaluation pass."""
+        return StateSnapshot(self.hass, self.snapshot_stats)
+
+    def is_control_enabled(
+        self, control_type: ControlType, snapshot: StateSnapshot | None = None
+    ) -> bool:
         """If the area has controled turned on for simply magic areas."""
         entity_id = ""
         if control_type == ControlType.Fan:
@@ -407,7 +650,9 @@ class MagicArea(object):  # noqa: UP004
         entity_id = self.simply_magic_entity_id(
             SWITCH_DOMAIN, EntityNames.SYSTEM_CONTROL
         )
-        switch_entity = self.hass.states.get(entity_id)
+        if snapshot is None:
+            snapshot = self.snapshot()
+        switch_entity = snapshot.get(entity_id)
         if switch_entity:
             return switch_entity.state.lower() == STATE_ON  # type: ignore  # noqa: PGH003
         return True
@@ -432,6 +677,76 @@ class MagicArea(object):  # noqa: UP004
 class MagicMetaArea(MagicArea):
     """Class for the meta simply magic areas that contain other areas."""
 
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        area: AreaEntry,
+        config: ConfigEntry,
+    ) -> None:
+        """Initialize the meta area, tracking which children are occupied."""
+        super().__init__(hass, area, config)
+        self._occupied_areas: set[str] = set()
+        self._child_listeners: list[CALLBACK_TYPE] = []
+        self._occupancy_listeners: list[Callable[[str, bool], None]] = []
+
+    async def initialize(self) -> None:
+        """Initialise the meta area, after tracking the children."""
+        self._track_child_areas()
+        await super().initialize()
+
+    def unload(self) -> None:
+        """Stop tracking the child areas."""
+        super().unload()
+        for remove in self._child_listeners:
+            remove()
+        self._child_listeners.clear()
+        self._occupancy_listeners.clear()
+
+    def _track_child_areas(self) -> None:
+        for area in self._child_area_objects():
+            if area.state in PRESENCE_STATES:
+                self._occupied_areas.add(area.slug)
+            self._child_listeners.append(
+                area.async_track_state(self._child_state_changed)
+            )
+
+    @callback
+    def _child_state_changed(self, area: MagicArea, last_state: AreaState) -> None:
+        occupied = area.state in PRESENCE_STATES
+        if occupied == (last_state in PRESENCE_STATES):
+            return
+        if occupied:
+            self._occupied_areas.add(area.slug)
+        else:
+            self._occupied_areas.discard(area.slug)
+        _LOGGER.debug(  # type: ignore  # noqa: PGH003
+            "%s: Child %s occupied %s, %s occupied",
+            self.slug,
+            area.slug,
+            occupied,
+            len(self._occupied_areas),
+        )
+        for listener in list(self._occupancy_listeners):
+            listener(area.slug, occupied)
+
+    @callback
+    def async_track_occupancy(
+        self, listener: Callable[[str, bool], None]
+    ) -> CALLBACK_TYPE:
+        """Call the listener with the child slug each time a child is occupied or not."""
+        self._occupancy_listeners.append(listener)
+
+        @callback
+        def _remove() -> None:
+            if listener in self._occupancy_listeners:
+                self._occupancy_listeners.remove(listener)
+
+        return _remove
+
+    def is_empty(self) -> bool:
+        """If none of the child areas are occupied."""
+        return not self._occupied_areas
+
     def _areas_loaded(self, hass: HomeAssistant | None = None) -> bool:
         hass_object = hass if hass else self.hass
 
@@ -448,31 +763,16 @@ class MagicMetaArea(MagicArea):
         return True
 
     def get_active_areas(self) -> list[str]:
-        """Get the currently active areas."""
-        areas = self.get_child_areas()
-        active_areas: list[str] = []
-
-        for area in areas:
-            try:
-                entity_id = f"binary_sensor.area_{area}"
-                entity = self.hass.states.get(entity_id)
-
-                if entity and entity.state == STATE_ON:
-                    active_areas.append(area)
-            except Exception as e:  # noqa: BLE001
-                _LOGGER.error(  # type: ignore  # noqa: PGH003
-                    "%s: Unable to get active area state for %s: %s",
-                    self.slug,
-                    area,
-                    str(e),
-                )
-
-        return active_areas
+        """Get the currently occupied child areas."""
+        return sorted(self._occupied_areas)
 
     def get_child_areas(self) -> list[str]:
         """Get the child areas."""
+        return [area.slug for area in self._child_area_objects()]
+
+    def _child_area_objects(self) -> list[MagicArea]:
         data = self.hass.data[MODULE_DATA]
-        areas: list[str] = []
+        areas: list[MagicArea] = []
 
         for area_info in data.values():
             area = area_info[DATA_AREA_OBJECT]
@@ -480,7 +780,7 @@ class MagicMetaArea(MagicArea):
                 self.id == META_AREA_GLOBAL.lower()  # type: ignore  # noqa: PGH003
                 or area.config.get(CONF_TYPE) == self.id
             ) and not area.is_meta():
-                areas.append(area.slug)
+                areas.append(area)
 
         return areas
 
@@ -0,0 +1,192 @@
+"""Occupancy state machine for the simply magic areas.
+
+This is deliberately free of any Home Assistant calls so it can be driven by
+the area state sensor, by tests and by the benchmarks with synthetic events.
+All the times passed in are monotonic seconds from whatever clock the caller
+is using, the engine never reads the time itself.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from ..config.area_state import AreaState
+
+
+@dataclass(frozen=True, slots=True)
+class OccupancyConfig:
+    """Static configuration for the occupancy engine."""
+
+    clear_timeout: float
+    extended_timeout: float
+    # The secondary states in priority order, the last active one wins.
+    secondary_states: tuple[AreaState, ...] = ()
+    # How many sensors need to be active for the area to be occupied.
+    quorum: int = 1
+    # The total weight of the active sensors needed for the area to be occupied.
+    threshold: float = 0.0
+
+    def secondary_bits(self) -> dict[AreaState, int]:
+        """Return the bit for each secondary state, higher bits win."""
+        return {state: 1 << i for i, state in enumerate(self.secondary_states)}
+
+
+class OccupancyResult(NamedTuple):
+    """The output of an evaluation of the engine."""
+
+    state: AreaState
+    # When the engine next needs to be evaluated, None if only an input
+    # change can change the state.
+    deadline: float | None
+
+
+_CLEAR = OccupancyResult(AreaState.AREA_STATE_CLEAR, None)
+_MANUAL = OccupancyResult(AreaState.AREA_STATE_MANUAL, None)
+
+
+class OccupancyEngine:
+    """Side effect free clear -> occupied -> extended state machine."""
+
+    __slots__ = (
+        "_active",
+        "_config",
+        "_direct",
+        "_enabled",
+        "_last_off",
+        "_secondary_bits",
+        "_secondary_mask",
+        "_weight",
+        "_weights",
+    )
+
+    def __init__(self, config: OccupancyConfig) -> None:
+        """Initialize the engine, starts out clear and enabled."""
+        self._config = config
+        self._active: set[str] = set()
+        # The active inputs that are presence on their own, not fused.
+        self._direct: set[str] = set()
+        self._weights: dict[str, float] = {}
+        self._weight: float = 0.0
+        self._secondary_bits = config.secondary_bits()
+        self._secondary_mask: int = 0
+        self._enabled: bool = True
+        self._last_off: float = -math.inf
+
+    @property
+    def config(self) -> OccupancyConfig:
+        """The configuration the engine is running with."""
+        return self._config
+
+    @property
+    def active_sensors(self) -> set[str]:
+        """The sensors currently reporting presence."""
+        return self._active
+
+    @property
+    def present(self) -> bool:
+        """If enough sensors are active for someone to be in the area."""
+        if self._direct:
+            return True
+        config = self._config
+        return len(self._active) >= config.quorum and self._weight >= config.threshold
+
+    @property
+    def last_off(self) -> float:
+        """When presence was last reported as off."""
+        return self._last_off
+
+    @property
+    def enabled(self) -> bool:
+        """If the system control is enabled for the area."""
+        return self._enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Set if the system is in control, manual otherwise."""
+        self._enabled = enabled
+
+    def set_weight(self, entity_id: str, weight: float) -> None:
+        """Set how much a sensor counts towards the threshold, defaults to 1."""
+        if entity_id in self._active:
+            self._weight += weight - self._weights.get(entity_id, 1.0)
+        self._weights[entity_id] = weight
+
+    def sensor_changed(
+        self, entity_id: str, active: bool, now: float, fused: bool = True
+    ) -> None:
+        """Update a presence sensor, losing presence restarts the clear timeout.
+
+        An input that is not fused, a child area or the humidity trend, is
+        presence on its own and does not count towards the quorum or weight.
+        """
+        if active:
+            self._activate(entity_id, fused)
+            return
+        present = self.present
+        self._deactivate(entity_id)
+        if present and not self.present:
+            self._last_off = now
+
+    def sensor_removed(self, entity_id: str) -> None:
+        """Drop a sensor without restarting the clear timeout."""
+        self._deactivate(entity_id)
+
+    def _activate(self, entity_id: str, fused: bool) -> None:
+        if entity_id in self._active:
+            return
+        self._active.add(entity_id)
+        if fused:
+            self._weight += self._weights.get(entity_id, 1.0)
+        else:
+            self._direct.add(entity_id)
+
+    def _deactivate(self, entity_id: str) -> None:
+        if entity_id not in self._active:
+            return
+        self._active.remove(entity_id)
+        if entity_id in self._direct:
+            self._direct.remove(entity_id)
+        elif len(self._active) > len(self._direct):
+            self._weight -= self._weights.get(entity_id, 1.0)
+        else:
+            # Reset so rounding errors never build up.
+            self._weight = 0.0
+
+    def hold(self, now: float) -> None:
+        """Restart the clear timeout without changing any sensor."""
+        self._last_off = now
+
+    def restore(self, last_off: float) -> None:
+        """Restore the last off time, used when resuming after a restart."""
+        self._last_off = last_off
+
+    def secondary_changed(self, state: AreaState, active: bool) -> None:
+        """Update if the entity driving a secondary state is on."""
+        bit = self._secondary_bits[state]
+        if active:
+            self._secondary_mask |= bit
+        else:
+            self._secondary_mask &= ~bit
+
+    def evaluate(self, now: float) -> OccupancyResult:
+        """Work out the current state and when it next needs to be evaluated."""
+        if not self._enabled:
+            return _MANUAL
+
+        deadline: float | None = None
+        if not self.present:
+            config = self._config
+            clear_at = self._last_off + config.clear_timeout
+            if now >= clear_at:
+                extended_at = clear_at + config.extended_timeout
+                if now >= extended_at:
+                    return _CLEAR
+                return OccupancyResult(AreaState.AREA_STATE_EXTENDED, extended_at)
+            deadline = clear_at
+
+        # Occupied, or waiting to clear, so apply the highest secondary state.
+        mask = self._secondary_mask
+        if mask:
+            return OccupancyResult(
+                self._config.secondary_states[mask.bit_length() - 1], deadline
+            )
+        return OccupancyResult(AreaState.AREA_STATE_OCCUPIED, deadline)
@@ -0,0 +1,132 @@
+"""Debounce filter for the presence sensors in front of the occupancy engine.
+
+Cheap motion sensors can flap on and off several times a second, without a
+filter every flap restarts the clear timeout and re-evaluates the area. A raw
+change is only passed on once it has held for the debounce time and the sensor
+has stayed in its current state for the minimum on or off time. The pending
+changes share a single heap of deadlines, the caller only needs to wake up for
+the earliest one. Like the engine this is free of Home Assistant calls and all
+the times are monotonic seconds from the caller. There is no locking, so every
+call has to come from the event loop.
+"""
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import NamedTuple
+
+
+@dataclass(frozen=True, slots=True)
+class PresenceFilterConfig:
+    """Static configuration for the presence filter, all in seconds."""
+
+    # How long a raw change has to hold before it is passed on.
+    debounce: float = 0.0
+    # How long a sensor stays on once it has turned on.
+    min_on: float = 0.0
+    # How long a sensor stays off once it has turned off.
+    min_off: float = 0.0
+
+
+@dataclass(slots=True)
+class PresenceFilterStats:
+    """Counters for how much the filter is absorbing."""
+
+    raw: int = 0
+    absorbed: int = 0
+
+
+class PresenceChange(NamedTuple):
+    """A filtered change to pass on to the engine."""
+
+    entity_id: str
+    active: bool
+    # When the change took effect, can be before the time it is collected.
+    at: float
+
+
+class PresenceFilter:
+    """Per sensor debounce, minimum on and minimum off filter."""
+
+    __slots__ = (
+        "_changed_at",
+        "_committed",
+        "_config",
+        "_deadlines",
+        "_pending",
+        "stats",
+    )
+
+    def __init__(
+        self, config: PresenceFilterConfig, stats: PresenceFilterStats
+    ) -> None:
+        """Initialize the filter with every sensor off."""
+        self._config = config
+        self._committed: dict[str, bool] = {}
+        self._changed_at: dict[str, float] = {}
+        self._pending: dict[str, tuple[bool, float]] = {}
+        self._deadlines: list[tuple[float, str]] = []
+        self.stats = stats
+
+    def seed(self, entity_id: str, active: bool) -> None:
+        """Set the state of a sensor on startup, without any minimum time."""
+        self._committed[entity_id] = active
+        self._pending.pop(entity_id, None)
+
+    def update(self, entity_id: str, active: bool, now: float) -> None:
+        """Record a raw change, collect the result with ``advance``."""
+        self.stats.raw += 1
+        committed = self._committed.get(entity_id, False)
+        pending = self._pending.get(entity_id)
+        if active == committed:
+            if pending is not None:
+                # Flapped back before the change was passed on.
+                del self._pending[entity_id]
+                self.stats.absorbed += 2
+            return
+        if pending is not None:
+            self.stats.absorbed += 1
+            return
+
+        config = self._config
+        hold = config.min_on if committed else config.min_off
+        due = max(
+            now + config.debounce, self._changed_at.get(entity_id, -math.inf) + hold
+        )
+        self._pending[entity_id] = (active, due)
+        heapq.heappush(self._deadlines, (due, entity_id))
+
+    def remove(self, entity_id: str) -> None:
+        """Drop a sensor that has gone unavailable."""
+        self._committed[entity_id] = False
+        self._pending.pop(entity_id, None)
+
+    def is_pending(self, entity_id: str) -> bool:
+        """If the sensor has a change that has not been passed on yet."""
+        return entity_id in self._pending
+
+    def deadline(self) -> float | None:
+        """Return when the next pending change is due, None if nothing is."""
+        deadlines = self._deadlines
+        while deadlines:
+            due, entity_id = deadlines[0]
+            pending = self._pending.get(entity_id)
+            if pending is not None and pending[1] == due:
+                return due
+            heapq.heappop(deadlines)
+        return None
+
+    def advance(self, now: float) -> list[PresenceChange]:
+        """Pass on all the changes that are due."""
+        changes: list[PresenceChange] = []
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            due, entity_id = heapq.heappop(deadlines)
+            pending = self._pending.get(entity_id)
+            if pending is None or pending[1] != due:
+                continue
+            del self._pending[entity_id]
+            self._committed[entity_id] = pending[0]
+            self._changed_at[entity_id] = due
+            changes.append(PresenceChange(entity_id, pending[0], due))
+        return changes
@@ -0,0 +1,130 @@
+"""Route the mqtt_room trackers to the areas they are in.
+
+Every mqtt_room tracker reports the name of the room it is in as its state.
+Rather than have every area check every tracker update, the router keeps an
+index of the room names to the areas listening for them, a tracker update is
+only passed on to the area it left and the area it entered. The trackers in
+each room are kept up to date as they move, so the count is always at hand.
+"""
+
+from collections.abc import Callable
+
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    HomeAssistant,
+    callback,
+)
+from homeassistant.helpers.event import async_track_state_change_event
+
+from ..const import DATA_ROOM_PRESENCE, INVALID_STATES
+
+# Called with the tracker and if it is now in the room, None when the tracker
+# has gone unavailable.
+RoomPresenceCallback = Callable[[str, bool | None], None]
+
+
+class RoomPresenceRouter:
+    """Index of the rooms to the areas and the trackers in them."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the router with nothing tracked."""
+        self._hass = hass
+        self._listeners: dict[str, list[RoomPresenceCallback]] = {}
+        self._rooms: dict[str, set[str]] = {}
+        self._tracker_room: dict[str, str] = {}
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+
+    def trackers_in(self, room: str) -> set[str]:
+        """Return the trackers currently in the room."""
+        return self._rooms.get(room.lower(), set())
+
+    def tracker_count(self, room: str) -> int:
+        """Return how many trackers are currently in the room."""
+        return len(self.trackers_in(room))
+
+    @callback
+    def async_track_room(
+        self,
+        room: str,
+        trackers: list[str],
+        action: RoomPresenceCallback,
+    ) -> CALLBACK_TYPE:
+        """Call the action when a tracker enters or leaves the room."""
+        for tracker in trackers:
+            self._track(tracker)
+
+        room = room.lower()
+        listeners = self._listeners.setdefault(room, [])
+        listeners.append(action)
+
+        @callback
+        def _remove() -> None:
+            listeners.remove(action)
+            if not listeners:
+                del self._listeners[room]
+
+        return _remove
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening to all the trackers."""
+        for unsub in self._unsubs.values():
+            unsub()
+        self._unsubs.clear()
+        self._listeners.clear()
+        self._rooms.clear()
+        self._tracker_room.clear()
+
+    def _track(self, tracker: str) -> None:
+        if tracker in self._unsubs:
+            return
+        self._unsubs[tracker] = async_track_state_change_event(
+            self._hass, [tracker], self._tracker_change
+        )
+        state = self._hass.states.get(tracker)
+        if state is not None and state.state not in INVALID_STATES:
+            self._move(tracker, state.state.lower())
+
+    def _move(self, tracker: str, room: str | None) -> str | None:
+        """Move the tracker to the room, returns the room it left."""
+        old_room = self._tracker_room.pop(tracker, None)
+        if old_room is not None:
+            trackers = self._rooms[old_room]
+            trackers.discard(tracker)
+            if not trackers:
+                del self._rooms[old_room]
+        if room is not None:
+            self._tracker_room[tracker] = room
+            self._rooms.setdefault(room, set()).add(tracker)
+        return old_room
+
+    @callback
+    def _tracker_change(self, event: Event[EventStateChangedData]) -> None:
+        new_state = event.data["new_state"]
+        if new_state is None:
+            return
+        tracker = event.data["entity_id"]
+
+        room: str | None = None
+        if new_state.state not in INVALID_STATES:
+            room = new_state.state.lower()
+        old_room = self._move(tracker, room)
+        if old_room == room:
+            return
+
+        if old_room is not None:
+            for action in list(self._listeners.get(old_room, ())):
+                action(tracker, None if room is None else False)
+        if room is not None:
+            for action in list(self._listeners.get(room, ())):
+                action(tracker, True)
+
+
+def get_room_router(hass: HomeAssistant) -> RoomPresenceRouter:
+    """Return the shared room router, creating it on first use."""
+    router: RoomPresenceRouter | None = hass.data.get(DATA_ROOM_PRESENCE)
+    if router is None:
+        router = hass.data[DATA_ROOM_PRESENCE] = RoomPresenceRouter(hass)
+    return router
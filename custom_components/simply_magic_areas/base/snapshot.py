@@ -0,0 +1,65 @@
+"""Memoized state reads for a single evaluation pass.
+
+An evaluation reads the same entities several times, for example the switch
+controlling the area or the humidity trend, the snapshot keeps the first read
+(and the parsed number) so the rest of the pass is a dictionary lookup. A
+snapshot must not outlive the pass that created it, otherwise it goes stale.
+"""
+
+from dataclasses import dataclass
+
+from homeassistant.core import HomeAssistant, State
+
+from ..const import INVALID_STATES
+
+
+@dataclass(slots=True)
+class SnapshotStats:
+    """Counters for how well the snapshots are doing."""
+
+    hits: int = 0
+    misses: int = 0
+
+
+class StateSnapshot:
+    """Read through cache of the state machine."""
+
+    __slots__ = ("_hass", "_numbers", "_states", "stats")
+
+    def __init__(self, hass: HomeAssistant, stats: SnapshotStats) -> None:
+        """Initialize an empty snapshot."""
+        self._hass = hass
+        self._states: dict[str, State | None] = {}
+        self._numbers: dict[str, float | None] = {}
+        self.stats = stats
+
+    def get(self, entity_id: str) -> State | None:
+        """Return the state for the entity, like hass.states.get."""
+        try:
+            state = self._states[entity_id]
+        except KeyError:
+            self.stats.misses += 1
+            state = self._states[entity_id] = self._hass.states.get(entity_id)
+        else:
+            self.stats.hits += 1
+        return state
+
+    def number(self, entity_id: str) -> float | None:
+        """Return the state as a number, None if missing, invalid or not a number."""
+        try:
+            value = self._numbers[entity_id]
+        except KeyError:
+            value = self._numbers[entity_id] = state_number(self.get(entity_id))
+        else:
+            self.stats.hits += 1
+        return value
+
+
+def state_number(state: State | None) -> float | None:
+    """Return the state as a number, None if missing, invalid or not a number."""
+    if state is None or state.state in INVALID_STATES:
+        return None
+    try:
+        return float(state.state)
+    except ValueError:
+        return None
@@ -0,0 +1,126 @@
+"""Detect storms of availability changes across the areas.
+
+When a zigbee or zwave network reconnects hundreds of entities go unavailable
+and come back within a second or two. Without any help every area re-evaluates
+on each of those changes and can flip the lights about. The detector watches
+the rate of availability changes over all the areas, once it is over the limit
+the areas defer their evaluations. When things have been quiet for the settle
+time every deferred area is evaluated exactly once.
+"""
+
+import logging
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from ..const import (
+    DATA_STORM,
+    STORM_SETTLE_TIME,
+    STORM_TRANSITIONS,
+    STORM_WINDOW,
+)
+from .clock import get_clock
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StormDetector:
+    """Integration wide detector for bursts of availability changes."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        transitions: int = STORM_TRANSITIONS,
+        window: float = STORM_WINDOW,
+        settle_time: float = STORM_SETTLE_TIME,
+    ) -> None:
+        """Initialize the detector, starts out with no storm."""
+        self._hass = hass
+        self._clock = get_clock(hass)
+        self._transitions = transitions
+        self._window = window
+        self._settle_time = settle_time
+        self._recent: deque[float] = deque()
+        self._last_transition: float = 0.0
+        self._deferred: dict[Callable[[], None], None] = {}
+        self._settle_cb: CALLBACK_TYPE | None = None
+        self.active: bool = False
+        self.storms: int = 0
+
+    @callback
+    def record_transition(self) -> None:
+        """Note an entity going to or coming back from unavailable."""
+        now = self._clock.monotonic()
+        self._last_transition = now
+        recent = self._recent
+        recent.append(now)
+        while recent[0] < now - self._window:
+            recent.popleft()
+
+        if not self.active and len(recent) >= self._transitions:
+            self.active = True
+            self.storms += 1
+            _LOGGER.warning(
+                "Availability storm detected, %s changes in %ss, deferring evaluation",
+                len(recent),
+                self._window,
+            )
+            self._schedule_settle()
+
+    @callback
+    def defer(self, action: Callable[[], None]) -> bool:
+        """Defer the action until the storm settles, False if there is no storm."""
+        if not self.active:
+            return False
+        # Keyed so each area is only evaluated once at the end.
+        self._deferred[action] = None
+        return True
+
+    @callback
+    def cancel(self, action: Callable[[], None]) -> None:
+        """Drop a deferred action, for an area that is going away."""
+        self._deferred.pop(action, None)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the settle timer and drop anything deferred."""
+        if self._settle_cb is not None:
+            self._settle_cb()
+            self._settle_cb = None
+        self._deferred.clear()
+        self.active = False
+
+    def _schedule_settle(self) -> None:
+        delay = self._last_transition + self._settle_time - self._clock.monotonic()
+        self._settle_cb = async_call_later(
+            self._hass, max(delay, 0), self._settle_reached
+        )
+
+    @callback
+    def _settle_reached(self, _now: datetime) -> None:
+        self._settle_cb = None
+        if self._clock.monotonic() < self._last_transition + self._settle_time:
+            # Still going, wait for it to be quiet.
+            self._schedule_settle()
+            return
+
+        self.active = False
+        self._recent.clear()
+        deferred = list(self._deferred)
+        self._deferred.clear()
+        _LOGGER.info(
+            "Availability storm settled, evaluating %s deferred areas", len(deferred)
+        )
+        for action in deferred:
+            action()
+
+
+def get_storm_detector(hass: HomeAssistant) -> StormDetector:
+    """Return the shared storm detector, creating it on first use."""
+    detector: StormDetector | None = hass.data.get(DATA_STORM)
+    if detector is None:
+        detector = hass.data[DATA_STORM] = StormDetector(hass)
+    return detector
@@ -58,7 +58,9 @@ from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.event import async_track_state_change_event
 
+from .base.actuation import get_actuation
 from .base.entities import MagicEntity
+from .base.lanes import get_lanes
 from .base.magic import MagicArea
 from .const import (
     CONF_CLIMATE_GROUPS_TURN_ON_STATE,
@@ -370,11 +372,27 @@ class AreaClimateGroup(MagicEntity, ClimateGroup):
         unit = self.area.hass.config.units.temperature_unit
 
         ClimateGroup.__init__(self, self.unique_id, self._name, self._entities, unit)
+        self._lanes = get_lanes(area.hass)
+        self._actuation = get_actuation(area.hass)
+        self.async_on_remove(self._cancel_group_update)
 
         _LOGGER.debug(
             f"Climate group {self._name} created with entities: {self._entities}"
         )
 
+    @callback
+    def async_defer_or_update_ha_state(self) -> None:
+        """Recompute in the low lane, after any presence work."""
+        self._lanes.async_run_low(self._update_group)
+
+    @callback
+    def _update_group(self) -> None:
+        super().async_defer_or_update_ha_state()
+
+    @callback
+    def _cancel_group_update(self) -> None:
+        self._lanes.async_cancel(self._update_group)
+
     def area_state_changed(self, area_id, states_tuple):
         if self.area.is_meta():
             _LOGGER.debug(f"{self.area.name} is meta. Noop.")
@@ -422,7 +440,7 @@ class AreaClimateGroup(MagicEntity, ClimateGroup):
             ATTR_ENTITY_ID: self.entity_id,
             ATTR_HVAC_MODE: HVACMode.OFF,
         }
-        self.hass.services.call(CLIMATE_DOMAIN, SERVICE_SET_HVAC_MODE, service_data)
+        self._actuation.dispatch(CLIMATE_DOMAIN, SERVICE_SET_HVAC_MODE, service_data)
 
     def _turn_on(self):
         for mode in (HVACMode.HEAT_COOL, HVACMode.HEAT, HVACMode.COOL):
@@ -434,5 +452,7 @@ class AreaClimateGroup(MagicEntity, ClimateGroup):
                 ATTR_HVAC_MODE: mode,
             }
 
-            self.hass.services.call(CLIMATE_DOMAIN, SERVICE_SET_HVAC_MODE, service_data)
+            self._actuation.dispatch(
+                CLIMATE_DOMAIN, SERVICE_SET_HVAC_MODE, service_data
+            )
             break
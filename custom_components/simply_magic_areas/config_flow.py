@@ -19,13 +19,18 @@ from .config.nullable_entity_selector import NullableEntitySelector
 from .const import (
     _DOMAIN_SCHEMA,
     ALL_BINARY_SENSOR_DEVICE_CLASSES,
+    ALL_BRIGHTNESS_CURVES,
     ALL_LIGHT_ENTITIES,
     ALL_PRESENCE_DEVICE_PLATFORMS,
     AREA_TYPE_EXTERIOR,
     AREA_TYPE_INTERIOR,
     AREA_TYPE_META,
     AVAILABLE_ON_STATES,
+    CONF_ACTUATION_RATE,
+    CONF_ACTUATION_RATE_LIMITS,
     CONF_AGGREGATES_MIN_ENTITIES,
+    CONF_BRIGHTNESS_CURVE,
+    CONF_BRIGHTNESS_CURVE_POINTS,
     CONF_CLEAR_TIMEOUT,
     CONF_CLIMATE_GROUPS_TURN_ON_STATE,
     CONF_COVER_GROUPS,
@@ -54,7 +59,9 @@ from .const import (
     CONF_NOTIFY_STATES,
     CONF_ON_STATES,
     CONF_PRESENCE_DEVICE_PLATFORMS,
+    CONF_PRESENCE_QUORUM,
     CONF_PRESENCE_SENSOR_DEVICE_CLASS,
+    CONF_PRESENCE_SENSOR_WEIGHTS,
     CONF_TYPE,
     CONF_UPDATE_INTERVAL,
     CONFIG_FLOW_ENTITY_FILTER_EXT,
@@ -62,6 +69,7 @@ from .const import (
     DATA_AREA_OBJECT,
     DEFAULT_ICON,
     DOMAIN,
+    GLOBAL_AREA_SCHEMA,
     META_AREA_GLOBAL,
     META_AREA_SCHEMA,
     META_AREAS,
@@ -70,6 +78,7 @@ from .const import (
     OPTIONS_AREA,
     OPTIONS_AREA_ADVANCED,
     OPTIONS_AREA_AWARE_MEDIA_PLAYER,
+    OPTIONS_AREA_GLOBAL,
     OPTIONS_AREA_META,
     OPTIONS_CLIMATE_GROUP,
     OPTIONS_CLIMATE_GROUP_META,
@@ -391,9 +400,11 @@ class OptionsFlowHandler(config_entries.OptionsFlow, ConfigBase):
 
         if user_input is not None:
             _LOGGER.debug("Validating area base config: %s", user_input)
-            area_schema = (
-                META_AREA_SCHEMA if self.area.is_meta() else REGULAR_AREA_SCHEMA
-            )
+            area_schema = REGULAR_AREA_SCHEMA
+            if self.area.id == META_AREA_GLOBAL.lower():
+                area_schema = GLOBAL_AREA_SCHEMA
+            elif self.area.is_meta():
+                area_schema = META_AREA_SCHEMA
             try:
                 self.area_options = area_schema(user_input)
             except vol.MultipleInvalid as validation:
@@ -419,12 +430,20 @@ class OptionsFlowHandler(config_entries.OptionsFlow, ConfigBase):
             CONF_LIGHT_CONTROL: selector({"boolean": {}}),
             CONF_FAN_CONTROL: selector({"boolean": {}}),
             CONF_MQTT_ROOM_PRESENCE: selector({"boolean": {}}),
+            CONF_ACTUATION_RATE: self._build_selector_number(
+                unit_of_measurement="commands/s"
+            ),
+            CONF_ACTUATION_RATE_LIMITS: selector({"object": {}}),
         }
 
         for item in ALL_LIGHT_ENTITIES:
             all_selectors.update(item.config_flow_schema())
 
-        options = OPTIONS_AREA_META if self.area.is_meta() else OPTIONS_AREA
+        options = OPTIONS_AREA
+        if self.area.id == META_AREA_GLOBAL.lower():
+            options = OPTIONS_AREA_GLOBAL
+        elif self.area.is_meta():
+            options = OPTIONS_AREA_META
         selectors = {}
 
         # Apply options for given area type (regular/meta)
@@ -544,6 +563,12 @@ class OptionsFlowHandler(config_entries.OptionsFlow, ConfigBase):
             CONF_PRESENCE_SENSOR_DEVICE_CLASS: self._build_selector_select(
                 sorted(ALL_BINARY_SENSOR_DEVICE_CLASSES), multiple=True
             ),
+            CONF_PRESENCE_QUORUM: self._build_selector_number(
+                min=1, max=100, unit_of_measurement="sensors"
+            ),
+            CONF_PRESENCE_SENSOR_WEIGHTS: selector({"object": {}}),
+            CONF_BRIGHTNESS_CURVE: self._build_selector_select(ALL_BRIGHTNESS_CURVES),
+            CONF_BRIGHTNESS_CURVE_POINTS: selector({"object": {}}),
         }
         for lg in ALL_LIGHT_ENTITIES:
             options.extend(lg.advanced_config_flow_options())
@@ -38,6 +38,7 @@ MODULE_DATA = f"{DOMAIN}_data"
 EVENT_MAGICAREAS_STARTED = "magicareas_start"
 EVENT_MAGICAREAS_READY = "magicareas_ready"
 EVENT_MAGICAREAS_AREA_READY = "magicareas_area_ready"
+EVENT_MAGICAREAS_DEGRADED = "magicareas_degraded"
 
 ALL_BINARY_SENSOR_DEVICE_CLASSES = [cls.value for cls in BinarySensorDeviceClass]
 
@@ -45,6 +46,42 @@ ALL_BINARY_SENSOR_DEVICE_CLASSES = [cls.value for cls in BinarySensorDeviceClass
 DATA_AREA_OBJECT = "area_object"
 DATA_UNDO_UPDATE_LISTENER = "undo_update_listener"
 DATA_ENTITY_LISTENER = "entity_listener"
+DATA_CLOCK = f"{DOMAIN}_clock"
+DATA_ROOM_PRESENCE = f"{DOMAIN}_room_presence"
+DATA_STORM = f"{DOMAIN}_storm"
+DATA_LANES = f"{DOMAIN}_lanes"
+DATA_ACTUATION = f"{DOMAIN}_actuation"
+
+# Availability storms, this many changes inside the window (in seconds) over
+# all the areas starts a storm, it ends once quiet for the settle time.
+STORM_TRANSITIONS = 20
+STORM_WINDOW = 2.0
+STORM_SETTLE_TIME = 3.0
+
+# Event budgets, how many events an area and the whole integration can take
+# in the window (in seconds) before the areas drop into degraded mode. While
+# degraded an area is only evaluated once per sample interval.
+DATA_EVENT_BUDGET = f"{DOMAIN}_event_budget"
+AREA_EVENT_BUDGET = 300
+GLOBAL_EVENT_BUDGET = 3000
+EVENT_BUDGET_WINDOW = 60.0
+DEGRADED_SAMPLE_INTERVAL = 5.0
+
+# How long a service call sent to the lights, fans and the rest can take, in
+# seconds, before it is given up on.
+ACTUATION_TIMEOUT = 10.0
+# How many of the latest calls an entity remembers the context of, to tell its
+# own changes from the manual ones.
+ACTUATION_CONTEXTS = 32
+# How close a light has to be to the target brightness (out of 255) for the
+# command to it to be skipped.
+BRIGHTNESS_TOLERANCE = 3
+# Smoothing of the area illuminance the brightness is worked out from, the
+# weight of a new sample, the band in lux the average has to leave before the
+# value moves and the change in lux that is taken straight away.
+ILLUMINANCE_SMOOTHING = 0.3
+ILLUMINANCE_HYSTERESIS = 5.0
+ILLUMINANCE_STEP = 50.0
 
 # Attributes
 ATTR_STATE = "state"
@@ -58,7 +95,6 @@ ATTR_ACTIVE_SENSORS = "active_sensors"
 ATTR_LAST_ACTIVE_SENSORS = "last_active_sensors"
 ATTR_FEATURES = "features"
 ATTR_PRESENCE_SENSORS = "presence_sensors"
-ATTR_LAST_UPDATE_FROM_ENTITY: str = "last_update_from_entity"
 
 # Icons
 ICON_SYSTEM_CONTROL = "mdi:head-cog"
@@ -98,6 +134,16 @@ AVAILABLE_ON_STATES = [STATE_ON, STATE_HOME, STATE_PLAYING, STATE_OPEN]
 
 INVALID_STATES = [STATE_UNAVAILABLE, STATE_UNKNOWN]
 
+# Area states where someone is in the area, used by the meta areas.
+PRESENCE_STATES = frozenset(
+    {
+        AreaState.AREA_STATE_OCCUPIED,
+        AreaState.AREA_STATE_BRIGHT,
+        AreaState.AREA_STATE_SLEEP,
+        AreaState.AREA_STATE_ACCENTED,
+    }
+)
+
 # Configuration parameters
 CONF_ID = "id"
 CONF_NAME, DEFAULT_NAME = "name", ""  # cv.string
@@ -150,6 +196,51 @@ CONF_ON_STATES, DEFAULT_ON_STATES = (
         STATE_OPEN,
     ],
 )  # cv.ensure_list
+# Presence fusion, how many sensors and how much weight is needed for presence.
+CONF_PRESENCE_QUORUM, DEFAULT_PRESENCE_QUORUM = (
+    "presence_quorum",
+    1,
+)  # vol.All(vol.Coerce(int), vol.Range(min=1))
+CONF_PRESENCE_THRESHOLD, DEFAULT_PRESENCE_THRESHOLD = (
+    "presence_threshold",
+    0.0,
+)  # float
+# Weight for each sensor class, the device class for binary sensors otherwise
+# the platform, anything not listed has a weight of 1.
+CONF_PRESENCE_SENSOR_WEIGHTS, DEFAULT_PRESENCE_SENSOR_WEIGHTS = (
+    "presence_sensor_weights",
+    {},
+)  # dict
+# Filtering of the presence sensors, to stop flapping sensors.
+CONF_PRESENCE_DEBOUNCE, DEFAULT_PRESENCE_DEBOUNCE = (
+    "presence_debounce_s",
+    0.0,
+)  # float
+CONF_PRESENCE_MIN_ON, DEFAULT_PRESENCE_MIN_ON = ("presence_min_on_s", 0.0)  # float
+CONF_PRESENCE_MIN_OFF, DEFAULT_PRESENCE_MIN_OFF = ("presence_min_off_s", 0.0)  # float
+# How the lights dim as the illuminance goes up, the piecewise curve steps
+# between the points from the user.
+BRIGHTNESS_CURVE_LINEAR = "linear"
+BRIGHTNESS_CURVE_GAMMA = "gamma"
+BRIGHTNESS_CURVE_PIECEWISE = "piecewise"
+ALL_BRIGHTNESS_CURVES = [
+    BRIGHTNESS_CURVE_LINEAR,
+    BRIGHTNESS_CURVE_GAMMA,
+    BRIGHTNESS_CURVE_PIECEWISE,
+]
+CONF_BRIGHTNESS_CURVE, DEFAULT_BRIGHTNESS_CURVE = (
+    "brightness_curve",
+    BRIGHTNESS_CURVE_LINEAR,
+)  # vol.In(ALL_BRIGHTNESS_CURVES)
+CONF_BRIGHTNESS_GAMMA, DEFAULT_BRIGHTNESS_GAMMA = (
+    "brightness_gamma",
+    2.0,
+)  # vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False))
+# Illuminance to the percent of the state brightness, for the piecewise curve.
+CONF_BRIGHTNESS_CURVE_POINTS, DEFAULT_BRIGHTNESS_CURVE_POINTS = (
+    "brightness_curve_points",
+    {},
+)  # dict
 CONF_AGGREGATES_MIN_ENTITIES, DEFAULT_AGGREGATES_MIN_ENTITIES = (
     "aggregates_min_entities",
     2,
@@ -197,6 +288,14 @@ CONF_HUMIDITY_ZERO_WAIT_TIME, DEFAULT_HUMIDITY_ZERO_WAIT_TIME = (
 )
 # Mqtt room control
 CONF_MQTT_ROOM_PRESENCE, DEFAULT_MQTT_ROOM_PRESENCE = ("mqqt_room", False)
+# Commands per second each radio (the integration of the entities, like zha)
+# can take, set on the global area. The limits override it for some radios,
+# 0 is no limit, which is the default.
+CONF_ACTUATION_RATE, DEFAULT_ACTUATION_RATE = ("actuation_rate", 0.0)  # float
+CONF_ACTUATION_RATE_LIMITS, DEFAULT_ACTUATION_RATE_LIMITS = (
+    "actuation_rate_limits",
+    {},
+)  # dict
 
 # Setups to control all the lights, items to create
 clear_lights = LightEntityConf(
@@ -374,6 +473,10 @@ HUMIDITY_GROUP_FEATURE_SCHEMA = vol.Schema(
     }
 )
 
+# The illuminance keys are strings to store, checked as numbers.
+BRIGHTNESS_CURVE_POINTS_SCHEMA = {
+    vol.All(vol.Coerce(float), vol.Coerce(str)): vol.Coerce(float),
+}
 
 ADVANCED_LIGHT_GROUP_FEATURE_SCHEMA: vol.Schema = vol.Schema(
     {
@@ -397,6 +500,33 @@ ADVANCED_LIGHT_GROUP_FEATURE_SCHEMA: vol.Schema = vol.Schema(
             default=DEFAULT_PRESENCE_DEVICE_SENSOR_CLASS,
         ): cv.ensure_list,
         vol.Optional(CONF_ON_STATES, default=DEFAULT_ON_STATES): cv.ensure_list,
+        vol.Optional(CONF_PRESENCE_QUORUM, default=DEFAULT_PRESENCE_QUORUM): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(
+            CONF_PRESENCE_THRESHOLD, default=DEFAULT_PRESENCE_THRESHOLD
+        ): vol.Coerce(float),
+        vol.Optional(
+            CONF_PRESENCE_SENSOR_WEIGHTS, default=DEFAULT_PRESENCE_SENSOR_WEIGHTS
+        ): {cv.string: vol.Coerce(float)},
+        vol.Optional(
+            CONF_PRESENCE_DEBOUNCE, default=DEFAULT_PRESENCE_DEBOUNCE
+        ): vol.Coerce(float),
+        vol.Optional(CONF_PRESENCE_MIN_ON, default=DEFAULT_PRESENCE_MIN_ON): vol.Coerce(
+            float
+        ),
+        vol.Optional(
+            CONF_PRESENCE_MIN_OFF, default=DEFAULT_PRESENCE_MIN_OFF
+        ): vol.Coerce(float),
+        vol.Optional(CONF_BRIGHTNESS_CURVE, default=DEFAULT_BRIGHTNESS_CURVE): vol.In(
+            ALL_BRIGHTNESS_CURVES
+        ),
+        vol.Optional(CONF_BRIGHTNESS_GAMMA, default=DEFAULT_BRIGHTNESS_GAMMA): vol.All(
+            vol.Coerce(float), vol.Range(min=0, min_included=False)
+        ),
+        vol.Optional(
+            CONF_BRIGHTNESS_CURVE_POINTS, default=DEFAULT_BRIGHTNESS_CURVE_POINTS
+        ): BRIGHTNESS_CURVE_POINTS_SCHEMA,
     }
 )
 
@@ -472,7 +602,19 @@ META_AREA_SCHEMA = vol.Schema(
     }
 )
 
-AREA_SCHEMA = vol.Any(REGULAR_AREA_SCHEMA, META_AREA_SCHEMA)
+# The global area also owns the shared actuation dispatcher.
+GLOBAL_AREA_SCHEMA = META_AREA_SCHEMA.extend(
+    {
+        vol.Optional(CONF_ACTUATION_RATE, default=DEFAULT_ACTUATION_RATE): vol.Coerce(
+            float
+        ),
+        vol.Optional(
+            CONF_ACTUATION_RATE_LIMITS, default=DEFAULT_ACTUATION_RATE_LIMITS
+        ): {cv.string: vol.Coerce(float)},
+    }
+)
+
+AREA_SCHEMA = vol.Any(REGULAR_AREA_SCHEMA, META_AREA_SCHEMA, GLOBAL_AREA_SCHEMA)
 
 _DOMAIN_SCHEMA = vol.Schema({cv.slug: AREA_SCHEMA})
 
@@ -508,6 +650,31 @@ OPTIONS_AREA_ADVANCED = [
         DEFAULT_ON_STATES,
         cv.ensure_list,
     ),
+    (
+        CONF_PRESENCE_QUORUM,
+        DEFAULT_PRESENCE_QUORUM,
+        vol.All(vol.Coerce(int), vol.Range(min=1)),
+    ),
+    (CONF_PRESENCE_THRESHOLD, DEFAULT_PRESENCE_THRESHOLD, float),
+    (
+        CONF_PRESENCE_SENSOR_WEIGHTS,
+        DEFAULT_PRESENCE_SENSOR_WEIGHTS,
+        {cv.string: vol.Coerce(float)},
+    ),
+    (CONF_PRESENCE_DEBOUNCE, DEFAULT_PRESENCE_DEBOUNCE, float),
+    (CONF_PRESENCE_MIN_ON, DEFAULT_PRESENCE_MIN_ON, float),
+    (CONF_PRESENCE_MIN_OFF, DEFAULT_PRESENCE_MIN_OFF, float),
+    (CONF_BRIGHTNESS_CURVE, DEFAULT_BRIGHTNESS_CURVE, vol.In(ALL_BRIGHTNESS_CURVES)),
+    (
+        CONF_BRIGHTNESS_GAMMA,
+        DEFAULT_BRIGHTNESS_GAMMA,
+        vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+    ),
+    (
+        CONF_BRIGHTNESS_CURVE_POINTS,
+        DEFAULT_BRIGHTNESS_CURVE_POINTS,
+        BRIGHTNESS_CURVE_POINTS_SCHEMA,
+    ),
 ]
 
 OPTIONS_AREA_META = [
@@ -515,6 +682,16 @@ OPTIONS_AREA_META = [
     (CONF_ICON, DEFAULT_ICON, str),
 ]
 
+OPTIONS_AREA_GLOBAL = [
+    *OPTIONS_AREA_META,
+    (CONF_ACTUATION_RATE, DEFAULT_ACTUATION_RATE, float),
+    (
+        CONF_ACTUATION_RATE_LIMITS,
+        DEFAULT_ACTUATION_RATE_LIMITS,
+        {cv.string: vol.Coerce(float)},
+    ),
+]
+
 
 OPTIONS_GROUP_CREATION = [
     (CONF_AGGREGATES_MIN_ENTITIES, DEFAULT_AGGREGATES_MIN_ENTITIES, int),
@@ -0,0 +1,30 @@
+"""Diagnostics for simply magic areas.
+
+The actuation dispatcher is shared by all the areas, its latency, failures
+and radio queues show up in the diagnostics of every area.
+"""
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .base.actuation import get_actuation
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the diagnostics for the area config entry."""
+    actuation = get_actuation(hass)
+    stats = actuation.stats
+    return {
+        "actuation": {
+            **asdict(stats),
+            "average_latency": stats.average_latency,
+            "average_wait": stats.average_wait,
+            "average_batch": stats.average_batch,
+            "queue_depth": actuation.queue_depths(),
+        },
+    }
@@ -1,6 +1,6 @@
 """Fan controls for magic areas."""
 
-from datetime import UTC, datetime
+from datetime import datetime
 import logging
 from typing import Any
 
@@ -15,46 +15,43 @@ from homeassistant.const import (
     SERVICE_TURN_ON,
     STATE_OFF,
     STATE_ON,
-    STATE_UNAVAILABLE,
-    STATE_UNKNOWN,
 )
 from homeassistant.core import (
     CALLBACK_TYPE,
     Event,
     EventStateChangedData,
     HomeAssistant,
+    callback,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity_registry import async_get as async_get_er
-from homeassistant.helpers.event import async_track_state_change_event, call_later
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+)
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoredExtraData
 from homeassistant.util import slugify
 
+from .base.actuation import ContextTracker, get_actuation
+from .base.clock import get_clock
 from .base.entities import MagicEntity
+from .base.humidity import HumidityResult
 from .base.magic import ControlType, MagicArea
 from .config.area_state import AreaState
 from .config.entity_names import EntityNames
 from .const import (
-    ATTR_LAST_UPDATE_FROM_ENTITY,
-    CONF_FEATURE_HUMIDITY,
-    CONF_HUMIDITY_TREND_DOWN_CUT_OFF,
-    CONF_HUMIDITY_TREND_UP_CUT_OFF,
-    CONF_HUMIDITY_ZERO_WAIT_TIME,
     CONF_MANUAL_TIMEOUT,
     DATA_AREA_OBJECT,
-    DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF,
-    DEFAULT_HUMIDITY_TREND_UP_CUT_OFF,
-    DEFAULT_HUMIDITY_ZERO_WAIT_TIME,
     DEFAULT_MANUAL_TIMEOUT,
     DOMAIN,
     MODULE_DATA,
 )
 
 _LOGGER = logging.getLogger(__name__)
-ATTR_HUMIDITY_UP: str = "humidity_up"
 ATTR_FANS: str = "fans"
 ATTR_MANUAL_CONTROL: str = "manual_control"
-ATTR_HUMIDITY_ON: str = "humidity_on"
-ATTR_HUMIDITY_ZERO_TS: str = "humidity_zero_ts"
+# Key in the extra restore data, a wall clock timestamp.
+RESTORE_MANUAL_UNTIL: str = "manual_until"
 
 
 async def async_setup_entry(
@@ -133,13 +130,15 @@ class AreaFanGroup(MagicEntity, FanGroup):
         delattr(self, "_attr_name")
         self._icon: str = "mdi:fan-auto"
         self._manual_timeout_cb: CALLBACK_TYPE | None = None
+        self._manual_until: float | None = None
+        self._clock = get_clock(area.hass)
+        self._actuation = get_actuation(area.hass)
+        self._contexts = ContextTracker()
 
         self._controled_by_entity = True
 
         # Add static attributes
-        self.last_update_from_entity: bool = False
         self._attr_extra_state_attributes[ATTR_FANS] = self._entity_ids
-        self._attr_extra_state_attributes[ATTR_LAST_UPDATE_FROM_ENTITY] = False
 
     @property
     def icon(self) -> str:
@@ -158,14 +157,7 @@ class AreaFanGroup(MagicEntity, FanGroup):
                 last_state.state,
             )
             self._attr_is_on = last_state.state == STATE_ON
-
-            if ATTR_LAST_UPDATE_FROM_ENTITY in last_state.attributes:
-                self.last_update_from_entity = last_state.attributes[
-                    ATTR_LAST_UPDATE_FROM_ENTITY
-                ]
-                self._attr_extra_state_attributes[ATTR_LAST_UPDATE_FROM_ENTITY] = (
-                    self.last_update_from_entity
-                )
+            await self._restore_manual_timeout()
         else:
             self._attr_is_on = False
 
@@ -176,12 +168,44 @@ class AreaFanGroup(MagicEntity, FanGroup):
 
         await super().async_added_to_hass()
 
+    async def _restore_manual_timeout(self) -> None:
+        """Resume the manual control timeout from before the restart."""
+        extra_data = await self.async_get_last_extra_data()
+        if extra_data is None:
+            return
+        manual_until = extra_data.as_dict().get(RESTORE_MANUAL_UNTIL)
+        if manual_until is None:
+            return
+        remaining = self._clock.from_timestamp(float(manual_until)) - (
+            self._clock.monotonic()
+        )
+        if remaining <= 0:
+            self._reset_manual_timeout(self._clock.now())
+            return
+        self._start_manual_timeout(remaining)
+
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData:
+        """Save when the manual control runs out, to resume it on restart."""
+        manual_until = self._manual_until
+        return RestoredExtraData(
+            {
+                RESTORE_MANUAL_UNTIL: (
+                    None
+                    if manual_until is None
+                    else self._clock.to_wall(manual_until).timestamp()
+                )
+            }
+        )
+
     async def _setup_listeners(self, _: Any = None) -> None:
+        self.async_on_remove(self._cancel_manual_timeout)
+        # The members carry the context of the change, to spot the manual ones.
         self.async_on_remove(
             async_track_state_change_event(
                 self.hass,
-                [self.entity_id],
-                self._update_group_state,
+                self._entity_ids,
+                self._member_state_change,
             )
         )
         self.async_on_remove(
@@ -196,17 +220,8 @@ class AreaFanGroup(MagicEntity, FanGroup):
                 self._area_state_change,
             )
         )
-        # If the trend entities exist, listen to them
-        trend_statistics = self.area.simply_magic_entity_id(
-            SENSOR_DOMAIN,
-            EntityNames.HUMIDITY_STATISTICS,
-        )
-        if self.hass.states.get(trend_statistics) is not None:
-            self.async_on_remove(
-                async_track_state_change_event(
-                    self.hass, [trend_statistics], self._trend_state_change
-                )
-            )
+        # Follow the humidity decision for the area.
+        self.async_on_remove(self.area.async_track_humidity(self._humidity_change))
 
     ### State Change Handling
     def _area_state_change(self, event: Event[EventStateChangedData]) -> None:
@@ -221,7 +236,7 @@ class AreaFanGroup(MagicEntity, FanGroup):
             self.name,
             to_state,
             from_state,
-            self._attr_extra_state_attributes.get(ATTR_HUMIDITY_UP, False),
+            self.area.humidity.result.active,
             self.is_on,
         )
 
@@ -232,97 +247,23 @@ class AreaFanGroup(MagicEntity, FanGroup):
         # For fans we only worry about the extended state.
         if to_state == AreaState.AREA_STATE_EXTENDED:
             self._turn_on_fan()
-        elif self.is_on and not self._attr_extra_state_attributes.get(
-            ATTR_HUMIDITY_UP, False
-        ):
+        elif self.is_on and not self.area.humidity.result.active:
             self._turn_off_fan()
         else:
             _LOGGER.debug("Ignoring state change")
 
-    def _trend_state_change(self, event: Event[EventStateChangedData]):
-        if event.data["old_state"] is None or event.data["new_state"] is None:
-            return
-        to_state = event.data["new_state"].state
-        from_state = event.data["old_state"].state
-        _LOGGER.warning(
-            "%s: Trend down New state: %s / Last state %s",
-            self.name,
-            to_state,
-            from_state,
-        )
-        if to_state != STATE_UNAVAILABLE:
-            self._humidity_fan_control()
-
-    def _humidity_fan_control(self) -> None:
-        fans_on: bool = False
-        # Track the up/down trend.
-        humidity_trend = self.hass.states.get(
-            self.area.simply_magic_entity_id(
-                SENSOR_DOMAIN,
-                EntityNames.HUMIDITY_STATISTICS,
-            )
-        )
-        if (
-            humidity_trend is not None
-            and humidity_trend.state != STATE_UNAVAILABLE
-            and humidity_trend.state != STATE_UNKNOWN
-        ):
-            humidity_feature_config = self.area.feature_config(CONF_FEATURE_HUMIDITY)
-            # Handle the 0.0 state and how long it has been zero for.
-            if float(humidity_trend.state) != 0.0:
-                self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS] = None
-            elif (
-                self._attr_extra_state_attributes.get(ATTR_HUMIDITY_ZERO_TS, None)
-                is None
-            ):
-                self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS] = datetime.now(
-                    UTC
-                ).timestamp()
-            if (
-                self._attr_extra_state_attributes.get(ATTR_HUMIDITY_ZERO_TS, None)
-                is not None
-            ):
-                zero_time: int = int(
-                    (
-                        datetime.now(UTC)
-                        - datetime.fromtimestamp(
-                            int(
-                                self._attr_extra_state_attributes[ATTR_HUMIDITY_ZERO_TS]
-                            ),
-                            UTC,
-                        )
-                    ).total_seconds()
-                )
-                if zero_time > humidity_feature_config.get(
-                    CONF_HUMIDITY_ZERO_WAIT_TIME, DEFAULT_HUMIDITY_ZERO_WAIT_TIME
-                ):
-                    self._attr_extra_state_attributes[ATTR_HUMIDITY_ON] = False
-            # Work out if it is trending up.
-            trending_up = float(humidity_trend.state) >= humidity_feature_config.get(
-                CONF_HUMIDITY_TREND_UP_CUT_OFF, DEFAULT_HUMIDITY_TREND_UP_CUT_OFF
-            ) or self._attr_extra_state_attributes.get(ATTR_HUMIDITY_ON, False)
-            if trending_up:
-                self._attr_extra_state_attributes[ATTR_HUMIDITY_ON] = True
-                if float(humidity_trend.state) > humidity_feature_config.get(
-                    CONF_HUMIDITY_TREND_DOWN_CUT_OFF,
-                    DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF,
-                ):
-                    fans_on = True
-            # Make the last off time stay until this is not on any more.
-            if float(humidity_trend.state) < humidity_feature_config.get(
-                CONF_HUMIDITY_TREND_DOWN_CUT_OFF,
-                DEFAULT_HUMIDITY_TREND_DOWN_CUT_OFF,
-            ):
-                fans_on = False
-        _LOGGER.warning("Fans on %s", fans_on)
-        if fans_on:
+    @callback
+    def _humidity_change(self, result: HumidityResult) -> None:
+        _LOGGER.debug("%s: Humidity fans on %s", self.name, result.active)
+        if result.active:
             self._turn_on_fan()
         else:
             self._turn_off_fan()
 
-    def _update_group_state(self, event: Event[EventStateChangedData]) -> None:
+    @callback
+    def _member_state_change(self, event: Event[EventStateChangedData]) -> None:
         if self.area.state == AreaState.AREA_STATE_CLEAR:
-            self._reset_control(datetime.now(UTC))
+            self._reset_control(self._clock.now())
         else:
             # Skip non ON/OFF state changes
             if not event.data["old_state"] or event.data["old_state"].state not in [
@@ -343,26 +284,39 @@ class AreaFanGroup(MagicEntity, FanGroup):
                 and event.data["old_state"].attributes["restored"]
             ):
                 # On state restored, also setup the timeout callback.
-                if not self._is_controlled_by_this_entity():
-                    if self._manual_timeout_cb is not None:
-                        self._manual_timeout_cb()
-                    self._manual_timeout_cb = call_later(
-                        self.hass, manual_timeout, self._reset_manual_timeout
-                    )
+                # Unless the timeout from before the restart is still running.
+                if (
+                    not self._is_controlled_by_this_entity()
+                    and self._manual_timeout_cb is None
+                ):
+                    self._start_manual_timeout(manual_timeout)
                 return
-            if self.last_update_from_entity:
-                self.last_update_from_entity = False
+            if self._contexts.is_ours(event.data["new_state"].context):
                 return
             self._set_controlled_by_this_entity(False)
-            if self._manual_timeout_cb is not None:
-                self._manual_timeout_cb()
-            self._manual_timeout_cb = call_later(
-                self.hass, manual_timeout, self._reset_manual_timeout
-            )
+            self._start_manual_timeout(manual_timeout)
+
+    @callback
+    def _start_manual_timeout(self, delay: float) -> None:
+        if self._manual_timeout_cb is not None:
+            self._manual_timeout_cb()
+        self._manual_until = self._clock.monotonic() + delay
+        self._manual_timeout_cb = async_call_later(
+            self.hass, delay, self._reset_manual_timeout
+        )
 
+    @callback
     def _reset_manual_timeout(self, dt: datetime) -> None:
         self._set_controlled_by_this_entity(True)
         self._manual_timeout_cb = None
+        self._manual_until = None
+
+    @callback
+    def _cancel_manual_timeout(self) -> None:
+        # The timeout is left in place, it is saved to resume on restart.
+        if self._manual_timeout_cb is not None:
+            self._manual_timeout_cb()
+            self._manual_timeout_cb = None
 
     ####  Fan Handling
     def _turn_on_fan(self) -> None:
@@ -375,11 +329,13 @@ class AreaFanGroup(MagicEntity, FanGroup):
             return
 
         _LOGGER.debug("%s: Turning on fans", self.name)
-        self.last_update_from_entity = True
+        # Straight to the members, the group follows them for its own state.
         service_data = {
-            ATTR_ENTITY_ID: self.entity_id,
+            ATTR_ENTITY_ID: self._entity_ids,
         }
-        self.hass.services.call(FAN_DOMAIN, SERVICE_TURN_ON, service_data)
+        self._actuation.dispatch(
+            FAN_DOMAIN, SERVICE_TURN_ON, service_data, self._contexts
+        )
 
     def _turn_off_fan(self) -> None:
         """Turn off the fan group."""
@@ -390,9 +346,10 @@ class AreaFanGroup(MagicEntity, FanGroup):
         if not self.area.is_control_enabled(ControlType.System):
             return
         _LOGGER.debug("%s: Turning fan off", self.name)
-        self.last_update_from_entity = True
-        service_data = {ATTR_ENTITY_ID: self.entity_id}
-        self.hass.services.call(FAN_DOMAIN, SERVICE_TURN_OFF, service_data)
+        service_data = {ATTR_ENTITY_ID: self._entity_ids}
+        self._actuation.dispatch(
+            FAN_DOMAIN, SERVICE_TURN_OFF, service_data, self._contexts
+        )
 
     #### Control Release
     def _is_controlled_by_this_entity(self) -> bool:
@@ -401,7 +358,8 @@ class AreaFanGroup(MagicEntity, FanGroup):
     def _set_controlled_by_this_entity(self, enabled: bool) -> None:
         self._attr_extra_state_attributes.get(ATTR_MANUAL_CONTROL, enabled)
 
+    @callback
     def _reset_control(self, time: datetime) -> None:
         self._set_controlled_by_this_entity(True)
-        self.schedule_update_ha_state()
+        self.async_write_ha_state()
         _LOGGER.debug("%s: Control Reset", self.name)
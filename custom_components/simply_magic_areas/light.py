@@ -1,54 +1,222 @@
 """Light controls for magic areas."""
 
+from collections import Counter
 from datetime import datetime
 import logging
+from typing import Any, NamedTuple
 
-from homeassistant.components.group.light import LightGroup
+from homeassistant.components.group.light import SUPPORT_GROUP_LIGHT, LightGroup
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
+    ATTR_COLOR_MODE,
+    ATTR_COLOR_TEMP_KELVIN,
+    ATTR_EFFECT,
+    ATTR_EFFECT_LIST,
+    ATTR_HS_COLOR,
+    ATTR_MAX_COLOR_TEMP_KELVIN,
+    ATTR_MIN_COLOR_TEMP_KELVIN,
+    ATTR_RGB_COLOR,
+    ATTR_RGBW_COLOR,
+    ATTR_RGBWW_COLOR,
+    ATTR_SUPPORTED_COLOR_MODES,
+    ATTR_XY_COLOR,
     DOMAIN as LIGHT_DOMAIN,
+    ColorMode,
     LightEntityDescription,
+    LightEntityFeature,
+    filter_supported_color_modes,
 )
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     ATTR_ENTITY_ID,
+    ATTR_SUPPORTED_FEATURES,
     SERVICE_TURN_OFF,
     SERVICE_TURN_ON,
     STATE_OFF,
     STATE_ON,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
 )
 from homeassistant.core import (
     CALLBACK_TYPE,
     Event,
     EventStateChangedData,
     HomeAssistant,
+    State,
+    callback,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity_registry import async_get as async_get_er
-from homeassistant.helpers.event import async_track_state_change_event, call_later
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+)
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoredExtraData
+from homeassistant.helpers.start import async_at_start
 
+from .base.actuation import ContextTracker, get_actuation
+from .base.clock import get_clock
 from .base.entities import MagicEntity
-from .base.magic import ControlType, MagicArea, StateConfigData
+from .base.illuminance import IlluminanceConfig, IlluminanceEstimate
+from .base.magic import ControlType, LightPlan, MagicArea
+from .base.snapshot import StateSnapshot
 from .config.area_state import AreaState
 from .config.entity_names import EntityNames
 from .const import (
-    ATTR_LAST_UPDATE_FROM_ENTITY,
+    BRIGHTNESS_TOLERANCE,
     CONF_MANUAL_TIMEOUT,
-    CONF_MAX_BRIGHTNESS_LEVEL,
-    CONF_MIN_BRIGHTNESS_LEVEL,
     DATA_AREA_OBJECT,
     DEFAULT_MANUAL_TIMEOUT,
-    DEFAULT_MAX_BRIGHTNESS_LEVEL,
-    DEFAULT_MIN_BRIGHTNESS_LEVEL,
     DOMAIN,
+    ILLUMINANCE_HYSTERESIS,
+    ILLUMINANCE_SMOOTHING,
+    ILLUMINANCE_STEP,
     MODULE_DATA,
 )
 
 _LOGGER = logging.getLogger(__name__)
 ATTR_LAST_ON_ILLUMINANCE: str = "last_on_illuminance"
 ATTR_MANUAL_CONTROL: str = "manual_control"
+ATTR_SUPPRESSED_COMMANDS: str = "suppressed_commands"
+# Key in the extra restore data, a wall clock timestamp.
+RESTORE_MANUAL_UNTIL: str = "manual_until"
+
+
+# Averaged over the members that are on, like the light group does.
+_MEAN_ATTRIBUTES = (
+    ATTR_BRIGHTNESS,
+    ATTR_COLOR_TEMP_KELVIN,
+    ATTR_HS_COLOR,
+    ATTR_RGB_COLOR,
+    ATTR_RGBW_COLOR,
+    ATTR_RGBWW_COLOR,
+    ATTR_XY_COLOR,
+)
+# Counted over the members that are on.
+_ON_COUNTED_ATTRIBUTES = (ATTR_COLOR_MODE, ATTR_EFFECT)
+# Counted over all the members, the lists by each of their values.
+_COUNTED_ATTRIBUTES = (
+    ATTR_MIN_COLOR_TEMP_KELVIN,
+    ATTR_MAX_COLOR_TEMP_KELVIN,
+    ATTR_SUPPORTED_FEATURES,
+)
+_LIST_ATTRIBUTES = (ATTR_EFFECT_LIST, ATTR_SUPPORTED_COLOR_MODES)
+
+
+class _Member(NamedTuple):
+    """What a member light adds to the state of the group."""
+
+    on: bool
+    valid: bool
+    available: bool
+    # The attributes that only count while the light is on are left out
+    # while it is off, the brightness among them.
+    means: dict[str, Any]
+    counted: dict[str, Any]
+
+
+def _member(state: State | None) -> _Member | None:
+    if state is None:
+        return None
+    on = state.state == STATE_ON
+    attributes = state.attributes
+    counted = {
+        key: value
+        for key in (*_COUNTED_ATTRIBUTES, *(_ON_COUNTED_ATTRIBUTES if on else ()))
+        if (value := attributes.get(key)) is not None
+    }
+    counted.update(
+        (key, frozenset(value))
+        for key in _LIST_ATTRIBUTES
+        if (value := attributes.get(key)) is not None
+    )
+    return _Member(
+        on=on,
+        valid=state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE),
+        available=state.state != STATE_UNAVAILABLE,
+        means={
+            key: tuple(value) if isinstance(value, list) else value
+            for key in (_MEAN_ATTRIBUTES if on else ())
+            if (value := attributes.get(key)) is not None
+        },
+        counted=counted,
+    )
+
+
+class _GroupTotals:
+    """Running totals of what the members add to the group state.
+
+    A member is taken away and added again as it changes, so the group
+    state comes from the totals and never from a look at all the members.
+    """
+
+    __slots__ = ("_counts", "_means", "_sums", "available", "on", "valid")
+
+    def __init__(self) -> None:
+        self.on = 0
+        self.valid = 0
+        self.available = 0
+        # The value of each member with the attribute, and the sum of them.
+        self._means: dict[str, dict[str, Any]] = {key: {} for key in _MEAN_ATTRIBUTES}
+        self._sums: dict[str, Any] = {}
+        self._counts: dict[str, Counter[Any]] = {
+            key: Counter()
+            for key in (
+                *_COUNTED_ATTRIBUTES,
+                *_ON_COUNTED_ATTRIBUTES,
+                *_LIST_ATTRIBUTES,
+            )
+        }
+
+    def add(self, entity_id: str, member: _Member | None, step: int = 1) -> None:
+        """Add (step 1) or take away (step -1) a member."""
+        if member is None:
+            return
+        self.on += step * member.on
+        self.valid += step * member.valid
+        self.available += step * member.available
+        for key, value in member.means.items():
+            values = self._means[key]
+            if step > 0:
+                values[entity_id] = value
+                total = self._sums.get(key)
+                self._sums[key] = value if total is None else _sum(total, value, 1)
+            elif values.pop(entity_id, None) is not None:
+                if values:
+                    self._sums[key] = _sum(self._sums[key], value, -1)
+                else:
+                    # Start again from nothing, no rounding is carried over.
+                    del self._sums[key]
+        for key, value in member.counted.items():
+            counts = self._counts[key]
+            for item in value if key in _LIST_ATTRIBUTES else (value,):
+                counts[item] += step
+                if not counts[item]:
+                    del counts[item]
+
+    def mean(self, key: str) -> Any:
+        """The mean of the members with the attribute, the light group way."""
+        values = self._means[key]
+        if not values:
+            return None
+        if len(values) == 1:
+            return next(iter(values.values()))
+        total = self._sums[key]
+        if isinstance(total, tuple):
+            return tuple(value / len(values) for value in total)
+        return int(total / len(values))
+
+    def counts(self, key: str) -> Counter[Any]:
+        """How many of the members have each value of the attribute."""
+        return self._counts[key]
+
+
+def _sum(total: Any, value: Any, step: int) -> Any:
+    if isinstance(total, tuple):
+        return tuple(t + step * v for t, v in zip(total, value, strict=False))
+    return total + step * value
 
 
 async def async_setup_entry(
@@ -131,12 +299,32 @@ class AreaLightGroup(MagicEntity, LightGroup):
 
         delattr(self, "_attr_name")
         self._manual_timeout_cb: CALLBACK_TYPE | None = None
+        self._manual_until: float | None = None
+        self._clock = get_clock(area.hass)
+        self._actuation = get_actuation(area.hass)
+        self._contexts = ContextTracker()
+        self._illuminance_entity_id = area.simply_magic_entity_id(
+            SENSOR_DOMAIN, EntityNames.ILLUMINANCE
+        )
+        self._illuminance = IlluminanceEstimate(
+            IlluminanceConfig(
+                smoothing=ILLUMINANCE_SMOOTHING,
+                hysteresis=ILLUMINANCE_HYSTERESIS,
+                step=ILLUMINANCE_STEP,
+            )
+        )
         self._attr_icon: str = "mdi:ceiling-light"
 
+        # The active members, with what each adds to the group state and the
+        # listener for its changes. The totals are kept up to date from them,
+        # so the group state never needs a look at them all.
+        self._members: dict[str, _Member | None] = {}
+        self._member_listeners: dict[str, CALLBACK_TYPE] = {}
+        self._totals = _GroupTotals()
+
         # Add static attributes
-        self.last_update_from_entity: bool = False
         self._attr_extra_state_attributes["lights"] = self._entity_ids
-        self._attr_extra_state_attributes[ATTR_LAST_UPDATE_FROM_ENTITY] = False
+        self._attr_extra_state_attributes[ATTR_SUPPRESSED_COMMANDS] = 0
 
     async def async_added_to_hass(self) -> None:
         """Run when this is added into hass."""
@@ -150,32 +338,51 @@ class AreaLightGroup(MagicEntity, LightGroup):
                 last_state.state,
             )
             self._attr_is_on = last_state.state == STATE_ON
-
-            if ATTR_LAST_UPDATE_FROM_ENTITY in last_state.attributes:
-                self.last_update_from_entity = bool(
-                    last_state.attributes[ATTR_LAST_UPDATE_FROM_ENTITY]
-                )
-                self._attr_extra_state_attributes[ATTR_LAST_UPDATE_FROM_ENTITY] = (
-                    self.last_update_from_entity
-                )
+            await self._restore_manual_timeout()
         else:
             self._attr_is_on = False
 
         self.schedule_update_ha_state()
 
-        # Setup state change listeners
+        # Setup state change listeners, these take the place of the ones of
+        # the light group as only the active members are followed.
         await self._setup_listeners()
 
-        await super().async_added_to_hass()
+    async def _restore_manual_timeout(self) -> None:
+        """Resume the manual control timeout from before the restart."""
+        extra_data = await self.async_get_last_extra_data()
+        if extra_data is None:
+            return
+        manual_until = extra_data.as_dict().get(RESTORE_MANUAL_UNTIL)
+        if manual_until is None:
+            return
+        remaining = self._clock.from_timestamp(float(manual_until)) - (
+            self._clock.monotonic()
+        )
+        if remaining <= 0:
+            self._reset_manual_timeout(self._clock.now())
+            return
+        self._start_manual_timeout(remaining)
+
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData:
+        """Save when the manual control runs out, to resume it on restart."""
+        manual_until = self._manual_until
+        return RestoredExtraData(
+            {
+                RESTORE_MANUAL_UNTIL: (
+                    None
+                    if manual_until is None
+                    else self._clock.to_wall(manual_until).timestamp()
+                )
+            }
+        )
 
     async def _setup_listeners(self) -> None:
-        self.async_on_remove(
-            async_track_state_change_event(
-                self.hass,
-                [self.entity_id],
-                self._update_group_state,
-            )
-        )
+        self._async_set_members(self._entity_ids)
+        self.async_on_remove(self._async_remove_members)
+        self.async_on_remove(self._cancel_manual_timeout)
+        self.async_on_remove(async_at_start(self.hass, self._async_update_at_start))
         self.async_on_remove(
             async_track_state_change_event(
                 self.hass,
@@ -188,8 +395,120 @@ class AreaLightGroup(MagicEntity, LightGroup):
                 self._area_state_change,
             )
         )
+        self.async_on_remove(
+            async_track_state_change_event(
+                self.hass,
+                [self._illuminance_entity_id],
+                self._illuminance_change,
+            )
+        )
+
+    ### Members
+    @callback
+    def _async_set_members(self, entity_ids: list[str]) -> bool:
+        """Make the lights the active members, True if they changed.
+
+        Only the lights that came or went have their listener changed.
+        """
+        listeners = self._member_listeners
+        changed = False
+        for entity_id in [e for e in listeners if e not in entity_ids]:
+            listeners.pop(entity_id)()
+            self._totals.add(entity_id, self._members.pop(entity_id), -1)
+            changed = True
+        for entity_id in entity_ids:
+            if entity_id in listeners:
+                continue
+            listeners[entity_id] = async_track_state_change_event(
+                self.hass, [entity_id], self._member_state_change
+            )
+            member = self._members[entity_id] = _member(self.hass.states.get(entity_id))
+            self._totals.add(entity_id, member)
+            changed = True
+        self._entity_ids = list(entity_ids)
+        return changed
+
+    @callback
+    def _async_remove_members(self) -> None:
+        for remove in self._member_listeners.values():
+            remove()
+        self._member_listeners.clear()
+
+    @callback
+    def _async_update_at_start(self, _: HomeAssistant) -> None:
+        self.async_update_group_state()
+        self.async_write_ha_state()
+
+    @callback
+    def async_update_group_state(self) -> None:
+        """Work out the group state from the totals, the same as the light group."""
+        totals = self._totals
+        # Any mode, as the group is set up with.
+        self._attr_is_on = totals.on > 0 if totals.valid else None
+        self._attr_available = totals.available > 0
+        self._attr_brightness = totals.mean(ATTR_BRIGHTNESS)
+        self._attr_hs_color = totals.mean(ATTR_HS_COLOR)
+        self._attr_rgb_color = totals.mean(ATTR_RGB_COLOR)
+        self._attr_rgbw_color = totals.mean(ATTR_RGBW_COLOR)
+        self._attr_rgbww_color = totals.mean(ATTR_RGBWW_COLOR)
+        self._attr_xy_color = totals.mean(ATTR_XY_COLOR)
+        self._attr_color_temp_kelvin = totals.mean(ATTR_COLOR_TEMP_KELVIN)
+        min_kelvin = totals.counts(ATTR_MIN_COLOR_TEMP_KELVIN)
+        self._attr_min_color_temp_kelvin = min(min_kelvin) if min_kelvin else 2000
+        max_kelvin = totals.counts(ATTR_MAX_COLOR_TEMP_KELVIN)
+        self._attr_max_color_temp_kelvin = max(max_kelvin) if max_kelvin else 6500
+
+        self._attr_effect_list = None
+        if effect_list := sorted(totals.counts(ATTR_EFFECT_LIST)):
+            if "None" in effect_list:
+                effect_list.remove("None")
+                effect_list.insert(0, "None")
+            self._attr_effect_list = effect_list
+        effects = totals.counts(ATTR_EFFECT)
+        self._attr_effect = effects.most_common(1)[0][0] if effects else None
+
+        supported_color_modes = {ColorMode.ONOFF}
+        if all_color_modes := totals.counts(ATTR_SUPPORTED_COLOR_MODES):
+            supported_color_modes = filter_supported_color_modes(all_color_modes)
+        self._attr_supported_color_modes = supported_color_modes
+
+        self._attr_color_mode = ColorMode.UNKNOWN
+        if color_modes := totals.counts(ATTR_COLOR_MODE):
+            # The most common one, with brightness and on/off picked last.
+            color_mode_count = Counter(color_modes)
+            if ColorMode.ONOFF in color_mode_count:
+                if ColorMode.ONOFF in supported_color_modes:
+                    color_mode_count[ColorMode.ONOFF] = -1
+                else:
+                    color_mode_count.pop(ColorMode.ONOFF)
+            if ColorMode.BRIGHTNESS in color_mode_count:
+                if ColorMode.BRIGHTNESS in supported_color_modes:
+                    color_mode_count[ColorMode.BRIGHTNESS] = 0
+                else:
+                    color_mode_count.pop(ColorMode.BRIGHTNESS)
+            if color_mode_count:
+                self._attr_color_mode = color_mode_count.most_common(1)[0][0]
+            else:
+                self._attr_color_mode = next(iter(supported_color_modes))
+
+        supported_features = LightEntityFeature(0)
+        for support in totals.counts(ATTR_SUPPORTED_FEATURES):
+            supported_features |= support
+        self._attr_supported_features = supported_features & SUPPORT_GROUP_LIGHT
 
     ### State Change Handling
+    @callback
+    def _illuminance_change(self, event: Event[EventStateChangedData]) -> None:
+        new_state = event.data["new_state"]
+        if new_state is None:
+            return
+        try:
+            illuminance = float(new_state.state)
+        except ValueError:
+            return
+        self._illuminance.update(illuminance)
+
+    @callback
     def _area_state_change(self, event: Event[EventStateChangedData]) -> None:
         if event.event_type != "state_changed":
             return
@@ -214,12 +533,24 @@ class AreaLightGroup(MagicEntity, LightGroup):
             from_state,
         )
 
-        if to_state is not None and self.area.has_configured_state(to_state):
-            conf = self.area.state_config(to_state)
-            if conf is not None:
-                self._turn_on_light(conf)
+        plan = self.area.light_plan(to_state)
+        if plan is not None:
+            self._turn_on_light(plan, self.area.snapshot())
 
-    def _update_group_state(self, event: Event[EventStateChangedData]) -> None:
+    @callback
+    def _member_state_change(self, event: Event[EventStateChangedData]) -> None:
+        entity_id = event.data["entity_id"]
+        if entity_id not in self._member_listeners:
+            return
+        self._totals.add(entity_id, self._members[entity_id], -1)
+        member = self._members[entity_id] = _member(event.data["new_state"])
+        self._totals.add(entity_id, member)
+        if self.hass.is_running:
+            self.async_set_context(event.context)
+            self.async_update_group_state()
+            self.async_write_ha_state()
+
+        # The members carry the context of the change, to spot the manual ones.
         if self.area.state != AreaState.AREA_STATE_CLEAR:
             self._reset_control()
         else:
@@ -243,136 +574,143 @@ class AreaLightGroup(MagicEntity, LightGroup):
             )
             if old_state.attributes.get("restored"):
                 # On state restored, also setup the timeout callback.
-                if not self._is_controlled_by_this_entity():
-                    if self._manual_timeout_cb is not None:
-                        self._manual_timeout_cb()
-                    self._manual_timeout_cb = call_later(
-                        self.hass, manual_timeout, self._reset_manual_timeout
-                    )
+                # Unless the timeout from before the restart is still running.
+                if (
+                    not self._is_controlled_by_this_entity()
+                    and self._manual_timeout_cb is None
+                ):
+                    self._start_manual_timeout(manual_timeout)
                 return
-            if self.last_update_from_entity:
-                self.last_update_from_entity = False
+            if self._contexts.is_ours(new_state.context):
                 return
             self._set_controlled_by_this_entity(False)
-            if self._manual_timeout_cb is not None:
-                self._manual_timeout_cb()
-            self._manual_timeout_cb = call_later(
-                self.hass, manual_timeout, self._reset_manual_timeout
-            )
+            self._start_manual_timeout(manual_timeout)
+
+    @callback
+    def _start_manual_timeout(self, delay: float) -> None:
+        if self._manual_timeout_cb is not None:
+            self._manual_timeout_cb()
+        self._manual_until = self._clock.monotonic() + delay
+        self._manual_timeout_cb = async_call_later(
+            self.hass, delay, self._reset_manual_timeout
+        )
 
+    @callback
     def _reset_manual_timeout(self, now: datetime):
         self._set_controlled_by_this_entity(True)
         self._manual_timeout_cb = None
+        self._manual_until = None
+
+    @callback
+    def _cancel_manual_timeout(self) -> None:
+        # The timeout is left in place, it is saved to resume on restart.
+        if self._manual_timeout_cb is not None:
+            self._manual_timeout_cb()
+            self._manual_timeout_cb = None
 
     ####  Light Handling
-    def _turn_on_light(self, conf: StateConfigData) -> None:
+    def _turn_on_light(self, plan: LightPlan, snapshot: StateSnapshot) -> None:
         """Turn on the light group."""
 
-        self._entity_ids = conf.lights
-        self.async_update_group_state()
+        if self._async_set_members(list(plan.lights)):
+            self.async_update_group_state()
         _LOGGER.debug(
-            "Update light group %s %s %s %s %s",
+            "Update light group %s %s %s",
             self.is_on,
             self.brightness,
-            self.area.entities.keys(),
-            conf.lights,
-            self.area.entities[LIGHT_DOMAIN],
+            plan,
         )
 
-        brightness = int(conf.dim_level * 255 / 100)
-        if self.is_on and self.brightness == brightness:
-            _LOGGER.debug("%s: Already on at %s", self.name, brightness)
+        if self.is_on and self.brightness == plan.brightness:
+            _LOGGER.debug("%s: Already on at %s", self.name, plan.brightness)
             return
 
-        luminesence = self._get_illuminance()
-        min_brightness = self.area.config.get(
-            CONF_MIN_BRIGHTNESS_LEVEL, DEFAULT_MIN_BRIGHTNESS_LEVEL
-        )
+        # The rest of the plan is fixed, only the illuminance changes.
+        illuminance = self._get_illuminance(snapshot)
+        brightness = plan.brightness_for(illuminance)
         _LOGGER.debug(
-            "%s: Checking brightness to %s %s,  %s, %s -- %s",
+            "%s: Brightness %s at illuminance %s (last on %s)",
             self.name,
-            self.is_on,
-            luminesence,
-            min_brightness,
-            self.area.config.get(
-                CONF_MAX_BRIGHTNESS_LEVEL, DEFAULT_MAX_BRIGHTNESS_LEVEL
-            ),
+            brightness,
+            illuminance,
             self._attr_extra_state_attributes.get(ATTR_LAST_ON_ILLUMINANCE, 0),
         )
-        if luminesence > min_brightness:
-            max_brightness = self.area.config.get(
-                CONF_MAX_BRIGHTNESS_LEVEL, DEFAULT_MAX_BRIGHTNESS_LEVEL
-            )
-            if luminesence > max_brightness:
-                brightness = 0
-            else:
-                diff = luminesence - min_brightness
-                brightness = int(
-                    brightness * (1.0 - diff / (max_brightness - min_brightness))
-                )
-                _LOGGER.debug(
-                    "%s: Updating brightness to %s 1.0 - %s / %s",
-                    self.name,
-                    brightness,
-                    diff,
-                    (max_brightness - min_brightness),
-                )
-        if not self.area.is_control_enabled(ControlType.System):
+        if not self.area.is_control_enabled(ControlType.System, snapshot):
             return
 
         if brightness == 0:
             _LOGGER.debug("%s: Brightness is 0", self.name)
-            self._turn_off_light()
+            self._turn_off_light(snapshot)
             return
 
-        _LOGGER.debug("Turning on lights")
-        self.last_update_from_entity = True
+        lights = self._lights_to_change(self._entity_ids, brightness)
+        if not lights:
+            return
+
+        _LOGGER.debug("Turning on lights %s", lights)
+        # Straight to the members, the group follows them for its own state.
         service_data = {
-            ATTR_ENTITY_ID: self.entity_id,
+            ATTR_ENTITY_ID: lights,
             ATTR_BRIGHTNESS: brightness,
         }
-        self.hass.services.call(LIGHT_DOMAIN, SERVICE_TURN_ON, service_data)
+        self._actuation.async_dispatch(
+            LIGHT_DOMAIN, SERVICE_TURN_ON, service_data, self._contexts
+        )
 
         return
 
-    def _turn_off_light(self) -> None:
+    def _turn_off_light(self, snapshot: StateSnapshot | None = None) -> None:
         """Turn off the light group."""
         if not self.is_on:
             _LOGGER.debug("%s: Light already off", self.name)
             return
 
-        if not self.area.is_control_enabled(ControlType.System):
+        if not self.area.is_control_enabled(ControlType.System, snapshot):
             return
 
-        self.last_update_from_entity = True
-        service_data = {ATTR_ENTITY_ID: self.entity_id}
-        # await self.async_turn_off()
-        self.hass.services.call(LIGHT_DOMAIN, SERVICE_TURN_OFF, service_data)
+        lights = self._lights_to_change(self._entity_ids, None)
+        if not lights:
+            return
+
+        service_data = {ATTR_ENTITY_ID: lights}
+        self._actuation.async_dispatch(
+            LIGHT_DOMAIN, SERVICE_TURN_OFF, service_data, self._contexts
+        )
 
         return
 
-    def _get_illuminance(self) -> float:
-        if self.is_on:
-            if ATTR_LAST_ON_ILLUMINANCE in self._attr_extra_state_attributes:
-                return (
-                    self._attr_extra_state_attributes[ATTR_LAST_ON_ILLUMINANCE] or 0.0
-                )
-            return 0.0
-        entity_id = self.area.simply_magic_entity_id(
-            SENSOR_DOMAIN, EntityNames.ILLUMINANCE
+    def _lights_to_change(self, lights: list[str], brightness: int | None) -> list[str]:
+        """Return the lights not already at the brightness, None for off."""
+        changed: list[str] = []
+        for entity_id in lights:
+            member = self._members.get(entity_id)
+            if brightness is None:
+                if member is None or not member.on:
+                    continue
+            elif member is not None and member.on:
+                current = member.means.get(ATTR_BRIGHTNESS)
+                # On/off only lights have no brightness, on is all they can do.
+                if current is None or abs(current - brightness) <= BRIGHTNESS_TOLERANCE:
+                    continue
+            changed.append(entity_id)
+
+        if suppressed := len(lights) - len(changed):
+            # Only goes out with the next write, it should not cause writes itself.
+            self._attr_extra_state_attributes[ATTR_SUPPRESSED_COMMANDS] += suppressed
+        return changed
+
+    def _get_illuminance(self, snapshot: StateSnapshot) -> float:
+        estimate = self._illuminance
+        if estimate.value is None:
+            # The sensor was there before the listener, start from its state.
+            illuminance = snapshot.number(self._illuminance_entity_id)
+            if illuminance is not None:
+                estimate.update(illuminance)
+        illuminance = estimate.for_lights(self.is_on)
+        self._attr_extra_state_attributes[ATTR_LAST_ON_ILLUMINANCE] = (
+            estimate.last_on or 0.0
         )
-
-        sensor_entity = self.hass.states.get(entity_id)
-        if sensor_entity is None:
-            self._attr_extra_state_attributes[ATTR_LAST_ON_ILLUMINANCE] = 0.0
-            return 0.0
-        try:
-            self._attr_extra_state_attributes[ATTR_LAST_ON_ILLUMINANCE] = float(
-                sensor_entity.state
-            )
-            return float(sensor_entity.state)
-        except ValueError:
-            return 0.0
+        return illuminance
 
     #### Control Release
     def _is_controlled_by_this_entity(self) -> bool:
@@ -383,4 +721,4 @@ class AreaLightGroup(MagicEntity, LightGroup):
 
     def _reset_control(self) -> None:
         self._set_controlled_by_this_entity(True)
-        self.schedule_update_ha_state()
+        self.async_schedule_update_ha_state()
@@ -19,6 +19,7 @@ from homeassistant.helpers.area_registry import AreaEntry, async_get as async_ge
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.event import async_track_state_change_event
 
+from .base.actuation import get_actuation
 from .base.entities import MagicEntity
 from .base.magic import MagicArea
 from .config.area_state import AreaState
@@ -144,6 +145,7 @@ class AreaAwareMediaPlayer(MagicEntity, MediaPlayerEntity):
     def __init__(self, area: MagicArea, areas: list[AreaEntry]) -> None:
         """Initialize the area aware media player."""
         MagicEntity.__init__(self, area=area, translation_key=EntityNames.MEDIA_PLAYER)
+        self._actuation = get_actuation(area.hass)
         MediaPlayerEntity.__init__()
 
         delattr(self, "_attr_name")
@@ -279,7 +281,7 @@ class AreaAwareMediaPlayer(MagicEntity, MediaPlayerEntity):
             ATTR_ENTITY_ID: media_players,
         }
 
-        self.hass.services.call(MEDIA_PLAYER_DOMAIN, SERVICE_PLAY_MEDIA, data)
+        self._actuation.dispatch(MEDIA_PLAYER_DOMAIN, SERVICE_PLAY_MEDIA, data)
 
         return True
 
@@ -290,6 +292,7 @@ class AreaMediaPlayerGroup(MagicEntity, MediaPlayerGroup):
     def __init__(self, area, entities) -> None:
         """Initialize the media player for the area."""
         MagicEntity.__init__(self, area=area, translation_key=EntityNames.MEDIA_PLAYER)
+        self._actuation = get_actuation(area.hass)
         MediaPlayerGroup.__init__(self, self.unique_id, "", entities)
         delattr(self, "_attr_name")
 
@@ -312,7 +315,7 @@ class AreaMediaPlayerGroup(MagicEntity, MediaPlayerGroup):
 
     def _turn_off(self) -> None:
         service_data = {ATTR_ENTITY_ID: self.entity_id}
-        self.hass.services.call(MEDIA_PLAYER_DOMAIN, SERVICE_TURN_OFF, service_data)
+        self._actuation.dispatch(MEDIA_PLAYER_DOMAIN, SERVICE_TURN_OFF, service_data)
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
@@ -29,6 +29,7 @@ from homeassistant.helpers.event import async_track_utc_time_change
 
 from .base.area_state_sensor import AreaStateSensor
 from .base.entities import MagicEntity
+from .base.lanes import get_lanes
 from .base.magic import MagicArea
 from .config.entity_names import EntityNames
 from .const import (
@@ -179,6 +180,27 @@ class AreaSensorGroupSensor(MagicEntity, SensorGroup):
             ),
         )
         delattr(self, "_attr_name")
+        self._lanes = get_lanes(area.hass)
+        # The humidity feeds the statistics sensor, which needs every change
+        # written, so it is never merged in the low lane.
+        self._coalesce = device_class != SensorDeviceClass.HUMIDITY
+        self.async_on_remove(self._cancel_group_update)
+
+    @callback
+    def async_defer_or_update_ha_state(self) -> None:
+        """Recompute in the low lane, after any presence work."""
+        if not self._coalesce:
+            super().async_defer_or_update_ha_state()
+            return
+        self._lanes.async_run_low(self._update_group)
+
+    @callback
+    def _update_group(self) -> None:
+        super().async_defer_or_update_ha_state()
+
+    @callback
+    def _cancel_group_update(self) -> None:
+        self._lanes.async_cancel(self._update_group)
 
 
 class MagicStatisticsSensor(MagicEntity, StatisticsSensor):
@@ -208,21 +230,30 @@ class MagicStatisticsSensor(MagicEntity, StatisticsSensor):
             translation_key=EntityNames.HUMIDITY_STATISTICS,
         )
         delattr(self, "_attr_name")
+        self._lanes = get_lanes(area.hass)
         self.async_on_remove(self._cleanup_timers)
         self._update_periodically = async_track_utc_time_change(
             area.hass, self._update_state, second=10
         )
 
     @callback
-    async def _update_state(self, d: datetime):
+    def _update_state(self, d: datetime) -> None:
+        self._lanes.async_run_low(self._sample_source)
+
+    @callback
+    def _sample_source(self) -> None:
         entity = self.hass.states.get(self._source_entity_id)
         if entity and entity.state:
             entity.last_updated = datetime.now(UTC)
             self._add_state_to_queue(entity)
+        self.hass.async_create_task(self._async_update_and_write())
+
+    async def _async_update_and_write(self) -> None:
         await self.async_update()
         self.async_write_ha_state()
 
     @callback
     def _cleanup_timers(self) -> None:
+        self._lanes.async_cancel(self._sample_source)
         self._async_cancel_update_listener()
         self._update_periodically()
@@ -1,6 +1,7 @@
 """Fixtures for tests."""
 
-from collections.abc import Generator
+from asyncio import get_running_loop
+from collections.abc import AsyncGenerator, Generator
 import logging
 
 import pytest
@@ -47,7 +48,11 @@ from ..const import (
     CONF_UPDATE_INTERVAL,
     DOMAIN,
 )
-from .common import setup_mqtt_room_component_platform, setup_test_component_platform
+from .common import (
+    VirtualClock,
+    setup_mqtt_room_component_platform,
+    setup_test_component_platform,
+)
 from .mocks import MockBinarySensor, MockCover, MockFan, MockSensor
 
 AREA_NAME = "kitchen"
@@ -116,6 +121,15 @@ def snapshot(snapshot: SnapshotAssertion) -> SnapshotAssertion:
     return snapshot.use_extension(HomeAssistantSnapshotExtension)
 
 
+@pytest.fixture(name="virtual_clock")
+async def setup_virtual_clock() -> AsyncGenerator[VirtualClock]:
+    """Run the event loop on a virtual clock, so timeouts pass instantly."""
+    clock = VirtualClock()
+    clock.vtime = get_running_loop().time()
+    for _ in clock.patch_loop():
+        yield clock
+
+
 @pytest.fixture(name="config_entry")
 def mock_config_entry() -> MockConfigEntry:
     """Fixture for mock configuration entry."""
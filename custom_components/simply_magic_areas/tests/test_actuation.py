@@ -0,0 +1,292 @@
+"""Test for the actuation dispatcher."""
+
+import asyncio
+
+from homeassistant.components.light import ATTR_BRIGHTNESS
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_OFF, SERVICE_TURN_ON
+from homeassistant.core import Context, HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+
+from ..base.actuation import ActuationDispatcher, ContextTracker
+from .common import VirtualClock, async_mock_service
+
+
+async def test_dispatch_does_not_wait(hass: HomeAssistant) -> None:
+    """Test the call goes out in the background and the stats are kept."""
+    calls = async_mock_service(hass, LIGHT_DOMAIN, SERVICE_TURN_ON)
+    dispatcher = ActuationDispatcher(hass)
+
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: "light.kitchen"}
+    )
+    assert not calls
+    await hass.async_block_till_done()
+
+    assert len(calls) == 1
+    assert dispatcher.in_flight("light.kitchen") == 0
+    assert dispatcher.stats.sent == 1
+    assert dispatcher.stats.completed == 1
+    assert dispatcher.stats.failed == 0
+
+
+async def test_dispatch_failure(hass: HomeAssistant) -> None:
+    """Test a failed call is counted and does not raise."""
+    async_mock_service(
+        hass,
+        LIGHT_DOMAIN,
+        SERVICE_TURN_OFF,
+        raise_exception=HomeAssistantError("broken"),
+    )
+    dispatcher = ActuationDispatcher(hass)
+
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: ["light.a", "light.b"]}
+    )
+    await hass.async_block_till_done()
+
+    assert dispatcher.in_flight("light.a,light.b") == 0
+    assert dispatcher.stats.failed == 1
+    assert dispatcher.stats.completed == 0
+
+
+async def test_dispatch_timeout(
+    hass: HomeAssistant, virtual_clock: VirtualClock
+) -> None:
+    """Test a call that never answers times out."""
+
+    async def _slow(call: ServiceCall) -> None:
+        await asyncio.sleep(60)
+
+    hass.services.async_register(LIGHT_DOMAIN, SERVICE_TURN_ON, _slow)
+    dispatcher = ActuationDispatcher(hass, timeout=5)
+
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: "light.kitchen"}
+    )
+    await asyncio.sleep(1)
+    assert dispatcher.in_flight("light.kitchen") == 1
+
+    await asyncio.sleep(5)
+    await hass.async_block_till_done()
+    assert dispatcher.in_flight("light.kitchen") == 0
+    assert dispatcher.stats.timed_out == 1
+
+
+async def test_dispatch_rate_limited(
+    hass: HomeAssistant, virtual_clock: VirtualClock
+) -> None:
+    """Test calls over the radio budget wait, and only the latest intent is sent."""
+    on_calls = async_mock_service(hass, LIGHT_DOMAIN, SERVICE_TURN_ON)
+    off_calls = async_mock_service(hass, LIGHT_DOMAIN, SERVICE_TURN_OFF)
+    dispatcher = ActuationDispatcher(hass, rate=1)
+
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: "light.kitchen"}
+    )
+    await hass.async_block_till_done()
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: "light.hall"}
+    )
+    await hass.async_block_till_done()
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: "light.hall"}
+    )
+    await hass.async_block_till_done()
+
+    assert len(on_calls) == 1
+    assert not off_calls
+    assert dispatcher.queue_depth() == 1
+    assert dispatcher.queue_depth(LIGHT_DOMAIN) == 1
+    assert dispatcher.stats.queued == 1
+    assert dispatcher.stats.merged == 1
+
+    await asyncio.sleep(1)
+    await hass.async_block_till_done()
+
+    assert len(on_calls) == 1
+    assert len(off_calls) == 1
+    assert off_calls[0].data[ATTR_ENTITY_ID] == ["light.hall"]
+    assert dispatcher.queue_depth() == 0
+    assert dispatcher.stats.sent == 2
+    assert dispatcher.stats.max_wait >= 0.9
+
+
+async def test_dispatch_charges_each_entity(
+    hass: HomeAssistant, virtual_clock: VirtualClock
+) -> None:
+    """Test each entity in a call is a command, split up to fit the budget."""
+    calls = async_mock_service(hass, SWITCH_DOMAIN, SERVICE_TURN_ON)
+    dispatcher = ActuationDispatcher(hass, rate=2)
+    switches = [f"switch.plug_{i}" for i in range(5)]
+
+    dispatcher.async_dispatch(
+        SWITCH_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: switches}
+    )
+    await hass.async_block_till_done()
+    assert [call.data[ATTR_ENTITY_ID] for call in calls] == [switches[:2]]
+    assert dispatcher.queue_depth(SWITCH_DOMAIN) == 2
+
+    await asyncio.sleep(1.1)
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+    await asyncio.sleep(0.5)
+    await hass.async_block_till_done()
+    assert [call.data[ATTR_ENTITY_ID] for call in calls] == [
+        switches[:2],
+        switches[2:4],
+        switches[4:],
+    ]
+    assert dispatcher.queue_depth() == 0
+
+
+async def test_dispatch_merged_goes_last(
+    hass: HomeAssistant, virtual_clock: VirtualClock
+) -> None:
+    """Test a merged call goes out after the calls queued since it."""
+    sent: list[tuple[str, list[str]]] = []
+
+    async def _record(call: ServiceCall) -> None:
+        sent.append((call.service, call.data[ATTR_ENTITY_ID]))
+
+    hass.services.async_register(SWITCH_DOMAIN, SERVICE_TURN_ON, _record)
+    hass.services.async_register(SWITCH_DOMAIN, SERVICE_TURN_OFF, _record)
+    dispatcher = ActuationDispatcher(hass, rate=2)
+
+    dispatcher.async_dispatch(
+        SWITCH_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: ["switch.x", "switch.y"]}
+    )
+    dispatcher.async_dispatch(
+        SWITCH_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: ["switch.a"]}
+    )
+    dispatcher.async_dispatch(
+        SWITCH_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: ["switch.a", "switch.b"]}
+    )
+    dispatcher.async_dispatch(
+        SWITCH_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: ["switch.a"]}
+    )
+    await hass.async_block_till_done()
+    assert dispatcher.stats.merged == 1
+
+    await asyncio.sleep(2)
+    await hass.async_block_till_done()
+    assert sent == [
+        (SERVICE_TURN_ON, ["switch.x", "switch.y"]),
+        (SERVICE_TURN_ON, ["switch.a", "switch.b"]),
+        (SERVICE_TURN_OFF, ["switch.a"]),
+    ]
+
+
+async def test_dispatch_with_context(hass: HomeAssistant) -> None:
+    """Test the call goes out with a context the tracker knows."""
+    calls = async_mock_service(hass, LIGHT_DOMAIN, SERVICE_TURN_ON)
+    dispatcher = ActuationDispatcher(hass)
+    contexts = ContextTracker()
+
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: "light.kitchen"}, contexts
+    )
+    await hass.async_block_till_done()
+
+    assert len(calls) == 1
+    assert contexts.is_ours(calls[0].context)
+    # Anything that came from the call is ours as well.
+    assert contexts.is_ours(Context(parent_id=calls[0].context.id))
+    assert not contexts.is_ours(Context())
+    assert not contexts.is_ours(None)
+
+
+def test_context_tracker_bounded() -> None:
+    """Test only the latest contexts are remembered."""
+    contexts = ContextTracker(size=2)
+    first = Context()
+    second = Context()
+    third = Context()
+    contexts.add(first)
+    contexts.add(second)
+    contexts.add(third)
+
+    assert not contexts.is_ours(first)
+    assert contexts.is_ours(second)
+    assert contexts.is_ours(third)
+
+
+async def test_dispatch_batched(hass: HomeAssistant) -> None:
+    """Test the same call from several areas in a tick goes out once."""
+    calls = async_mock_service(hass, LIGHT_DOMAIN, SERVICE_TURN_ON)
+    dispatcher = ActuationDispatcher(hass)
+    kitchen = ContextTracker()
+    hall = ContextTracker()
+
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: ["light.kitchen"], ATTR_BRIGHTNESS: 255},
+        kitchen,
+    )
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: ["light.hall", "light.stairs"], ATTR_BRIGHTNESS: 255},
+        hall,
+    )
+    # A different brightness is kept apart.
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: ["light.stairs"], ATTR_BRIGHTNESS: 100},
+        hall,
+    )
+    await hass.async_block_till_done()
+
+    assert len(calls) == 2
+    assert calls[0].data == {
+        ATTR_ENTITY_ID: ["light.kitchen", "light.hall"],
+        ATTR_BRIGHTNESS: 255,
+    }
+    assert calls[1].data == {ATTR_ENTITY_ID: ["light.stairs"], ATTR_BRIGHTNESS: 100}
+    assert kitchen.is_ours(calls[0].context)
+    assert hall.is_ours(calls[0].context)
+    assert not kitchen.is_ours(calls[1].context)
+    assert dispatcher.stats.batches == 2
+    assert dispatcher.stats.max_batch == 2
+    assert dispatcher.stats.average_batch == 1.5
+
+
+async def test_dispatch_batch_rate_limited(
+    hass: HomeAssistant, virtual_clock: VirtualClock
+) -> None:
+    """Test a batch merged from several areas still keeps to the radio budget."""
+    calls = async_mock_service(hass, LIGHT_DOMAIN, SERVICE_TURN_OFF)
+    dispatcher = ActuationDispatcher(hass, rate=2)
+    kitchen = [f"light.kitchen_{i}" for i in range(3)]
+    hall = [f"light.hall_{i}" for i in range(3)]
+
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: kitchen}, ContextTracker()
+    )
+    dispatcher.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: hall}, ContextTracker()
+    )
+    await hass.async_block_till_done()
+
+    assert dispatcher.stats.batches == 1
+    assert dispatcher.stats.max_batch == 6
+    # Only as many lights as the budget holds go out at once.
+    assert [call.data[ATTR_ENTITY_ID] for call in calls] == [kitchen[:2]]
+    assert dispatcher.queue_depth(LIGHT_DOMAIN) == 2
+
+    await asyncio.sleep(1.1)
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+    await asyncio.sleep(1.1)
+    await hass.async_block_till_done()
+    assert [call.data[ATTR_ENTITY_ID] for call in calls] == [
+        kitchen[:2],
+        [kitchen[2], hall[0]],
+        hall[1:],
+    ]
+    assert dispatcher.stats.sent == 3
@@ -1,17 +1,36 @@
 """Test for area changes and how the system handles it."""
 
+import asyncio
 import logging
 
 import pytest
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    mock_restore_cache_with_extra_data,
+)
 
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.config_entries import ConfigEntryState
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.area_registry import async_get as async_get_ar
 from homeassistant.helpers.entity_registry import async_get as async_get_er
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
 
-from ..const import DOMAIN
+from ..const import (
+    AREA_TYPE_META,
+    CONF_CLEAR_TIMEOUT,
+    CONF_EXTENDED_TIMEOUT,
+    CONF_ID,
+    CONF_NAME,
+    CONF_TYPE,
+    DATA_AREA_OBJECT,
+    DOMAIN,
+    META_AREA_INTERIOR,
+    MODULE_DATA,
+)
+from .common import VirtualClock
+from .conftest import AREA_NAME, CONFIG_ENTRY_DATA
 from .mocks import MockBinarySensor
 
 _LOGGER = logging.getLogger(__name__)
@@ -52,3 +71,154 @@ async def test_area_change(
 
     assert not hass.data.get(DOMAIN)
     assert config_entry.state is ConfigEntryState.NOT_LOADED
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+async def test_area_timeouts_virtual_clock(
+    hass: HomeAssistant,
+    virtual_clock: VirtualClock,
+    one_motion: list[MockBinarySensor],
+) -> None:
+    """Test the clear and extended timeouts run on simulated time."""
+    registry = async_get_ar(hass)
+    registry.async_get_or_create(AREA_NAME)
+    data = dict(CONFIG_ENTRY_DATA)
+    data[CONF_CLEAR_TIMEOUT] = 3600
+    data[CONF_EXTENDED_TIMEOUT] = 7200
+    config_entry = MockConfigEntry(domain=DOMAIN, data=data)
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    entity_id = f"{SENSOR_DOMAIN}.simply_magic_areas_state_kitchen"
+    one_motion[0].turn_on()
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+    assert hass.states.get(entity_id).state == "occupied"
+
+    one_motion[0].turn_off()
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "occupied"
+
+    start = virtual_clock.virtual_time()
+    await asyncio.sleep(3601)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "extended"
+
+    await asyncio.sleep(7200)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "clear"
+    assert virtual_clock.virtual_time() - start >= 10800
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+async def test_area_timeouts_resume_after_restart(
+    hass: HomeAssistant,
+    virtual_clock: VirtualClock,
+    one_motion: list[MockBinarySensor],
+) -> None:
+    """Test the clear timeout carries on from before the restart."""
+    entity_id = f"{SENSOR_DOMAIN}.simply_magic_areas_state_kitchen"
+    mock_restore_cache_with_extra_data(
+        hass,
+        [
+            (
+                State(entity_id, "occupied"),
+                {"last_off": dt_util.utcnow().timestamp() - 600},
+            )
+        ],
+    )
+    registry = async_get_ar(hass)
+    registry.async_get_or_create(AREA_NAME)
+    data = dict(CONFIG_ENTRY_DATA)
+    data[CONF_CLEAR_TIMEOUT] = 3600
+    data[CONF_EXTENDED_TIMEOUT] = 7200
+    config_entry = MockConfigEntry(domain=DOMAIN, data=data)
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "occupied"
+
+    # Only the rest of the clear timeout is left.
+    await asyncio.sleep(3001)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "extended"
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+async def test_area_state_unchanged_not_written(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    one_motion: list[MockBinarySensor],
+    _setup_integration,
+) -> None:
+    """Test an evaluation with nothing new does not rewrite the entity."""
+    entity_id = f"{SENSOR_DOMAIN}.simply_magic_areas_state_kitchen"
+    one_motion[0].turn_on()
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+    area_sensor = hass.states.get(entity_id)
+    assert area_sensor.state == "occupied"
+    assert area_sensor.attributes["active_sensors"] == ("binary_sensor.motion_sensor",)
+
+    # Same state with a different attribute, so the area is evaluated again.
+    hass.states.async_set(
+        "binary_sensor.motion_sensor", "on", {"device_class": "motion", "x": 1}
+    )
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+    assert hass.states.get(entity_id).last_updated == area_sensor.last_updated
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+async def test_meta_area_tracks_children(
+    hass: HomeAssistant,
+    virtual_clock: VirtualClock,
+    config_entry: MockConfigEntry,
+    one_motion: list[MockBinarySensor],
+    _setup_integration,
+) -> None:
+    """Test the meta area follows the child areas without polling."""
+    meta_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_NAME: META_AREA_INTERIOR,
+            CONF_ID: META_AREA_INTERIOR.lower(),
+            CONF_TYPE: AREA_TYPE_META,
+            CONF_CLEAR_TIMEOUT: 0,
+            CONF_EXTENDED_TIMEOUT: 0,
+        },
+    )
+    meta_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(meta_entry.entry_id)
+    await hass.async_block_till_done()
+
+    one_motion[0].turn_on()
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+    meta_area = hass.data[MODULE_DATA][meta_entry.entry_id][DATA_AREA_OBJECT]
+    assert not meta_area.is_empty()
+    assert meta_area.get_active_areas() == ["kitchen"]
+    meta_sensor = hass.states.get(f"{SENSOR_DOMAIN}.simply_magic_areas_state_interior")
+    assert meta_sensor.state == "occupied"
+    assert meta_sensor.attributes["active_areas"] == ("kitchen",)
+
+    # The kitchen stays occupied until its clear timeout runs out.
+    one_motion[0].turn_off()
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+    assert not meta_area.is_empty()
+    await asyncio.sleep(3)
+    await hass.async_block_till_done()
+    assert meta_area.is_empty()
+    meta_sensor = hass.states.get(f"{SENSOR_DOMAIN}.simply_magic_areas_state_interior")
+    assert meta_sensor.state == "clear"
+
+    await hass.config_entries.async_unload(meta_entry.entry_id)
+    await hass.async_block_till_done()
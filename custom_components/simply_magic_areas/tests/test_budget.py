@@ -0,0 +1,29 @@
+"""Test for the event budget."""
+
+from ..base.budget import EventBudget
+
+
+def test_budget_spend_and_roll() -> None:
+    """Test the budget runs out in a window and comes back in the next."""
+    budget = EventBudget(limit=3, window=10)
+    assert budget.spend(0)
+    assert budget.spend(1)
+    assert budget.spend(2)
+    assert not budget.spend(3)
+    assert not budget.calm(4)
+
+    # The new window is inside the budget, but the last one was not.
+    assert budget.spend(10)
+    assert not budget.calm(11)
+
+    # Two windows on everything is calm again.
+    assert budget.calm(20)
+
+
+def test_budget_gap_forgets_the_flood() -> None:
+    """Test a long gap with no events drops the last window."""
+    budget = EventBudget(limit=1, window=10)
+    assert budget.spend(0)
+    assert not budget.spend(1)
+    assert budget.spend(50)
+    assert budget.calm(51)
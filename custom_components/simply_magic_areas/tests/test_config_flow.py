@@ -16,6 +16,10 @@ from homeassistant.helpers.area_registry import async_get as async_get_ar
 
 from ..const import (
     AREA_TYPE_INTERIOR,
+    BRIGHTNESS_CURVE_LINEAR,
+    CONF_BRIGHTNESS_CURVE,
+    CONF_BRIGHTNESS_CURVE_POINTS,
+    CONF_BRIGHTNESS_GAMMA,
     CONF_CLEAR_TIMEOUT,
     CONF_ENABLED_FEATURES,
     CONF_EXCLUDE_ENTITIES,
@@ -35,8 +39,14 @@ from ..const import (
     CONF_MQTT_ROOM_PRESENCE,
     CONF_NAME,
     CONF_ON_STATES,
+    CONF_PRESENCE_DEBOUNCE,
     CONF_PRESENCE_DEVICE_PLATFORMS,
+    CONF_PRESENCE_MIN_OFF,
+    CONF_PRESENCE_MIN_ON,
+    CONF_PRESENCE_QUORUM,
     CONF_PRESENCE_SENSOR_DEVICE_CLASS,
+    CONF_PRESENCE_SENSOR_WEIGHTS,
+    CONF_PRESENCE_THRESHOLD,
     CONF_TYPE,
     CONF_UPDATE_INTERVAL,
     DOMAIN,
@@ -225,6 +235,15 @@ async def test_options_enable_advanced_lights(
                     BinarySensorDeviceClass.PRESENCE,
                 ],
                 CONF_ON_STATES: [STATE_ON, STATE_OPEN],
+                CONF_PRESENCE_QUORUM: 1,
+                CONF_PRESENCE_THRESHOLD: 0.0,
+                CONF_PRESENCE_SENSOR_WEIGHTS: {},
+                CONF_PRESENCE_DEBOUNCE: 0.0,
+                CONF_PRESENCE_MIN_ON: 0.0,
+                CONF_PRESENCE_MIN_OFF: 0.0,
+                CONF_BRIGHTNESS_CURVE: BRIGHTNESS_CURVE_LINEAR,
+                CONF_BRIGHTNESS_GAMMA: 2.0,
+                CONF_BRIGHTNESS_CURVE_POINTS: {},
                 CONF_INCLUDE_ENTITIES: [],
             },
         },
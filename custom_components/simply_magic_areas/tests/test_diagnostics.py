@@ -0,0 +1,41 @@
+"""Test for the diagnostics."""
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_ON
+from homeassistant.core import HomeAssistant
+
+from ..base.actuation import get_actuation
+from ..const import DOMAIN
+from ..diagnostics import async_get_config_entry_diagnostics
+from .common import VirtualClock, async_mock_service
+
+
+async def test_actuation_diagnostics(
+    hass: HomeAssistant, virtual_clock: VirtualClock
+) -> None:
+    """Test the actuation latency, failures and queues are in the diagnostics."""
+    async_mock_service(hass, LIGHT_DOMAIN, SERVICE_TURN_ON)
+    actuation = get_actuation(hass)
+    actuation.configure(1, {})
+    actuation.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: "light.kitchen"}
+    )
+    actuation.async_dispatch(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: "light.hall"}
+    )
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(
+        hass, MockConfigEntry(domain=DOMAIN)
+    )
+    assert diagnostics["actuation"]["sent"] == 1
+    assert diagnostics["actuation"]["completed"] == 1
+    assert diagnostics["actuation"]["failed"] == 0
+    assert diagnostics["actuation"]["queued"] == 1
+    assert diagnostics["actuation"]["batches"] == 1
+    assert diagnostics["actuation"]["average_batch"] == 2
+    assert diagnostics["actuation"]["queue_depth"] == {LIGHT_DOMAIN: 1}
+
+    actuation.async_shutdown()
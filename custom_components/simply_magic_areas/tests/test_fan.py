@@ -5,7 +5,10 @@ import logging
 
 from _pytest.monkeypatch import MonkeyPatch
 import pytest
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    mock_restore_cache_with_extra_data,
+)
 
 from homeassistant.components.fan import DOMAIN as FAN_DOMAIN
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
@@ -20,10 +23,14 @@ from homeassistant.const import (
     STATE_UNAVAILABLE,
     STATE_UNKNOWN
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers.area_registry import async_get as async_get_ar
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
 
 from ..const import DOMAIN
-from .common import async_mock_service
+from .common import VirtualClock, async_mock_service
+from .conftest import AREA_NAME
 from .mocks import MockBinarySensor, MockFan, MockSensor
 
 _LOGGER = logging.getLogger(__name__)
@@ -100,7 +107,7 @@ async def test_fan_on_off(
     if automated:
         assert len(calls) == 1
         assert calls[0].data == {
-            "entity_id": f"{FAN_DOMAIN}.simply_magic_areas_fan_kitchen",
+            "entity_id": [one_fan[0].entity_id],
         }
         assert calls[0].service == SERVICE_TURN_ON
         # Turn on the underlying entity.
@@ -182,7 +189,7 @@ async def test_fan_on_off_humidity(
     assert area_binary_sensor.state == "occupied"
     assert len(calls) == 1
     assert calls[0].data == {
-        "entity_id": f"{FAN_DOMAIN}.simply_magic_areas_fan_kitchen",
+        "entity_id": [one_fan[0].entity_id],
     }
 
     # Push events down, should turn on the down trending sensor.
@@ -270,3 +277,40 @@ async def test_fan_control_disabled(
     assert area_binary_sensor.state == "occupied"
     # Fans should not have changed, since they are disabled.
     assert len(calls) == 0
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize(("remaining", "running"), [(600, True), (-600, False)])
+async def test_fan_manual_timeout_restored(
+    hass: HomeAssistant,
+    virtual_clock: VirtualClock,
+    config_entry: MockConfigEntry,
+    one_fan: list[MockFan],
+    remaining: float,
+    running: bool,
+) -> None:
+    """Test the manual timeout from before the restart carries on or runs out."""
+    group_id = f"{FAN_DOMAIN}.simply_magic_areas_fan_kitchen"
+    manual_until = dt_util.utcnow().timestamp() + remaining
+    mock_restore_cache_with_extra_data(
+        hass, [(State(group_id, STATE_ON), {"manual_until": manual_until})]
+    )
+    async_get_ar(hass).async_get_or_create(AREA_NAME)
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    assert config_entry.state is ConfigEntryState.LOADED
+
+    fan_group = hass.data[FAN_DOMAIN].get_entity(group_id)
+    restored = fan_group.extra_restore_state_data.as_dict()["manual_until"]
+    if running:
+        assert restored == pytest.approx(manual_until, abs=1)
+    else:
+        assert restored is None
+
+    await asyncio.sleep(601)
+    await hass.async_block_till_done()
+    assert fan_group.extra_restore_state_data.as_dict()["manual_until"] is None
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
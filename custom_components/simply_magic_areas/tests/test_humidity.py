@@ -0,0 +1,51 @@
+"""Test for the humidity trend controller without home assistant running."""
+
+from ..base.humidity import HumidityConfig, HumidityTrend
+
+
+def _trend() -> HumidityTrend:
+    return HumidityTrend(
+        HumidityConfig(up_cut_off=0.03, down_cut_off=-0.015, zero_wait=60)
+    )
+
+
+def test_humidity_up_and_down() -> None:
+    """Test the trend stays on until it drops below the down cut off."""
+    trend = _trend()
+    assert not trend.sample(0.01, 0).active
+
+    assert trend.sample(0.05, 10).active
+    # Stays on while it is above the down cut off.
+    result = trend.sample(-0.01, 20)
+    assert result.active
+    assert not result.hold
+
+    result = trend.sample(-0.02, 30)
+    assert not result.active
+    assert result.hold
+    assert not trend.on
+
+    # No sample keeps the last decision.
+    assert trend.sample(None, 40) == result
+
+
+def test_humidity_zero_wait() -> None:
+    """Test sitting at zero turns it off after the wait time."""
+    trend = _trend()
+    trend.sample(0.05, 0)
+    result = trend.sample(0.0, 10)
+    assert result.active
+    assert result.deadline == 71
+    assert trend.zero_start == 10
+
+    result = trend.evaluate(71)
+    assert not result.active
+    assert result.deadline is None
+
+
+def test_humidity_restore() -> None:
+    """Test the restored state carries on the zero wait."""
+    trend = _trend()
+    trend.restore(True, 0)
+    assert trend.sample(0.0, 30).active
+    assert not trend.sample(0.0, 61).active
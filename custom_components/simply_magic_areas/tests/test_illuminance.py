@@ -0,0 +1,46 @@
+"""Test for the illuminance estimate without home assistant running."""
+
+from ..base.illuminance import IlluminanceConfig, IlluminanceEstimate
+
+
+def _estimate() -> IlluminanceEstimate:
+    return IlluminanceEstimate(
+        IlluminanceConfig(smoothing=0.5, hysteresis=5.0, step=50.0)
+    )
+
+
+def test_illuminance_jitter_held() -> None:
+    """Test small changes are smoothed and held inside the band."""
+    estimate = _estimate()
+    assert estimate.value is None
+    assert estimate.update(150) == 150
+
+    # Jitter around the value does not move it.
+    assert estimate.update(158) == 150
+    assert estimate.update(146) == 150
+    assert estimate.update(154) == 150
+
+    # Drifting away moves it once the average leaves the band.
+    assert estimate.update(170) == 161
+
+
+def test_illuminance_step() -> None:
+    """Test a big change is taken straight away."""
+    estimate = _estimate()
+    estimate.update(10)
+    assert estimate.update(175) == 175
+    assert estimate.update(20) == 20
+
+
+def test_illuminance_last_on() -> None:
+    """Test the value is held while the lights are on."""
+    estimate = _estimate()
+    assert estimate.for_lights(False) == 0.0
+    estimate.update(120)
+    assert estimate.for_lights(False) == 120
+    assert estimate.last_on == 120
+
+    # The lights brighten the sensor, the value from before is still used.
+    estimate.update(400)
+    assert estimate.for_lights(True) == 120
+    assert estimate.for_lights(False) == 400
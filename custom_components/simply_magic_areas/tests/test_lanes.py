@@ -0,0 +1,60 @@
+"""Test for the priority lanes."""
+
+from homeassistant.core import HomeAssistant
+
+from ..base.lanes import PriorityLanes
+
+
+async def _run_loop(hass: HomeAssistant) -> None:
+    """Wait for the lanes to drain, they are tracked by hass."""
+    await hass.async_block_till_done()
+
+
+async def test_high_lane_runs_first(hass: HomeAssistant) -> None:
+    """Test the low lane waits for the high lane and only runs each item once."""
+    lanes = PriorityLanes(hass)
+    calls: list[str] = []
+
+    def aggregate() -> None:
+        calls.append("aggregate")
+
+    def statistics() -> None:
+        calls.append("statistics")
+        lanes.async_queue_high(lambda: calls.append("late dispatch"))
+
+    lanes.async_run_low(aggregate)
+    lanes.async_run_low(statistics)
+    lanes.async_run_low(aggregate)
+    lanes.async_queue_high(lambda: calls.append("dispatch"))
+    # Presence work does not wait for the loop.
+    lanes.async_run_high(lambda: calls.append("presence"))
+    assert calls == ["presence"]
+    assert lanes.high_pending == 1
+    assert lanes.low_pending == 2
+
+    await _run_loop(hass)
+    assert calls == ["presence", "dispatch", "aggregate", "statistics", "late dispatch"]
+
+
+async def test_cancel_and_shutdown(hass: HomeAssistant) -> None:
+    """Test cancelled and shutdown work never runs."""
+    lanes = PriorityLanes(hass)
+    calls: list[str] = []
+
+    def aggregate() -> None:
+        calls.append("aggregate")
+
+    lanes.async_run_low(aggregate)
+    lanes.async_cancel(aggregate)
+    await _run_loop(hass)
+    assert calls == []
+
+    lanes.async_queue_high(aggregate)
+    lanes.async_cancel(aggregate)
+    await _run_loop(hass)
+    assert calls == []
+
+    lanes.async_queue_high(aggregate)
+    lanes.async_shutdown()
+    await _run_loop(hass)
+    assert calls == []
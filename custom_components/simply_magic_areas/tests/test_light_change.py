@@ -4,9 +4,19 @@ import asyncio
 import logging
 
 import pytest
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    mock_restore_cache_with_extra_data,
+)
 
-from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_COLOR_MODE,
+    ATTR_HS_COLOR,
+    ATTR_SUPPORTED_COLOR_MODES,
+    DOMAIN as LIGHT_DOMAIN,
+    ColorMode,
+)
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
 from homeassistant.config_entries import ConfigEntryState
@@ -17,10 +27,16 @@ from homeassistant.const import (
     SERVICE_TURN_ON,
     STATE_OFF,
     STATE_ON,
+    STATE_UNAVAILABLE,
 )
-from homeassistant.core import HomeAssistant
-
-from .common import async_mock_service
+from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers.area_registry import async_get as async_get_ar
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+from ..const import DOMAIN
+from .common import VirtualClock, async_mock_service
+from .conftest import AREA_NAME
 from .mocks import MockBinarySensor, MockSensor
 
 _LOGGER = logging.getLogger(__name__)
@@ -81,7 +97,7 @@ async def test_light_on_off(
     if automated:
         assert len(calls) == 1
         assert calls[0].data == {
-            "entity_id": f"{LIGHT_DOMAIN}.simply_magic_areas_light_kitchen",
+            "entity_id": [one_light[0]],
             "brightness": 255,
         }
         assert calls[0].service == SERVICE_TURN_ON
@@ -143,7 +159,7 @@ async def test_light_entity_change(
     assert area_binary_sensor.state == "occupied"
     assert len(calls) == 1
     assert calls[0].data == {
-        "entity_id": f"{LIGHT_DOMAIN}.simply_magic_areas_light_kitchen",
+        "entity_id": [one_light[0]],
         "brightness": 255,
     }
     assert calls[0].service == SERVICE_TURN_ON
@@ -180,6 +196,39 @@ async def test_light_entity_change(
     assert area_binary_sensor.state == "accented"
 
 
+async def test_secondary_entity_unavailable(
+    hass: HomeAssistant,
+    config_entry_entities: MockConfigEntry,
+    one_light: list[str],
+    one_motion: list[MockBinarySensor],
+    _setup_integration_entities: None,
+) -> None:
+    """Test the sleep state ends when the sleep entity drops out."""
+    service_data = {
+        ATTR_ENTITY_ID: f"{SWITCH_DOMAIN}.simply_magic_areas_system_control_kitchen",
+    }
+    await hass.services.async_call(SWITCH_DOMAIN, SERVICE_TURN_ON, service_data)
+    async_mock_service(hass, LIGHT_DOMAIN, "turn_on")
+    await hass.async_block_till_done()
+
+    one_motion[0].turn_on()
+    one_motion[1].turn_on()
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+    area_binary_sensor = hass.states.get(
+        f"{SENSOR_DOMAIN}.simply_magic_areas_state_kitchen"
+    )
+    assert area_binary_sensor.state == "sleep"
+
+    hass.states.async_set(one_motion[1].entity_id, STATE_UNAVAILABLE)
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+    area_binary_sensor = hass.states.get(
+        f"{SENSOR_DOMAIN}.simply_magic_areas_state_kitchen"
+    )
+    assert area_binary_sensor.state == "occupied"
+
+
 @pytest.mark.parametrize(
     ("luminesnce", "brightness"), [(0.0, 255), (200.0, 0), (175.0, 63), (300.0, 0)]
 )
@@ -245,7 +294,7 @@ async def test_light_on_off_with_light_sensor(
     if brightness != 0:
         assert len(calls) == 1
         assert calls[0].data == {
-            "entity_id": f"{LIGHT_DOMAIN}.simply_magic_areas_light_kitchen",
+            "entity_id": [one_light[0]],
             "brightness": brightness,
         }
         assert calls[0].service == SERVICE_TURN_ON
@@ -321,3 +370,126 @@ async def test_light_on_off_with_mqtt_room(
         f"{SENSOR_DOMAIN}.simply_magic_areas_state_kitchen"
     )
     assert area_binary_sensor.state == "clear"
+
+
+async def test_light_already_on_skipped(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    one_light: list[str],
+    one_motion: list[MockBinarySensor],
+    _setup_integration: None,
+) -> None:
+    """Test a light already at the brightness is not sent a command."""
+    hass.states.async_set(one_light[0], STATE_ON, {ATTR_BRIGHTNESS: 254})
+    await hass.async_block_till_done()
+    calls = async_mock_service(hass, LIGHT_DOMAIN, "turn_on")
+
+    one_motion[0].turn_on()
+    await hass.async_block_till_done()
+    await asyncio.sleep(1)
+
+    area_binary_sensor = hass.states.get(
+        f"{SENSOR_DOMAIN}.simply_magic_areas_state_kitchen"
+    )
+    assert area_binary_sensor.state == "occupied"
+    assert len(calls) == 0
+
+    # The count goes out with the next write of the group.
+    hass.states.async_set(one_light[0], STATE_ON, {ATTR_BRIGHTNESS: 200})
+    await hass.async_block_till_done()
+    light_group = hass.states.get(f"{LIGHT_DOMAIN}.simply_magic_areas_light_kitchen")
+    assert light_group.attributes["suppressed_commands"] == 1
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_light_group_follows_members(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    one_light: list[str],
+    _setup_integration: None,
+) -> None:
+    """Test the group state follows each member change."""
+    group_id = f"{LIGHT_DOMAIN}.simply_magic_areas_light_kitchen"
+    # The group only shows the brightness for a mode that has one.
+    dimmable = {
+        ATTR_COLOR_MODE: ColorMode.BRIGHTNESS,
+        ATTR_SUPPORTED_COLOR_MODES: [ColorMode.BRIGHTNESS],
+    }
+
+    hass.states.async_set(one_light[0], STATE_ON, {**dimmable, ATTR_BRIGHTNESS: 100})
+    await hass.async_block_till_done()
+    light_group = hass.states.get(group_id)
+    assert light_group.state == STATE_ON
+    assert light_group.attributes[ATTR_BRIGHTNESS] == 100
+
+    # Only the brightness changes.
+    hass.states.async_set(one_light[0], STATE_ON, {**dimmable, ATTR_BRIGHTNESS: 50})
+    await hass.async_block_till_done()
+    light_group = hass.states.get(group_id)
+    assert light_group.state == STATE_ON
+    assert light_group.attributes[ATTR_BRIGHTNESS] == 50
+
+    # The colour and its mode come from the members as well.
+    hass.states.async_set(
+        one_light[0],
+        STATE_ON,
+        {
+            ATTR_BRIGHTNESS: 50,
+            ATTR_COLOR_MODE: ColorMode.HS,
+            ATTR_HS_COLOR: (30.0, 80.0),
+            ATTR_SUPPORTED_COLOR_MODES: [ColorMode.HS],
+        },
+    )
+    await hass.async_block_till_done()
+    light_group = hass.states.get(group_id)
+    assert light_group.attributes[ATTR_COLOR_MODE] == ColorMode.HS
+    assert light_group.attributes[ATTR_HS_COLOR] == (30.0, 80.0)
+    assert light_group.attributes[ATTR_SUPPORTED_COLOR_MODES] == [ColorMode.HS]
+
+    hass.states.async_set(one_light[0], STATE_OFF)
+    await hass.async_block_till_done()
+    light_group = hass.states.get(group_id)
+    assert light_group.state == STATE_OFF
+    assert light_group.attributes.get(ATTR_BRIGHTNESS) is None
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize(("remaining", "running"), [(600, True), (-600, False)])
+async def test_light_manual_timeout_restored(
+    hass: HomeAssistant,
+    virtual_clock: VirtualClock,
+    config_entry: MockConfigEntry,
+    one_light: list[str],
+    remaining: float,
+    running: bool,
+) -> None:
+    """Test the manual timeout from before the restart carries on or runs out."""
+    group_id = f"{LIGHT_DOMAIN}.simply_magic_areas_light_kitchen"
+    manual_until = dt_util.utcnow().timestamp() + remaining
+    mock_restore_cache_with_extra_data(
+        hass, [(State(group_id, STATE_ON), {"manual_until": manual_until})]
+    )
+    async_get_ar(hass).async_get_or_create(AREA_NAME)
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    assert config_entry.state is ConfigEntryState.LOADED
+
+    light_group = hass.data[LIGHT_DOMAIN].get_entity(group_id)
+    restored = light_group.extra_restore_state_data.as_dict()["manual_until"]
+    if running:
+        assert restored == pytest.approx(manual_until, abs=1)
+    else:
+        assert restored is None
+
+    await asyncio.sleep(601)
+    await hass.async_block_till_done()
+    assert light_group.extra_restore_state_data.as_dict()["manual_until"] is None
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,67 @@
+"""Test for the precomputed light plans."""
+
+from ..base.brightness import BrightnessCurve
+from ..base.magic import LightPlan
+from ..const import (
+    BRIGHTNESS_CURVE_GAMMA,
+    BRIGHTNESS_CURVE_LINEAR,
+    BRIGHTNESS_CURVE_PIECEWISE,
+)
+
+
+def test_light_plan_brightness() -> None:
+    """Test the illuminance dims the planned brightness."""
+    curve = BrightnessCurve(
+        kind=BRIGHTNESS_CURVE_LINEAR, min_illuminance=100, max_illuminance=300
+    )
+    plan = LightPlan(
+        lights=("light.kitchen",), brightness=200, table=curve.compile(200)
+    )
+    assert plan.brightness_for(0) == 200
+    assert plan.brightness_for(100) == 200
+    assert plan.brightness_for(200) == 99
+    assert plan.brightness_for(300) == 0
+    assert plan.brightness_for(301) == 0
+
+
+def test_gamma_curve() -> None:
+    """Test the gamma curve holds the light up for longer."""
+    table = BrightnessCurve(
+        kind=BRIGHTNESS_CURVE_GAMMA,
+        min_illuminance=100,
+        max_illuminance=200,
+        gamma=2.0,
+    ).compile(255)
+    assert table.lookup(100) == 255
+    assert table.lookup(175) == 126
+    assert table.lookup(200) == 0
+
+    # Below 1 it dims sooner than the straight line.
+    table = BrightnessCurve(
+        kind=BRIGHTNESS_CURVE_GAMMA,
+        min_illuminance=100,
+        max_illuminance=200,
+        gamma=0.5,
+    ).compile(255)
+    assert table.lookup(175) < 63
+
+
+def test_piecewise_curve() -> None:
+    """Test the piecewise curve steps between the points."""
+    curve = BrightnessCurve(
+        kind=BRIGHTNESS_CURVE_PIECEWISE,
+        min_illuminance=100,
+        max_illuminance=200,
+        points=((50.0, 100.0), (150.0, 50.0), (305.0, 20.0)),
+    )
+    table = curve.compile(200)
+    assert table.lookup(0) == 200
+    assert table.lookup(100) == 150
+    assert table.lookup(150) == 100
+    assert table.lookup(1000) == 40
+
+    # Without any points it is the same as the linear curve.
+    table = BrightnessCurve(
+        kind=BRIGHTNESS_CURVE_PIECEWISE, min_illuminance=100, max_illuminance=200
+    ).compile(255)
+    assert table.lookup(175) == 63
@@ -0,0 +1,113 @@
+"""Test for the occupancy engine without home assistant running."""
+
+from ..base.occupancy import OccupancyConfig, OccupancyEngine
+from ..config.area_state import AreaState
+
+
+def _engine() -> OccupancyEngine:
+    return OccupancyEngine(
+        OccupancyConfig(
+            clear_timeout=60,
+            extended_timeout=300,
+            secondary_states=(AreaState.AREA_STATE_BRIGHT, AreaState.AREA_STATE_SLEEP),
+        )
+    )
+
+
+def test_occupancy_timeouts() -> None:
+    """Test the occupied -> extended -> clear transitions."""
+    engine = _engine()
+    assert engine.evaluate(0).state == AreaState.AREA_STATE_CLEAR
+
+    engine.sensor_changed("binary_sensor.motion_1", True, 0)
+    result = engine.evaluate(0)
+    assert result.state == AreaState.AREA_STATE_OCCUPIED
+    assert result.deadline is None
+
+    engine.sensor_changed("binary_sensor.motion_1", False, 10)
+    result = engine.evaluate(10)
+    assert result.state == AreaState.AREA_STATE_OCCUPIED
+    assert result.deadline == 70
+
+    result = engine.evaluate(70)
+    assert result.state == AreaState.AREA_STATE_EXTENDED
+    assert result.deadline == 370
+
+    result = engine.evaluate(370)
+    assert result.state == AreaState.AREA_STATE_CLEAR
+    assert result.deadline is None
+
+
+def test_occupancy_removed_sensor() -> None:
+    """Test a sensor going away does not restart the clear timeout."""
+    engine = _engine()
+    engine.sensor_changed("binary_sensor.motion_1", True, 0)
+    engine.sensor_removed("binary_sensor.motion_1")
+    assert engine.evaluate(0).state == AreaState.AREA_STATE_CLEAR
+
+    engine.hold(100)
+    assert engine.evaluate(100).deadline == 160
+
+
+def test_occupancy_secondary_and_manual() -> None:
+    """Test the secondary states apply in priority order and manual wins."""
+    engine = _engine()
+    engine.sensor_changed("binary_sensor.motion_1", True, 0)
+    engine.secondary_changed(AreaState.AREA_STATE_SLEEP, True)
+    engine.secondary_changed(AreaState.AREA_STATE_BRIGHT, True)
+    assert engine.evaluate(0).state == AreaState.AREA_STATE_SLEEP
+
+    engine.secondary_changed(AreaState.AREA_STATE_SLEEP, False)
+    assert engine.evaluate(0).state == AreaState.AREA_STATE_BRIGHT
+
+    engine.set_enabled(False)
+    assert engine.evaluate(0).state == AreaState.AREA_STATE_MANUAL
+
+
+def test_occupancy_quorum_and_weights() -> None:
+    """Test the area is only occupied once enough sensors agree."""
+    engine = OccupancyEngine(
+        OccupancyConfig(clear_timeout=60, extended_timeout=300, quorum=2, threshold=2)
+    )
+    engine.set_weight("binary_sensor.mmwave", 1.5)
+    engine.set_weight("media_player.tv", 0.5)
+
+    engine.sensor_changed("binary_sensor.motion_1", True, 0)
+    assert engine.evaluate(0).state == AreaState.AREA_STATE_CLEAR
+    # Dropping out while never present does not start the clear timeout.
+    engine.sensor_changed("binary_sensor.motion_1", False, 5)
+    assert engine.evaluate(5).state == AreaState.AREA_STATE_CLEAR
+
+    engine.sensor_changed("binary_sensor.motion_1", True, 10)
+    engine.sensor_changed("media_player.tv", True, 10)
+    assert engine.evaluate(10).state == AreaState.AREA_STATE_CLEAR
+
+    engine.sensor_changed("binary_sensor.mmwave", True, 20)
+    assert engine.evaluate(20).state == AreaState.AREA_STATE_OCCUPIED
+
+    engine.sensor_changed("binary_sensor.motion_1", False, 30)
+    assert engine.present
+    engine.sensor_changed("binary_sensor.mmwave", False, 40)
+    result = engine.evaluate(40)
+    assert result.state == AreaState.AREA_STATE_OCCUPIED
+    assert result.deadline == 100
+
+
+def test_occupancy_direct_inputs() -> None:
+    """Test a child area or the humidity trend is presence without the quorum."""
+    engine = OccupancyEngine(
+        OccupancyConfig(clear_timeout=60, extended_timeout=300, quorum=2, threshold=2)
+    )
+    engine.sensor_changed("sensor.humidity_trend", True, 0, fused=False)
+    assert engine.evaluate(0).state == AreaState.AREA_STATE_OCCUPIED
+
+    # It is not counted towards the quorum or the weight.
+    engine.sensor_changed("binary_sensor.motion_1", True, 10)
+    engine.sensor_changed("sensor.humidity_trend", False, 20)
+    result = engine.evaluate(20)
+    assert result.state == AreaState.AREA_STATE_OCCUPIED
+    assert result.deadline == 80
+    assert not engine.present
+
+    engine.sensor_changed("binary_sensor.motion_2", True, 30)
+    assert engine.present
@@ -0,0 +1,57 @@
+"""Test for the presence filter without home assistant running."""
+
+from ..base.presence_filter import (
+    PresenceChange,
+    PresenceFilter,
+    PresenceFilterConfig,
+    PresenceFilterStats,
+)
+
+
+def test_presence_filter_passthrough() -> None:
+    """Test the changes go straight through with the default config."""
+    presence_filter = PresenceFilter(PresenceFilterConfig(), PresenceFilterStats())
+    presence_filter.update("binary_sensor.motion_1", True, 5)
+    assert presence_filter.advance(5) == [
+        PresenceChange("binary_sensor.motion_1", True, 5)
+    ]
+    assert presence_filter.deadline() is None
+
+
+def test_presence_filter_debounce() -> None:
+    """Test flapping sensors are absorbed until the change holds."""
+    stats = PresenceFilterStats()
+    presence_filter = PresenceFilter(PresenceFilterConfig(debounce=1), stats)
+    presence_filter.update("binary_sensor.motion_1", True, 0)
+    presence_filter.update("binary_sensor.motion_1", False, 0.2)
+    presence_filter.update("binary_sensor.motion_1", True, 0.4)
+    presence_filter.update("binary_sensor.motion_1", True, 0.6)
+    assert presence_filter.advance(1) == []
+    assert presence_filter.deadline() == 1.4
+    assert presence_filter.advance(1.4) == [
+        PresenceChange("binary_sensor.motion_1", True, 1.4)
+    ]
+    assert stats.raw == 4
+    assert stats.absorbed == 3
+
+
+def test_presence_filter_min_on_and_off() -> None:
+    """Test the sensors hold their state for the minimum times."""
+    presence_filter = PresenceFilter(
+        PresenceFilterConfig(min_on=30, min_off=5), PresenceFilterStats()
+    )
+    presence_filter.update("binary_sensor.motion_1", True, 0)
+    assert len(presence_filter.advance(0)) == 1
+
+    presence_filter.update("binary_sensor.motion_1", False, 10)
+    assert presence_filter.advance(10) == []
+    assert presence_filter.is_pending("binary_sensor.motion_1")
+    assert presence_filter.advance(30) == [
+        PresenceChange("binary_sensor.motion_1", False, 30)
+    ]
+
+    presence_filter.update("binary_sensor.motion_1", True, 32)
+    assert presence_filter.deadline() == 35
+
+    presence_filter.remove("binary_sensor.motion_1")
+    assert presence_filter.deadline() is None
@@ -0,0 +1,46 @@
+"""Test for the mqtt_room routing to the areas."""
+
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+
+from ..base.room_presence import RoomPresenceRouter
+
+
+async def test_room_router_routes_moves(hass: HomeAssistant) -> None:
+    """Test only the rooms left and entered hear about a tracker."""
+    hass.states.async_set("sensor.phone", "kitchen")
+    router = RoomPresenceRouter(hass)
+    kitchen: list[tuple[str, bool | None]] = []
+    lounge: list[tuple[str, bool | None]] = []
+    office: list[tuple[str, bool | None]] = []
+    router.async_track_room(
+        "Kitchen", ["sensor.phone"], lambda *args: kitchen.append(args)
+    )
+    router.async_track_room(
+        "Lounge", ["sensor.phone"], lambda *args: lounge.append(args)
+    )
+    remove_office = router.async_track_room(
+        "Office", ["sensor.phone"], lambda *args: office.append(args)
+    )
+    assert router.tracker_count("kitchen") == 1
+
+    hass.states.async_set("sensor.phone", "lounge")
+    await hass.async_block_till_done()
+    assert kitchen == [("sensor.phone", False)]
+    assert lounge == [("sensor.phone", True)]
+    assert office == []
+    assert router.tracker_count("kitchen") == 0
+    assert router.trackers_in("Lounge") == {"sensor.phone"}
+
+    hass.states.async_set("sensor.phone", STATE_UNAVAILABLE)
+    await hass.async_block_till_done()
+    assert lounge[-1] == ("sensor.phone", None)
+    assert router.tracker_count("lounge") == 0
+
+    remove_office()
+    hass.states.async_set("sensor.phone", "office")
+    await hass.async_block_till_done()
+    assert office == []
+    assert router.tracker_count("office") == 1
+
+    router.async_shutdown()
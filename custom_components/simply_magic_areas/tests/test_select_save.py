@@ -33,12 +33,17 @@ async def test_save_select(
     assert area_binary_sensor is not None
     assert area_binary_sensor.state == AreaState.AREA_STATE_CLEAR
     assert area_binary_sensor.attributes == {
-        "active_sensors": [],
+        "absorbed_events": 0,
+        "active_sensors": (),
         "friendly_name": "kitchen kitchen State (Simply Magic Areas)",
-        "last_active_sensors": [],
-        "presence_sensors": [],
+        "last_active_sensors": (),
+        "presence_sensors": (),
         "state": AreaState.AREA_STATE_CLEAR,
         "type": "interior",
+        "clear": False,
+        "clear_timeout": 3,
+        "extended": False,
+        "extended_timeout": 2,
         "device_class": "enum",
         "options": [
             AreaState.AREA_STATE_CLEAR,
@@ -208,7 +213,7 @@ async def test_light(
         "icon": "mdi:ceiling-light",
         "rgb_color": None,
         "supported_features": 0,
-        "last_update_from_entity": False,
+        "suppressed_commands": 0,
     }
 
     await hass.async_block_till_done()
@@ -239,7 +244,6 @@ async def test_fan(
         "entity_id": ["fan.test_5678"],
         "supported_features": 0,
         "icon": "mdi:fan-auto",
-        "last_update_from_entity": False,
     }
 
     await hass.async_block_till_done()
@@ -0,0 +1,26 @@
+"""Test for the per evaluation state snapshot."""
+
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+
+from ..base.snapshot import SnapshotStats, StateSnapshot
+
+
+async def test_snapshot_memoizes(hass: HomeAssistant) -> None:
+    """Test the reads are cached for the life of the snapshot."""
+    hass.states.async_set("sensor.humidity_trend", "1.5")
+    hass.states.async_set("sensor.broken", STATE_UNAVAILABLE)
+    stats = SnapshotStats()
+    snapshot = StateSnapshot(hass, stats)
+
+    assert snapshot.number("sensor.humidity_trend") == 1.5
+    hass.states.async_set("sensor.humidity_trend", "2.5")
+    assert snapshot.number("sensor.humidity_trend") == 1.5
+    assert snapshot.get("sensor.humidity_trend").state == "1.5"
+    assert snapshot.number("sensor.broken") is None
+    assert snapshot.get("sensor.missing") is None
+    assert snapshot.get("sensor.missing") is None
+    assert stats.misses == 3
+    assert stats.hits == 3
+
+    assert StateSnapshot(hass, stats).number("sensor.humidity_trend") == 2.5
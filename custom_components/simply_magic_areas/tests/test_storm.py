@@ -0,0 +1,49 @@
+"""Test for the availability storm detection."""
+
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from ..base.storm import StormDetector
+from .common import VirtualClock
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+async def test_storm_defers_until_settled(
+    hass: HomeAssistant, virtual_clock: VirtualClock
+) -> None:
+    """Test a burst defers the evaluations and runs each one once after."""
+    detector = StormDetector(hass, transitions=3, window=1, settle_time=2)
+    calls: list[str] = []
+
+    def kitchen() -> None:
+        calls.append("kitchen")
+
+    def lounge() -> None:
+        calls.append("lounge")
+
+    detector.record_transition()
+    detector.record_transition()
+    assert not detector.defer(kitchen)
+
+    detector.record_transition()
+    assert detector.active
+    assert detector.defer(kitchen)
+    assert detector.defer(kitchen)
+    assert detector.defer(lounge)
+
+    await asyncio.sleep(1)
+    detector.record_transition()
+    await asyncio.sleep(1.5)
+    await hass.async_block_till_done()
+    assert detector.active
+    assert calls == []
+
+    await asyncio.sleep(1)
+    await hass.async_block_till_done()
+    assert not detector.active
+    assert calls == ["kitchen", "lounge"]
+    assert detector.storms == 1
+
+    detector.async_shutdown()